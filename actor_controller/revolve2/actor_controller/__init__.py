@@ -1,5 +1,6 @@
 """Contains the interface for creating actor controllers, which are controllers for a single actor."""
 
 from ._actor_controller import ActorController
+from ._controller_batch import ControllerBatch, SequentialControllerBatch
 
-__all__ = ["ActorController"]
+__all__ = ["ActorController", "ControllerBatch", "SequentialControllerBatch"]
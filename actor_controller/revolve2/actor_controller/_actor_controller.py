@@ -3,8 +3,12 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import List
 
+import numpy as np
+import numpy.typing as npt
 from revolve2.serialization import Serializable
 
+from ._controller_batch import ControllerBatch, SequentialControllerBatch
+
 
 class ActorController(Serializable, ABC):
     """Interface for actor controllers."""
@@ -26,3 +30,45 @@ class ActorController(Serializable, ABC):
         :returns: The dof targets.
         """
         pass
+
+    @property
+    def is_open_loop(self) -> bool:
+        """
+        Get whether the dof targets of this controller only depend on how far it has been stepped, not on the state of the actor.
+
+        Runners can then compute the targets of many steps at once using `step_dof_targets`,
+        instead of stepping the controller at every control step of the simulation.
+
+        :returns: Whether this controller is open loop. False, unless overridden by a controller.
+        """
+        return False
+
+    def step_dof_targets(self, dt: float, num_steps: int) -> npt.NDArray[np.float_]:
+        """
+        Step the controller a number of times dt seconds forward, recording the dof targets after every step.
+
+        Row i contains the targets `get_dof_targets` returns after `step` has been called i + 1 times.
+        This implementation calls `step` and `get_dof_targets`. Open loop controllers can override it with something faster.
+
+        :param dt: The number of seconds of every step.
+        :param num_steps: The number of steps.
+        :returns: The dof targets, one row per step.
+        """
+        table = np.empty((num_steps, len(self.get_dof_targets())))
+        for step in range(num_steps):
+            self.step(dt)
+            table[step] = self.get_dof_targets()
+        return table
+
+    @classmethod
+    def make_batch(cls, controllers: List[ActorController]) -> ControllerBatch:
+        """
+        Create a batch that steps controllers together.
+
+        This implementation creates a `SequentialControllerBatch`.
+        Controllers that can be stepped faster together override it, and fall back to this implementation for controllers they cannot combine.
+
+        :param controllers: The controllers, all with the same number of dofs. They are copied.
+        :returns: The batch.
+        """
+        return SequentialControllerBatch(controllers)
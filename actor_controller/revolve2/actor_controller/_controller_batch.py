@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import copy
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, List
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from ._actor_controller import ActorController
+
+
+class ControllerBatch(ABC):
+    """
+    Interface for a number of actor controllers that are stepped together.
+
+    Controllers that share their structure can be stepped with a few operations on stacked arrays,
+    instead of stepping every controller on its own.
+    Create batches using `ActorController.make_batch`.
+    A batch works on copies of the controllers it was created from, so stepping it does not alter them.
+    """
+
+    @property
+    @abstractmethod
+    def num_controllers(self) -> int:
+        """
+        Get the number of controllers in the batch.
+
+        :returns: The number of controllers.
+        """
+        pass
+
+    @abstractmethod
+    def step(self, dt: float) -> None:
+        """
+        Step every controller dt seconds forward.
+
+        :param dt: The number of seconds to step forward.
+        """
+        pass
+
+    @abstractmethod
+    def get_dof_targets(self) -> npt.NDArray[np.float_]:
+        """
+        Get the degree of freedom targets of every controller.
+
+        :returns: The dof targets, one row per controller.
+        """
+        pass
+
+    def step_dof_targets(self, dt: float, num_steps: int) -> npt.NDArray[np.float_]:
+        """
+        Step every controller a number of times dt seconds forward, recording the dof targets after every step.
+
+        See `ActorController.step_dof_targets`.
+        This implementation calls `step` and `get_dof_targets`.
+
+        :param dt: The number of seconds of every step.
+        :param num_steps: The number of steps.
+        :returns: The dof targets, indexed by step, controller and dof.
+        """
+        targets = self.get_dof_targets()
+        table = np.empty((num_steps,) + targets.shape)
+        for step in range(num_steps):
+            self.step(dt)
+            table[step] = self.get_dof_targets()
+        return table
+
+
+class SequentialControllerBatch(ControllerBatch):
+    """
+    Batch that steps every controller on its own.
+
+    Works for any controllers with the same number of dofs.
+    Used for controllers that have no faster way to be stepped together.
+    """
+
+    _controllers: List[ActorController]
+
+    def __init__(self, controllers: List[ActorController]) -> None:
+        """
+        Initialize this object.
+
+        :param controllers: The controllers. They are copied.
+        """
+        assert len(controllers) > 0
+        assert (
+            len({len(controller.get_dof_targets()) for controller in controllers}) == 1
+        ), "all controllers must have the same number of dofs"
+
+        self._controllers = [copy.deepcopy(controller) for controller in controllers]
+
+    @property
+    def num_controllers(self) -> int:
+        """
+        Get the number of controllers in the batch.
+
+        :returns: The number of controllers.
+        """
+        return len(self._controllers)
+
+    def step(self, dt: float) -> None:
+        """
+        Step every controller dt seconds forward.
+
+        :param dt: The number of seconds to step forward.
+        """
+        for controller in self._controllers:
+            controller.step(dt)
+
+    def get_dof_targets(self) -> npt.NDArray[np.float_]:
+        """
+        Get the degree of freedom targets of every controller.
+
+        :returns: The dof targets, one row per controller.
+        """
+        return np.array(
+            [controller.get_dof_targets() for controller in self._controllers]
+        )
+
+    def step_dof_targets(self, dt: float, num_steps: int) -> npt.NDArray[np.float_]:
+        """
+        Step every controller a number of times dt seconds forward, recording the dof targets after every step.
+
+        Uses `ActorController.step_dof_targets` of every controller.
+
+        :param dt: The number of seconds of every step.
+        :param num_steps: The number of steps.
+        :returns: The dof targets, indexed by step, controller and dof.
+        """
+        return np.stack(
+            [
+                controller.step_dof_targets(dt, num_steps)
+                for controller in self._controllers
+            ],
+            axis=1,
+        )
@@ -1,6 +1,12 @@
 """Actor controller implementations."""
 
-from ._cpg import CpgActorController
+from ._cpg import CpgActorController, CpgControllerBatch
 from ._cpg_network_structure import Cpg, CpgNetworkStructure, CpgPair
 
-__all__ = ["Cpg", "CpgActorController", "CpgNetworkStructure", "CpgPair"]
+__all__ = [
+    "Cpg",
+    "CpgActorController",
+    "CpgControllerBatch",
+    "CpgNetworkStructure",
+    "CpgPair",
+]
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
-from typing import List
+from collections import OrderedDict
+from typing import Callable, List, Tuple, cast
 
 import numpy as np
 import numpy.typing as npt
-from revolve2.actor_controller import ActorController
+from revolve2.actor_controller import ActorController, ControllerBatch
 from revolve2.serialization import SerializeError, StaticData
 
+# Ways to integrate the state, see the `integrator` parameter of `CpgActorController.__init__`.
+_INTEGRATORS = ["rk4", "expm"]
+
+# Maximum number of step sizes a controller keeps the propagator of, least recently used are dropped first.
+_MAX_PROPAGATORS = 8
+
+# Step sizes that round to the same multiple of this many seconds share a propagator.
+# Coarse enough that the jitter of a measured control period only spans a few of them.
+_DT_RESOLUTION = 1e-3
+
 
 class CpgActorController(ActorController):
     """
@@ -21,6 +32,10 @@ class CpgActorController(ActorController):
     _num_output_neurons: int
     _weight_matrix: npt.NDArray[np.float_]  # nxn matrix matching number of neurons
     _dof_ranges: npt.NDArray[np.float_]
+    _integrator: str
+    # dt and exp(W dt) by quantized dt
+    _propagators: OrderedDict[int, Tuple[float, npt.NDArray[np.float_]]]
+    _dt_remainder: float  # see `_get_propagator`
 
     def __init__(
         self,
@@ -28,6 +43,7 @@ class CpgActorController(ActorController):
         num_output_neurons: int,
         weight_matrix: npt.NDArray[np.float_],
         dof_ranges: npt.NDArray[np.float_],
+        integrator: str = "rk4",
     ) -> None:
         """
         Initialize this object.
@@ -36,16 +52,25 @@ class CpgActorController(ActorController):
         :param num_output_neurons: The number of output neurons. These will be the first n neurons of the state array.
         :param weight_matrix: The weight matrix used during integration.
         :param dof_ranges: Maximum range (half the complete range) of the output of degrees of freedom.
+        :param integrator: How the state is integrated. "rk4": a step of the fourth order Runge-Kutta method. "expm": multiplication by the matrix exponential exp(W dt), which is the exact solution of the differential equation and costs a single matrix-vector product per step. The exponential is computed once per step size and kept for the few most recently used step sizes. Step sizes that round to the same millisecond share one, so a step size that changes every step, like the measured time between steps, does not compute a new exponential every step. The state then runs up to a millisecond behind or ahead of the steps it was given, without drifting further over time.
+        :raises ValueError: If the integrator is unknown.
         """
         assert state.ndim == 1
         assert weight_matrix.ndim == 2
         assert weight_matrix.shape[0] == weight_matrix.shape[1]
         assert state.shape[0] == weight_matrix.shape[0]
+        if integrator not in _INTEGRATORS:
+            raise ValueError(
+                f"Unknown integrator '{integrator}'. Choose from {_INTEGRATORS}."
+            )
 
         self._state = state
         self._num_output_neurons = num_output_neurons
         self._weight_matrix = weight_matrix
         self._dof_ranges = dof_ranges
+        self._integrator = integrator
+        self._propagators = OrderedDict()
+        self._dt_remainder = 0.0
 
     def step(self, dt: float) -> None:
         """
@@ -53,7 +78,43 @@ class CpgActorController(ActorController):
 
         :param dt: The number of seconds to step forward.
         """
-        self._state = self._rk45(self._state, self._weight_matrix, dt)
+        self._state = self._integrate(self._state, dt)
+
+    def _integrate(
+        self, state: npt.NDArray[np.float_], dt: float
+    ) -> npt.NDArray[np.float_]:
+        if self._integrator == "expm":
+            propagator, self._dt_remainder = _get_propagator(
+                self._propagators,
+                dt + self._dt_remainder,
+                lambda dt: self._expm(self._weight_matrix * dt),
+            )
+            propagated: npt.NDArray[np.float_] = np.matmul(propagator, state)
+            return propagated
+        return self._rk45(state, self._weight_matrix, dt)
+
+    @staticmethod
+    def _expm(A: npt.NDArray[np.float_]) -> npt.NDArray[np.float_]:
+        # matrix exponential by scaling and squaring with a [6/6] pade approximant,
+        # algorithm 11.3.1 of Golub and Van Loan, Matrix Computations.
+        # scipy.linalg.expm does the same, but scipy is not a dependency of this package.
+        norm = np.linalg.norm(A, np.inf)
+        num_squarings = max(0, int(np.floor(np.log2(norm))) + 1) if norm > 0.0 else 0
+        A = A / 2.0**num_squarings
+        q = 6
+        c = 1.0
+        power = np.identity(len(A))
+        numerator = np.identity(len(A))
+        denominator = np.identity(len(A))
+        for k in range(1, q + 1):
+            c = c * (q - k + 1) / (k * (2 * q - k + 1))
+            power = np.matmul(A, power)
+            numerator += c * power
+            denominator += (-1) ** k * c * power
+        result: npt.NDArray[np.float_] = np.linalg.solve(denominator, numerator)
+        for _ in range(num_squarings):
+            result = np.matmul(result, result)
+        return result
 
     @staticmethod
     def _rk45(
@@ -69,6 +130,68 @@ class CpgActorController(ActorController):
         A4: npt.NDArray[np.float_] = np.matmul(A, (state + dt * A3))
         return state + dt / 6 * (A1 + 2 * (A2 + A3) + A4)
 
+    @property
+    def is_open_loop(self) -> bool:
+        """
+        Get whether the dof targets of this controller only depend on how far it has been stepped, not on the state of the actor.
+
+        :returns: True, as the network has no inputs.
+        """
+        return True
+
+    def step_dof_targets(self, dt: float, num_steps: int) -> npt.NDArray[np.float_]:
+        """
+        Step the controller a number of times dt seconds forward, recording the dof targets after every step.
+
+        The state is integrated with the same arithmetic as `step`, so the targets are exactly those of stepping the controller one step at a time.
+        Only the clipping of the outputs is done for all steps at once.
+
+        :param dt: The number of seconds of every step.
+        :param num_steps: The number of steps.
+        :returns: The dof targets, one row per step.
+        """
+        # The states could also be computed with powers of the matrix of a single step, which is cheaper for many steps,
+        # but that differs from `step` by floating point rounding, which simulations of legged robots amplify.
+        states = np.empty((num_steps + 1, len(self._state)))
+        states[0] = self._state
+        for step in range(num_steps):
+            states[step + 1] = self._integrate(states[step], dt)
+        self._state = states[-1].copy()
+        return np.clip(
+            states[1:, : self._num_output_neurons],
+            a_min=-self._dof_ranges,
+            a_max=self._dof_ranges,
+        )
+
+    @classmethod
+    def make_batch(cls, controllers: List[ActorController]) -> ControllerBatch:
+        """
+        Create a batch that steps controllers together.
+
+        Cpg controllers with the same number of neurons, outputs and the same integrator are combined into a `CpgControllerBatch`.
+        Other controllers are stepped on their own.
+
+        :param controllers: The controllers, all with the same number of dofs. They are copied.
+        :returns: The batch.
+        """
+        if all(type(controller) is CpgActorController for controller in controllers):
+            cpg_controllers = cast(List[CpgActorController], controllers)
+            if (
+                len(
+                    {
+                        (
+                            len(controller._state),
+                            controller._num_output_neurons,
+                            controller._integrator,
+                        )
+                        for controller in cpg_controllers
+                    }
+                )
+                == 1
+            ):
+                return CpgControllerBatch(cpg_controllers)
+        return super().make_batch(controllers)
+
     def get_dof_targets(self) -> List[float]:
         """
         Get the degree of freedom targets from the controller.
@@ -96,6 +219,7 @@ class CpgActorController(ActorController):
             "num_output_neurons": self._num_output_neurons,
             "weight_matrix": self._weight_matrix.tolist(),
             "dof_ranges": self._dof_ranges.tolist(),
+            "integrator": self._integrator,
         }
 
     @classmethod
@@ -107,26 +231,209 @@ class CpgActorController(ActorController):
         :returns: The deserialized instance.
         :raises SerializeError: If this object cannot be deserialized from the given data.
         """
+        if not type(data) == dict:
+            raise SerializeError()
+        weight_matrix = data.get("weight_matrix")
+        dof_ranges = data.get("dof_ranges")
+        # data serialized before there were integrators uses rk4
+        integrator = data.get("integrator", "rk4")
         if (
-            not type(data) == dict
-            or not "state" in data
+            not "state" in data
             or not type(data["state"]) == list
             or not all(type(s) == float for s in data["state"])
             or not "num_output_neurons" in data
             or not type(data["num_output_neurons"]) is int
-            or not "weight_matrix" in data
+            or not isinstance(weight_matrix, list)
             or not all(
                 type(r) == list and all(type(c) == float for c in r)
-                for r in data["weight_matrix"]
+                for r in weight_matrix
             )
-            or not "dof_ranges" in data
-            or not all(type(r) == float for r in data["dof_ranges"])
+            or not isinstance(dof_ranges, list)
+            or not all(type(r) == float for r in dof_ranges)
+            or not isinstance(integrator, str)
+            or not integrator in _INTEGRATORS
         ):
             raise SerializeError()
 
         return CpgActorController(
             np.array(data["state"]),
             data["num_output_neurons"],
-            np.array(data["weight_matrix"]),
-            np.array(data["dof_ranges"]),
+            np.array(weight_matrix),
+            np.array(dof_ranges),
+            integrator,
+        )
+
+
+class CpgControllerBatch(ControllerBatch):
+    """
+    Cpg controllers with the same number of neurons, stepped together.
+
+    The states of all controllers are stacked into an array of shape [N, S] and their weight matrices into one of [N, S, S],
+    so a step of all controllers takes as many batched matrix products as a step of a single controller.
+    Every controller is integrated with the same arithmetic as `CpgActorController.step`.
+    The batch keeps its own propagators for the "expm" integrator.
+    """
+
+    _states: npt.NDArray[np.float_]  # [N, S]
+    _num_output_neurons: int
+    _weight_matrices: npt.NDArray[np.float_]  # [N, S, S]
+    _dof_ranges: npt.NDArray[np.float_]  # [N, DOF]
+    _integrator: str
+    # dt and [N, S, S] by quantized dt
+    _propagators: OrderedDict[int, Tuple[float, npt.NDArray[np.float_]]]
+    _dt_remainder: float  # see `_get_propagator`
+
+    def __init__(self, controllers: List[CpgActorController]) -> None:
+        """
+        Initialize this object.
+
+        :param controllers: The controllers. They must have the same number of neurons and outputs, and the same integrator. They are copied.
+        """
+        assert len(controllers) > 0
+        assert (
+            len(
+                {
+                    (
+                        len(controller._state),
+                        controller._num_output_neurons,
+                        controller._integrator,
+                    )
+                    for controller in controllers
+                }
+            )
+            == 1
+        ), "controllers must have the same number of neurons and outputs, and the same integrator"
+
+        self._states = np.array([controller._state for controller in controllers])
+        self._num_output_neurons = controllers[0]._num_output_neurons
+        self._weight_matrices = np.array(
+            [controller._weight_matrix for controller in controllers]
+        )
+        self._dof_ranges = np.array(
+            [
+                np.broadcast_to(controller._dof_ranges, self._num_output_neurons)
+                for controller in controllers
+            ]
+        )
+        self._integrator = controllers[0]._integrator
+        self._propagators = OrderedDict()
+        self._dt_remainder = 0.0
+
+    @property
+    def num_controllers(self) -> int:
+        """
+        Get the number of controllers in the batch.
+
+        :returns: The number of controllers.
+        """
+        return len(self._states)
+
+    def step(self, dt: float) -> None:
+        """
+        Step every controller dt seconds forward.
+
+        :param dt: The number of seconds to step forward.
+        """
+        self._states = self._integrate(self._states, dt)
+
+    def get_dof_targets(self) -> npt.NDArray[np.float_]:
+        """
+        Get the degree of freedom targets of every controller.
+
+        :returns: The dof targets, one row per controller.
+        """
+        return np.clip(
+            self._states[:, : self._num_output_neurons],
+            a_min=-self._dof_ranges,
+            a_max=self._dof_ranges,
         )
+
+    def step_dof_targets(self, dt: float, num_steps: int) -> npt.NDArray[np.float_]:
+        """
+        Step every controller a number of times dt seconds forward, recording the dof targets after every step.
+
+        Only the clipping of the outputs is done for all steps at once. See `CpgActorController.step_dof_targets`.
+
+        :param dt: The number of seconds of every step.
+        :param num_steps: The number of steps.
+        :returns: The dof targets, indexed by step, controller and dof.
+        """
+        states = np.empty((num_steps + 1,) + self._states.shape)
+        states[0] = self._states
+        for step in range(num_steps):
+            states[step + 1] = self._integrate(states[step], dt)
+        self._states = states[-1].copy()
+        return np.clip(
+            states[1:, :, : self._num_output_neurons],
+            a_min=-self._dof_ranges,
+            a_max=self._dof_ranges,
+        )
+
+    def _integrate(
+        self, states: npt.NDArray[np.float_], dt: float
+    ) -> npt.NDArray[np.float_]:
+        if self._integrator == "expm":
+            propagators, self._dt_remainder = _get_propagator(
+                self._propagators,
+                dt + self._dt_remainder,
+                lambda dt: np.array(
+                    [
+                        CpgActorController._expm(weight_matrix * dt)
+                        for weight_matrix in self._weight_matrices
+                    ]
+                ),
+            )
+            return _batch_matmul(propagators, states)
+        return self._rk45(states, self._weight_matrices, dt)
+
+    @staticmethod
+    def _rk45(
+        states: npt.NDArray[np.float_], A: npt.NDArray[np.float_], dt: float
+    ) -> npt.NDArray[np.float_]:
+        # `CpgActorController._rk45` for every controller
+        A1 = _batch_matmul(A, states)
+        A2 = _batch_matmul(A, (states + dt / 2 * A1))
+        A3 = _batch_matmul(A, (states + dt / 2 * A2))
+        A4 = _batch_matmul(A, (states + dt * A3))
+        return states + dt / 6 * (A1 + 2 * (A2 + A3) + A4)
+
+
+def _batch_matmul(
+    matrices: npt.NDArray[np.float_], vectors: npt.NDArray[np.float_]
+) -> npt.NDArray[np.float_]:
+    # product of every matrix in a stack of shape [N, S, S] with the matching vector in a stack of shape [N, S]
+    result: npt.NDArray[np.float_] = np.matmul(matrices, vectors[:, :, None])[:, :, 0]
+    return result
+
+
+def _get_propagator(
+    propagators: OrderedDict[int, Tuple[float, npt.NDArray[np.float_]]],
+    dt: float,
+    compute: Callable[[float], npt.NDArray[np.float_]],
+) -> Tuple[npt.NDArray[np.float_], float]:
+    """
+    Get the propagator of a step size from a cache, computing it if it is not cached.
+
+    The cache is keyed by the step size rounded to `_DT_RESOLUTION`, so step sizes that only differ by a little share a propagator.
+    It is computed with the first step size that rounds to the key,
+    and steps by a different size in the same bucket advance by that step size instead.
+    The difference is returned, so the caller can add it to its next step. That way the integrated time never differs
+    from the sum of the requested step sizes by more than `_DT_RESOLUTION`; a constant step size is integrated exactly.
+    Adding a propagator to a full cache drops the least recently used one.
+
+    :param propagators: The cache. Modified in place.
+    :param dt: The step size, including the remainder of the previous step.
+    :param compute: Computes the propagator of a step size.
+    :returns: The propagator, and the part of the step size it does not cover.
+    """
+    key = round(dt / _DT_RESOLUTION)
+    entry = propagators.get(key)
+    if entry is None:
+        entry = (dt, compute(dt))
+        propagators[key] = entry
+        if len(propagators) > _MAX_PROPAGATORS:
+            propagators.popitem(last=False)
+    else:
+        propagators.move_to_end(key)
+    propagator_dt, propagator = entry
+    return propagator, dt - propagator_dt
@@ -0,0 +1,5 @@
+"""Functionality for converting actors to mjcf."""
+
+from ._to_mjcf import to_mjcf
+
+__all__ = ["to_mjcf"]
@@ -0,0 +1,197 @@
+import xml.etree.ElementTree as xml
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pyrr import Matrix33, Quaternion, Vector3
+
+from .._actor import Actor
+from .._joint import Joint
+from .._rigid_body import RigidBody
+
+
+def to_mjcf(
+    physics_robot: Actor,
+    name: str,
+    joint_armature: float = 0.2,
+    actuator_kp: float = 10000.0,
+    actuator_kv: float = 0.1,
+    actuator_force_range: float = 4.0,
+) -> Tuple[xml.Element, List[xml.Element]]:
+    """
+    Convert an actor to mjcf elements that can be added to a mujoco model.
+
+    The result mirrors what mujoco produces when compiling the urdf created by `to_urdf`,
+    but without the need for an intermediate compilation step.
+    All element names are prefixed with `<name>/` and the root body itself is named `<name>/`.
+    The root body has a free joint and is placed at the origin.
+    Set its `pos` and `quat` attributes to pose it, or set the free joint's state after compilation.
+
+    Every joint gets a position actuator followed by a velocity actuator, in the order of `Actor.joints`.
+
+    :param physics_robot: The actor to convert.
+    :param name: Name to use for the robot in mjcf.
+    :param joint_armature: Armature of every joint.
+    :param actuator_kp: Position gain of the position actuators.
+    :param actuator_kv: Velocity gain of the velocity actuators.
+    :param actuator_force_range: Maximum absolute force of every actuator.
+    :returns: The root body, to be added to the worldbody, and the actuators, to be added to the actuator section.
+    :raises RuntimeError: In case the robot cannot be converted to mjcf.
+    """
+    tree: Dict[str, List[Joint]] = {}  # parent to children
+    seen_children = set()
+    for joint in physics_robot.joints:
+        if joint.body2.name in seen_children:
+            raise RuntimeError(
+                "Physics robot cannot be converted to mjcf. Cannot be represented as tree structure. One or more joints has multiple parents."
+            )
+        seen_children.add(joint.body2.name)
+        if joint.body1.name not in tree:
+            tree[joint.body1.name] = []
+        tree[joint.body1.name].append(joint)
+
+    root: Optional[RigidBody] = None
+    for body in physics_robot.bodies:
+        if body.name not in seen_children:
+            if root is not None:
+                raise RuntimeError(
+                    "Physics robot cannot be converted to mjcf. Cannot be represented as tree structure. Some parts of the robot are detached; no single root body."
+                )
+            root = body
+    if root is None:
+        raise RuntimeError(
+            "Physics robot cannot be converted to mjcf. Require at least one body."
+        )
+
+    root_element = xml.Element("body", {"name": f"{name}/"})
+    xml.SubElement(root_element, "freejoint", {"name": f"{name}/"})
+    # The urdf importer turns the root link into a static body, which drops its inertial.
+    # When attached to a free joint mujoco then infers the inertia from the geoms.
+    # That behaviour is kept so simulation results stay the same as when going through urdf.
+    _fill_body(
+        root_element,
+        root,
+        tree,
+        Vector3(),
+        Quaternion(),
+        name,
+        joint_armature,
+        with_inertial=False,
+    )
+
+    actuators = []
+    for joint in physics_robot.joints:
+        joint_name = f"{name}/{joint.name}"
+        actuators.append(
+            xml.Element(
+                "position",
+                {
+                    "joint": joint_name,
+                    "kp": str(actuator_kp),
+                    "ctrlrange": "-1.0 1.0",
+                    "forcerange": f"{-actuator_force_range} {actuator_force_range}",
+                },
+            )
+        )
+        actuators.append(
+            xml.Element(
+                "velocity",
+                {
+                    "joint": joint_name,
+                    "kv": str(actuator_kv),
+                    "ctrlrange": "-1.0 1.0",
+                    "forcerange": f"{-actuator_force_range} {actuator_force_range}",
+                },
+            )
+        )
+
+    return root_element, actuators
+
+
+def _fill_body(
+    element: xml.Element,
+    body: RigidBody,
+    tree: Dict[str, List[Joint]],
+    link_pos: Vector3,
+    link_ori: Quaternion,
+    name: str,
+    joint_armature: float,
+    with_inertial: bool,
+) -> None:
+    # The mjcf body frame is the frame of the joint it hangs from,
+    # so everything in the rigid body is transformed into that frame.
+    link_ori_inv = link_ori.inverse
+
+    if with_inertial:
+        com = link_ori_inv * (
+            body.position - link_pos + body.orientation * body.center_of_mass()
+        )
+        rotation = np.array(Matrix33(link_ori_inv * body.orientation))
+        inertia = rotation @ np.array(body.inertia_tensor()) @ rotation.T
+        xml.SubElement(
+            element,
+            "inertial",
+            {
+                "pos": _vector(com),
+                "mass": str(body.mass()),
+                "fullinertia": f"{inertia[0][0]} {inertia[1][1]} {inertia[2][2]} {inertia[0][1]} {inertia[0][2]} {inertia[1][2]}",
+            },
+        )
+
+    for collision in body.collisions:
+        xml.SubElement(
+            element,
+            "geom",
+            {
+                "name": f"{name}/{collision.name}",
+                "type": "box",
+                "size": _vector(collision.bounding_box / 2.0),
+                "pos": _vector(
+                    link_ori_inv
+                    * (body.position - link_pos + body.orientation * collision.position)
+                ),
+                "quat": _quaternion(
+                    link_ori_inv * body.orientation * collision.orientation
+                ),
+            },
+        )
+
+    for joint in tree.get(body.name, []):
+        child = xml.SubElement(
+            element,
+            "body",
+            {
+                "name": f"{name}/{joint.body2.name}",
+                "pos": _vector(link_ori_inv * (joint.position - link_pos)),
+                "quat": _quaternion(link_ori_inv * joint.orientation),
+            },
+        )
+        xml.SubElement(
+            child,
+            "joint",
+            {
+                "name": f"{name}/{joint.name}",
+                "type": "hinge",
+                "axis": "0 1 0",
+                "range": f"{-joint.range} {joint.range}",
+                "armature": str(joint_armature),
+            },
+        )
+        _fill_body(
+            child,
+            joint.body2,
+            tree,
+            joint.position,
+            joint.orientation,
+            name,
+            joint_armature,
+            with_inertial=True,
+        )
+
+
+def _vector(vector: Vector3) -> str:
+    return f"{vector.x} {vector.y} {vector.z}"
+
+
+def _quaternion(quaternion: Quaternion) -> str:
+    # mjcf quaternions are scalar first
+    return f"{quaternion.w} {quaternion.x} {quaternion.y} {quaternion.z}"
@@ -3,9 +3,14 @@
 from ._actor_control import ActorControl
 from ._batch import Batch
 from ._environment import Environment
+from ._phase_timings import PhaseTimings
+from ._physics_profile import PHYSICS_PROFILES, PhysicsProfile
 from ._posed_actor import PosedActor
+from ._reducer import Reducer
 from ._results import ActorState, BatchResults, EnvironmentResults, EnvironmentState
 from ._runner import Runner
+from ._termination import Termination
+from ._trajectory import Trajectory
 
 __all__ = [
     "ActorControl",
@@ -15,6 +20,12 @@ __all__ = [
     "Environment",
     "EnvironmentResults",
     "EnvironmentState",
+    "PHYSICS_PROFILES",
+    "PhaseTimings",
+    "PhysicsProfile",
     "PosedActor",
+    "Reducer",
     "Runner",
+    "Termination",
+    "Trajectory",
 ]
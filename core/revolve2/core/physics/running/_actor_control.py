@@ -1,19 +1,29 @@
-from typing import List, Tuple
+from typing import List, Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
 
 
 class ActorControl:
     """Interface for controlling degrees of freedom of actors in a simulation."""
 
-    _dof_targets: List[Tuple[int, List[float]]]  # actor, targets
+    _dof_targets: List[
+        Tuple[int, Union[List[float], npt.NDArray[np.float_]]]
+    ]  # actor, targets
 
     def __init__(self) -> None:
         """Initialize this object."""
         self._dof_targets = []
 
-    def set_dof_targets(self, actor: int, targets: List[float]) -> None:
+    def set_dof_targets(
+        self, actor: int, targets: Union[List[float], npt.NDArray[np.float_]]
+    ) -> None:
         """
         Set the degrees of freedom of an actor.
 
+        Targets can be given as a numpy array, which runners copy into the simulation without converting.
+        The array is read after the control function returns, so it can be a buffer that is reused between calls.
+
         :param actor: The actor to control.
         :param targets: The targets to set.
         """
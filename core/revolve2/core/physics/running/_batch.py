@@ -1,10 +1,13 @@
 """Batch class."""
 
 from dataclasses import dataclass, field
-from typing import Callable, List
+from typing import Callable, Dict, List, Optional
 
 from ._actor_control import ActorControl
 from ._environment import Environment
+from ._physics_profile import PHYSICS_PROFILES, PhysicsProfile
+from ._reducer import Reducer
+from ._termination import Termination
 
 
 @dataclass
@@ -30,5 +33,42 @@ class Batch:
     """
     control: Callable[[int, float, ActorControl], None]
 
+    """
+    Measures to compute for every environment while simulating, by name.
+
+    Every environment gets its own copy of each reducer.
+    The results are stored in `EnvironmentResults.reduced` under the same name.
+    """
+    reducers: Dict[str, Reducer] = field(default_factory=dict)
+
+    """
+    Whether to return all sampled states in `EnvironmentResults.environment_states`.
+
+    If False, only the reduced measures are returned, which saves memory and makes results cheap to send between processes.
+    """
+    record_trajectory: bool = True
+
+    """When to end the simulation of an environment early. Environments can override this with their own termination."""
+    termination: Optional[Termination] = None
+
+    """Numerical settings of the simulation. See `PHYSICS_PROFILES` for the named profiles."""
+    physics_profile: PhysicsProfile = PHYSICS_PROFILES["accurate"]
+
+    """
+    Seed for the random initial state of the environments, such as noise on the joints.
+
+    Environments without their own seed get a seed derived from this seed and their index in the batch.
+    If neither is set, the runner uses numpy's global random state.
+    Environments with the same seed start from the same state, regardless of where and with what else they are simulated.
+    """
+    seed: Optional[int] = None
+
+    """
+    Whether to measure where the time running the environments goes, see `PhaseTimings`.
+
+    The timings are returned in `EnvironmentResults.timings` and `BatchResults.timings`, if the runner supports it.
+    """
+    record_timings: bool = False
+
     """The environments to simulate."""
     environments: List[Environment] = field(default_factory=list, init=False)
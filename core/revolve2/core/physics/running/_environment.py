@@ -1,11 +1,22 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
+
+from revolve2.actor_controller import ActorController
 
 from ._posed_actor import PosedActor
+from ._termination import Termination
 
 
 @dataclass
 class Environment:
     """A list of posed actors."""
 
+    # when to end the simulation early. if None, the termination of the batch is used
+    termination: Optional[Termination] = None
+    # seed for the random initial state of the simulation. if None, the seed of the batch is used
+    seed: Optional[int] = None
+    # controller of the first actor, only used if it is open loop (see `ActorController.is_open_loop`).
+    # runners may then take the dof targets of the first actor from its target table instead of calling the control function of the batch.
+    # the controller itself is not stepped
+    controller: Optional[ActorController] = None
     actors: List[PosedActor] = field(default_factory=list, init=False)
@@ -0,0 +1,83 @@
+"""PhaseTimings class."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+@dataclass
+class PhaseTimings:
+    """
+    Wall time spent in each phase of running environments, such as model compilation, physics or control.
+
+    Which phases there are depends on the runner.
+    When several environments are run together, the time and counts of the phases they share are divided among them,
+    so counts can be fractional. Adding the timings of all environments gives the totals.
+    """
+
+    """Wall time in seconds spent in every phase."""
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+    """Number of times every phase happened, e.g. the number of physics steps or control calls."""
+    counts: Dict[str, float] = field(default_factory=dict)
+
+    """Simulated time in seconds."""
+    simulated_time: float = 0.0
+
+    def add(self, phase: str, seconds: float, count: float = 1) -> None:
+        """
+        Add time spent in a phase.
+
+        :param phase: Name of the phase.
+        :param seconds: Wall time in seconds.
+        :param count: How many times the phase happened in that time.
+        """
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        self.counts[phase] = self.counts.get(phase, 0) + count
+
+    def merge(self, other: PhaseTimings, fraction: float = 1.0) -> None:
+        """
+        Add the times, counts and simulated time of other timings to these.
+
+        :param other: The timings to add.
+        :param fraction: Fraction of the times and counts of `other` to add, e.g. to divide time spent on several environments at once among them. Simulated time is added in full.
+        """
+        for phase, seconds in other.seconds.items():
+            self.add(phase, seconds * fraction, other.counts.get(phase, 0) * fraction)
+        self.simulated_time += other.simulated_time
+
+    @property
+    def wall_time(self) -> float:
+        """
+        Get the total wall time of all phases.
+
+        :returns: The wall time in seconds.
+        """
+        return sum(self.seconds.values())
+
+    @property
+    def real_time_factor(self) -> float:
+        """
+        Get how many times faster than real time the environments were run.
+
+        :returns: Simulated time divided by wall time. 0 if no time was spent.
+        """
+        wall_time = self.wall_time
+        return self.simulated_time / wall_time if wall_time > 0.0 else 0.0
+
+    def summary(self, prefix: str = "") -> Dict[str, float]:
+        """
+        Get the timings as a flat dictionary, e.g. for logging.
+
+        :param prefix: Prefix of every key.
+        :returns: Seconds and count of every phase, total wall time, simulated time and real time factor.
+        """
+        summary: Dict[str, float] = {}
+        for phase, seconds in self.seconds.items():
+            summary[f"{prefix}{phase}_seconds"] = seconds
+            summary[f"{prefix}{phase}_count"] = self.counts.get(phase, 0)
+        summary[f"{prefix}wall_time"] = self.wall_time
+        summary[f"{prefix}simulated_time"] = self.simulated_time
+        summary[f"{prefix}real_time_factor"] = self.real_time_factor
+        return summary
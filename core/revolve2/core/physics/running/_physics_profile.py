@@ -0,0 +1,65 @@
+"""PhysicsProfile class and the named profiles."""
+
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass(frozen=True)
+class PhysicsProfile:
+    """
+    Numerical settings of a physics simulation, trading accuracy for speed.
+
+    The actuator gains are part of the profile, as stiff actuators that are stable with a small timestep
+    can be unstable or behave differently with a larger one.
+    """
+
+    """Simulation timestep in seconds."""
+    timestep: float
+
+    """Name of the numerical integrator, as understood by the runner. For mujoco: "Euler", "RK4" or "implicit"."""
+    integrator: str
+
+    """Armature of every joint, which adds to the inertia of the joint."""
+    joint_armature: float
+
+    """Proportional gain of the position actuators."""
+    actuator_kp: float
+
+    """Derivative gain of the position actuators."""
+    actuator_kv: float
+
+
+"""
+Named physics profiles.
+
+"accurate": the settings that have always been used. The default.
+"balanced": twice the timestep, with the cheaper semi-implicit Euler integrator.
+"fast": four times the timestep, with the semi-implicit Euler integrator.
+
+The gains are the same in every profile.
+With the armature of the joints, the actuators oscillate at about 220 rad/s,
+which semi-implicit Euler still integrates stably at a 2 ms timestep.
+"""
+PHYSICS_PROFILES: Dict[str, PhysicsProfile] = {
+    "accurate": PhysicsProfile(
+        timestep=0.0005,
+        integrator="RK4",
+        joint_armature=0.2,
+        actuator_kp=10000.0,
+        actuator_kv=0.1,
+    ),
+    "balanced": PhysicsProfile(
+        timestep=0.001,
+        integrator="Euler",
+        joint_armature=0.2,
+        actuator_kp=10000.0,
+        actuator_kv=0.1,
+    ),
+    "fast": PhysicsProfile(
+        timestep=0.002,
+        integrator="Euler",
+        joint_armature=0.2,
+        actuator_kp=10000.0,
+        actuator_kv=0.1,
+    ),
+}
@@ -0,0 +1,35 @@
+"""Reducer class."""
+
+from abc import ABC, abstractmethod
+
+from ._results import EnvironmentState
+
+
+class Reducer(ABC):
+    """
+    Interface for measures that are computed from the states of an environment while it is simulated.
+
+    Runners that support reducers make a copy of every reducer in a batch for every environment.
+    They call `init` before the first state, `update` for every sampled state in order, and `finalize` when the simulation has ended.
+    This way a measure can be computed without storing all states.
+    """
+
+    @abstractmethod
+    def init(self) -> None:
+        """Reset to the state before any environment state has been seen."""
+
+    @abstractmethod
+    def update(self, state: EnvironmentState) -> None:
+        """
+        Process the next sampled state of the environment.
+
+        :param state: The state. Only valid during this call; copy what should be kept.
+        """
+
+    @abstractmethod
+    def finalize(self) -> float:
+        """
+        Compute the measure from all states seen.
+
+        :returns: The measure.
+        """
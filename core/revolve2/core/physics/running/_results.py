@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Set, Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional
 
+import numpy as np
+import numpy.typing as npt
 from pyrr import Quaternion, Vector3
 
+from ._phase_timings import PhaseTimings
+
+if TYPE_CHECKING:
+    from ._trajectory import Trajectory
+
 
 @dataclass
 class ActorState:
@@ -13,15 +20,15 @@ class ActorState:
     position: Vector3
     orientation: Quaternion
 
-    # IDs of geometries (of this actor) in contact with ground
-    groundcontacts: Optional[Set[int]] = None
+    # per geometry id in the simulation, whether it is part of this actor and in contact with ground
+    groundcontacts: Optional[npt.NDArray[np.bool_]] = None
     # count of total geometries in Actor's morphology
     numgeoms: Optional[int] = None
 
     # angles of each hinge joint
-    hinge_angles: List[float] | None = None
+    hinge_angles: List[float] | npt.NDArray[np.float_] | None = None
     # velocities of each hinge joint
-    hinge_vels: List[float] | None = None
+    hinge_vels: List[float] | npt.NDArray[np.float_] | None = None
 
 
 @dataclass
@@ -29,8 +36,10 @@ class EnvironmentState:
     """State of an environment."""
 
     time_seconds: float
-    actions: List[List[float]]
-    action_diffs: List[List[float]]
+    # targets given by the control function since the previous state, a row per control step
+    actions: List[List[float]] | npt.NDArray[np.float_]
+    # difference of every action to the action before it
+    action_diffs: List[List[float]] | npt.NDArray[np.float_]
     actor_states: List[ActorState]
 
 
@@ -38,8 +47,17 @@ class EnvironmentState:
 class EnvironmentResults:
     """Result of running an environment."""
 
-    environment_states: List[EnvironmentState]
+    # either a list of states, or the states stored columnwise
+    environment_states: List[EnvironmentState] | Trajectory
     steps_completed: int = 0  # total number of simulation steps performed
+    # values of the reducers of the batch, by name
+    reduced: Dict[str, float] = field(default_factory=dict)
+    # simulation time at which the environment was terminated early, or None if it ran for the full simulation time
+    termination_time: Optional[float] = None
+    # which condition terminated the environment, e.g. "min_height"
+    termination_reason: Optional[str] = None
+    # where the time running this environment went, if the batch asked for it
+    timings: Optional[PhaseTimings] = None
 
 
 @dataclass
@@ -47,3 +65,5 @@ class BatchResults:
     """Result of running a batch."""
 
     environment_results: List[EnvironmentResults]
+    # timings of all environments added together, if the batch asked for them
+    timings: Optional[PhaseTimings] = None
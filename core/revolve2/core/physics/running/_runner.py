@@ -11,6 +11,9 @@ class Runner(ABC):
     Interface class for physics runners.
 
     Running happens either in simulation or reality, depending on the implementation.
+
+    Implementations that support it measure where their time goes when a batch has `record_timings` set,
+    and return a `PhaseTimings` per environment and for the whole batch.
     """
 
     @abstractmethod
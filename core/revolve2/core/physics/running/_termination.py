@@ -0,0 +1,42 @@
+"""Termination class."""
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class Termination:
+    """
+    Conditions under which the simulation of an environment ends before the simulation time has passed.
+
+    Every condition is optional and applies to the root of each actor in the environment.
+    The environment is terminated as soon as one condition holds for one of its actors.
+    Runners evaluate the conditions when the control function would be called.
+    """
+
+    """Terminate if the height of an actor drops below this value."""
+    min_height: Optional[float] = None
+
+    """Terminate if the height of an actor rises above this value."""
+    max_height: Optional[float] = None
+
+    """
+    Terminate if an actor tilts further than this many radians.
+
+    Tilt is the angle between the direction that was up for the actor at the start of the simulation and the direction it points to now.
+    """
+    max_tilt: Optional[float] = None
+
+    """
+    Length in seconds of simulation time of the windows in which an actor must make progress.
+
+    The simulation time is divided into consecutive windows of this length.
+    An actor that moved less than `stagnation_distance` in the xy plane during a window is terminated.
+    """
+    stagnation_window: Optional[float] = None
+
+    """Distance an actor must move during every stagnation window. See `stagnation_window`."""
+    stagnation_distance: float = 0.01
+
+    """Terminate if simulating the environment takes longer than this many seconds of real time."""
+    max_wall_time: Optional[float] = None
@@ -0,0 +1,333 @@
+"""Trajectory class."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, overload
+
+import numpy as np
+import numpy.typing as npt
+from pyrr import Quaternion, Vector3
+
+from ._results import ActorState, EnvironmentState
+
+
+class Trajectory(Sequence[EnvironmentState]):
+    """
+    Columnar storage of the sampled states of an environment.
+
+    Every sampled value is stored in a numpy array with a row per sample, which grows as samples are added.
+    The actions given since the previous sample are stored along with every sample.
+
+    For backward compatibility this is also a sequence of `EnvironmentState`.
+    Those states, and the `ActorState` objects in them, are created on access and view the stored arrays.
+    """
+
+    _num_hinges: List[int]
+    _hinge_ranges: List[Tuple[int, int]]
+    _num_geoms: Optional[int]
+
+    _num_states: int
+    _time: npt.NDArray[np.float_]  # [T]
+    _position: npt.NDArray[np.float_]  # [T, A, 3]
+    _orientation: npt.NDArray[np.float_]  # [T, A, 4]
+    _hinge_angles: npt.NDArray[np.float_]  # [T, H], hinges of all actors
+    _hinge_vels: npt.NDArray[np.float_]  # [T, H]
+    _groundcontacts: Optional[npt.NDArray[np.bool_]]  # [T, A, G]
+    _actions_end: npt.NDArray[np.int_]  # [T], number of actions given before the sample
+
+    _num_actions: int
+    _actions: npt.NDArray[np.float_]  # [C, D]
+    _action_diffs: npt.NDArray[np.float_]  # [C, D]
+    _last_cleared_action: Optional[npt.NDArray[np.float_]]  # [D]
+
+    def __init__(
+        self,
+        num_hinges: List[int],
+        action_size: int,
+        num_geoms: Optional[int] = None,
+        capacity: int = 16,
+        action_capacity: int = 16,
+    ) -> None:
+        """
+        Initialize this object.
+
+        :param num_hinges: Number of hinges of every actor in the environment.
+        :param action_size: Number of values in an action.
+        :param num_geoms: Total number of geometries in the simulation. If given, ground contacts are stored for every sample. See `ActorState.groundcontacts`.
+        :param capacity: Number of samples to allocate memory for. More can be added, at the cost of a reallocation.
+        :param action_capacity: Number of actions to allocate memory for. More can be added, at the cost of a reallocation.
+        """
+        num_actors = len(num_hinges)
+        capacity = max(1, capacity)
+        action_capacity = max(1, action_capacity)
+
+        self._num_hinges = num_hinges
+        self._hinge_ranges = []
+        for count in num_hinges:
+            begin = self._hinge_ranges[-1][1] if len(self._hinge_ranges) > 0 else 0
+            self._hinge_ranges.append((begin, begin + count))
+        self._num_geoms = num_geoms
+
+        self._num_states = 0
+        self._time = np.zeros(capacity)
+        self._position = np.zeros((capacity, num_actors, 3))
+        self._orientation = np.zeros((capacity, num_actors, 4))
+        self._hinge_angles = np.zeros((capacity, sum(num_hinges)))
+        self._hinge_vels = np.zeros((capacity, sum(num_hinges)))
+        self._groundcontacts = (
+            None
+            if num_geoms is None
+            else np.zeros((capacity, num_actors, num_geoms), dtype=np.bool_)
+        )
+        self._actions_end = np.zeros(capacity, dtype=np.int_)
+
+        self._num_actions = 0
+        self._actions = np.zeros((action_capacity, action_size))
+        self._action_diffs = np.zeros((action_capacity, action_size))
+        self._last_cleared_action = None
+
+    def append_action(self, action: Union[List[float], npt.NDArray[np.float_]]) -> None:
+        """
+        Add an action, which is stored with the next sample.
+
+        Its difference to the previous action is stored as well, also if that action has been removed by `clear`.
+        The difference of the first action is the action itself.
+
+        :param action: The action.
+        """
+        if self._num_actions == len(self._actions):
+            self._actions = _grow(self._actions)
+            self._action_diffs = _grow(self._action_diffs)
+
+        index = self._num_actions
+        self._actions[index] = action
+        if index == 0:
+            if self._last_cleared_action is None:
+                self._action_diffs[index] = self._actions[index]
+            else:
+                np.subtract(
+                    self._actions[index],
+                    self._last_cleared_action,
+                    out=self._action_diffs[index],
+                )
+        else:
+            np.subtract(
+                self._actions[index],
+                self._actions[index - 1],
+                out=self._action_diffs[index],
+            )
+        self._num_actions += 1
+
+    def append_state(
+        self,
+        time: float,
+        position: npt.ArrayLike,
+        orientation: npt.ArrayLike,
+        hinge_angles: npt.ArrayLike,
+        hinge_vels: npt.ArrayLike,
+        groundcontacts: Optional[npt.ArrayLike] = None,
+    ) -> None:
+        """
+        Add a sample.
+
+        :param time: Time of the sample in seconds.
+        :param position: Position of every actor. [A, 3]
+        :param orientation: Orientation of every actor, as stored in `ActorState`. [A, 4]
+        :param hinge_angles: Angles of the hinges of all actors, actor after actor. [H]
+        :param hinge_vels: Velocities of the hinges of all actors, actor after actor. [H]
+        :param groundcontacts: Per actor, per geometry whether it is part of the actor and touches the ground. Required if and only if `num_geoms` was given. [A, G]
+        """
+        assert (groundcontacts is None) == (self._groundcontacts is None)
+
+        if self._num_states == len(self._time):
+            self._time = _grow(self._time)
+            self._position = _grow(self._position)
+            self._orientation = _grow(self._orientation)
+            self._hinge_angles = _grow(self._hinge_angles)
+            self._hinge_vels = _grow(self._hinge_vels)
+            if self._groundcontacts is not None:
+                self._groundcontacts = _grow(self._groundcontacts)
+            self._actions_end = _grow(self._actions_end)
+
+        index = self._num_states
+        self._time[index] = time
+        self._position[index] = position
+        self._orientation[index] = orientation
+        self._hinge_angles[index] = hinge_angles
+        self._hinge_vels[index] = hinge_vels
+        if self._groundcontacts is not None:
+            self._groundcontacts[index] = groundcontacts
+        self._actions_end[index] = self._num_actions
+        self._num_states += 1
+
+    def clear(self) -> None:
+        """
+        Remove all samples and actions, keeping the allocated memory.
+
+        Used to process samples one at a time without storing them.
+        Views of the removed samples handed out before are overwritten by the samples added after this.
+        """
+        if self._num_actions > 0:
+            self._last_cleared_action = self._actions[self._num_actions - 1].copy()
+        self._num_states = 0
+        self._num_actions = 0
+
+    @property
+    def time(self) -> npt.NDArray[np.float_]:
+        """
+        Get the time of every sample in seconds.
+
+        :returns: Array of shape [T].
+        """
+        return self._time[: self._num_states]
+
+    @property
+    def position(self) -> npt.NDArray[np.float_]:
+        """
+        Get the position of every actor in every sample.
+
+        :returns: Array of shape [T, A, 3].
+        """
+        return self._position[: self._num_states]
+
+    @property
+    def orientation(self) -> npt.NDArray[np.float_]:
+        """
+        Get the orientation of every actor in every sample.
+
+        :returns: Array of shape [T, A, 4].
+        """
+        return self._orientation[: self._num_states]
+
+    def hinge_angles(self, actor: int = 0) -> npt.NDArray[np.float_]:
+        """
+        Get the hinge angles of an actor in every sample.
+
+        :param actor: The actor.
+        :returns: Array of shape [T, J].
+        """
+        begin, end = self._hinge_ranges[actor]
+        return self._hinge_angles[: self._num_states, begin:end]
+
+    def hinge_vels(self, actor: int = 0) -> npt.NDArray[np.float_]:
+        """
+        Get the hinge velocities of an actor in every sample.
+
+        :param actor: The actor.
+        :returns: Array of shape [T, J].
+        """
+        begin, end = self._hinge_ranges[actor]
+        return self._hinge_vels[: self._num_states, begin:end]
+
+    @property
+    def groundcontacts(self) -> Optional[npt.NDArray[np.bool_]]:
+        """
+        Get, per actor, which geometries touch the ground in every sample.
+
+        :returns: Array of shape [T, A, G], or None if ground contacts are not stored.
+        """
+        if self._groundcontacts is None:
+            return None
+        return self._groundcontacts[: self._num_states]
+
+    @property
+    def actions(self) -> npt.NDArray[np.float_]:
+        """
+        Get all actions.
+
+        :returns: Array of shape [C, D].
+        """
+        return self._actions[: self._num_actions]
+
+    @property
+    def action_diffs(self) -> npt.NDArray[np.float_]:
+        """
+        Get the difference of every action to the action before it.
+
+        :returns: Array of shape [C, D].
+        """
+        return self._action_diffs[: self._num_actions]
+
+    def __len__(self) -> int:
+        """
+        Get the number of samples.
+
+        :returns: The number of samples.
+        """
+        return self._num_states
+
+    @overload
+    def __getitem__(self, index: int) -> EnvironmentState:
+        pass
+
+    @overload
+    def __getitem__(self, index: slice) -> List[EnvironmentState]:
+        pass
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[EnvironmentState, List[EnvironmentState]]:
+        """
+        Get a sample as an environment state.
+
+        :param index: Index of the sample, or a slice of samples.
+        :returns: The environment state, or a list of them for a slice.
+        :raises IndexError: If the index is out of range.
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._num_states))]
+
+        if index < 0:
+            index += self._num_states
+        if not 0 <= index < self._num_states:
+            raise IndexError("Trajectory index out of range.")
+
+        actions_begin = 0 if index == 0 else self._actions_end[index - 1]
+        actions_end = self._actions_end[index]
+        return EnvironmentState(
+            float(self._time[index]),
+            self._actions[actions_begin:actions_end],
+            self._action_diffs[actions_begin:actions_end],
+            [
+                ActorState(
+                    Vector3(self._position[index, actor]),
+                    Quaternion(self._orientation[index, actor]),
+                    None
+                    if self._groundcontacts is None
+                    else self._groundcontacts[index, actor],
+                    self._num_geoms,
+                    self._hinge_angles[index, begin:end],
+                    self._hinge_vels[index, begin:end],
+                )
+                for actor, (begin, end) in enumerate(self._hinge_ranges)
+            ],
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Get the state to pickle, leaving out unused capacity.
+
+        :returns: The state.
+        """
+        state = self.__dict__.copy()
+        for name in [
+            "_time",
+            "_position",
+            "_orientation",
+            "_hinge_angles",
+            "_hinge_vels",
+            "_groundcontacts",
+            "_actions_end",
+        ]:
+            if state[name] is not None:
+                state[name] = state[name][: self._num_states].copy()
+        for name in ["_actions", "_action_diffs"]:
+            state[name] = state[name][: self._num_actions].copy()
+        return state
+
+
+def _grow(array: npt.NDArray[Any]) -> npt.NDArray[Any]:
+    # Views handed out before keep viewing the old array, which is never changed again.
+    grown = np.zeros((max(1, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
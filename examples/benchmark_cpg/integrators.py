@@ -0,0 +1,138 @@
+"""
+Benchmark the integrators of `CpgActorController` on speed and accuracy.
+
+For networks of several sizes with random weights and several step sizes, this reports:
+- the time of a call to `step`,
+- the largest error of the state over the simulated time, relative to the exact solution exp(W t) X0,
+  which is computed directly for every sampled time instead of step by step.
+"""
+
+import argparse
+import math
+import time
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+from revolve2.actor_controllers.cpg import (
+    CpgActorController,
+    CpgNetworkStructure,
+    CpgPair,
+)
+
+INTEGRATORS = ["rk4", "expm"]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-c",
+        "--cpgs",
+        type=int,
+        nargs="+",
+        default=[4, 8, 16, 32],
+        help="numbers of cpgs in the networks",
+    )
+    parser.add_argument(
+        "-d",
+        "--dts",
+        type=float,
+        nargs="+",
+        default=[1 / 120, 1 / 30, 1 / 10, 1 / 4],
+        help="step sizes in seconds",
+    )
+    parser.add_argument(
+        "-t",
+        "--simulation_time",
+        type=float,
+        default=30.0,
+        help="seconds to integrate for the accuracy comparison",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'cpgs':>5}{'dt':>8}{'rk4 us':>9}{'expm us':>9}{'speedup':>9}{'rk4 error':>12}{'expm error':>12}"
+    )
+    rng = np.random.Generator(np.random.PCG64(0))
+    for num_cpgs in args.cpgs:
+        weight_matrix, initial_state = _make_network(num_cpgs, rng)
+        for dt in args.dts:
+            step_times = []
+            errors = []
+            for integrator in INTEGRATORS:
+                step_time, error = _measure(
+                    weight_matrix, initial_state, integrator, dt, args.simulation_time
+                )
+                step_times.append(step_time)
+                errors.append(error)
+            print(
+                f"{num_cpgs:>5}{dt:>8.4f}{step_times[0] * 1e6:>9.2f}{step_times[1] * 1e6:>9.2f}"
+                f"{step_times[0] / step_times[1]:>9.2f}{errors[0]:>12.2e}{errors[1]:>12.2e}"
+            )
+
+
+def _make_network(
+    num_cpgs: int, rng: np.random.Generator
+) -> Tuple[npt.NDArray[np.float_], npt.NDArray[np.float_]]:
+    """
+    Create a chain of cpgs with random weights.
+
+    :param num_cpgs: Number of cpgs.
+    :param rng: Random number generator.
+    :returns: The weight matrix and the initial state.
+    """
+    cpgs = CpgNetworkStructure.make_cpgs(num_cpgs)
+    structure = CpgNetworkStructure(
+        cpgs, {CpgPair(cpgs[i], cpgs[i + 1]) for i in range(num_cpgs - 1)}
+    )
+    weight_matrix = structure.make_connection_weights_matrix_from_params(
+        list(rng.uniform(-1.0, 1.0, structure.num_connections))
+    )
+    return weight_matrix, structure.make_uniform_state(0.5 * math.pi / 2.0)
+
+
+def _measure(
+    weight_matrix: npt.NDArray[np.float_],
+    initial_state: npt.NDArray[np.float_],
+    integrator: str,
+    dt: float,
+    simulation_time: float,
+) -> Tuple[float, float]:
+    """
+    Integrate a network and compare it to the exact solution.
+
+    :param weight_matrix: Weight matrix of the network.
+    :param initial_state: Initial state of the network.
+    :param integrator: The integrator.
+    :param dt: Step size in seconds.
+    :param simulation_time: Seconds to integrate.
+    :returns: Seconds per step and the largest error of the state, relative to the largest value of the exact state.
+    """
+    num_outputs = len(initial_state) // 2
+    dof_ranges = np.full(num_outputs, math.inf)
+    controller = CpgActorController(
+        initial_state.copy(), num_outputs, weight_matrix, dof_ranges, integrator
+    )
+
+    num_steps = max(1, round(simulation_time / dt))
+    error = 0.0
+    scale = 0.0
+    elapsed = 0.0
+    for step in range(1, num_steps + 1):
+        start = time.perf_counter()
+        controller.step(dt)
+        elapsed += time.perf_counter() - start
+        # only compare the outputs, which are unclipped here
+        exact = np.matmul(
+            CpgActorController._expm(weight_matrix * (step * dt)), initial_state
+        )[:num_outputs]
+        error = max(
+            error, np.max(np.abs(np.array(controller.get_dof_targets()) - exact))
+        )
+        scale = max(scale, np.max(np.abs(exact)))
+    return elapsed / num_steps, error / scale
+
+
+if __name__ == "__main__":
+    main()
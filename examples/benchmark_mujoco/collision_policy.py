@@ -0,0 +1,151 @@
+"""
+Benchmark the collision policies of `LocalRunner` on a set of robots.
+
+For every robot and policy this reports the number of geom pairs mujoco considers for collision,
+the average number of contacts during a short simulation and the number of simulation steps per second.
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, Set, Tuple
+
+import mujoco
+import numpy as np
+from pyrr import Quaternion, Vector3
+from revolve2.core.modular_robot import Body
+from revolve2.core.physics.running import Environment, PosedActor
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.standard_resources import modular_robots
+
+ROBOTS: Dict[str, Callable[[], Body]] = {
+    "spider": modular_robots.spider,
+    "ant": modular_robots.ant,
+    "snake": modular_robots.snake,
+    "babyA": modular_robots.babya,
+    "salamander": modular_robots.salamander,
+    "penguin": modular_robots.penguin,
+}
+
+POLICIES = ["full", "nonadjacent", "world", "ground"]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-s", "--steps", type=int, default=4000, help="simulation steps per run"
+    )
+    parser.add_argument(
+        "-r",
+        "--repeats",
+        type=int,
+        default=3,
+        help="runs per robot and policy, of which the fastest is reported",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'robot':<12}{'policy':<13}{'pairs':>7}{'contacts':>10}{'steps/s':>10}{'speedup':>9}"
+    )
+    for name, make_body in ROBOTS.items():
+        actor, _ = make_body().to_actor()
+        bounding_box = actor.calc_aabb()
+        env = Environment()
+        env.actors.append(
+            PosedActor(
+                actor,
+                Vector3(
+                    [
+                        0.0,
+                        0.0,
+                        bounding_box.size.z / 2.0 - bounding_box.offset.z,
+                    ]
+                ),
+                Quaternion(),
+                [0.0 for _ in actor.joints],
+            )
+        )
+
+        baseline = None
+        for policy in POLICIES:
+            model = mujoco.MjModel.from_xml_string(
+                LocalRunner._make_mjcf(env, visual=False, collision_policy=policy)
+            )
+            contacts, steps_per_second = max(
+                (_simulate(model, args.steps) for _ in range(args.repeats)),
+                key=lambda result: result[1],
+            )
+            if baseline is None:
+                baseline = steps_per_second
+            print(
+                f"{name:<12}{policy:<13}{_count_collision_pairs(model):>7}{contacts:>10.2f}{steps_per_second:>10.0f}{steps_per_second / baseline:>9.2f}"
+            )
+
+
+def _count_collision_pairs(model: mujoco.MjModel) -> int:
+    """
+    Count the geom pairs that pass mujoco's collision filters.
+
+    These are the pairs whose bounding volumes are tested for every step,
+    so this is an upper bound on the number of contacts.
+
+    :param model: The model.
+    :returns: The number of pairs.
+    """
+    excluded: Set[Tuple[int, int]] = {
+        (int(signature) >> 16, int(signature) & 0xFFFF)
+        for signature in model.exclude_signature[: model.nexclude]
+    }
+
+    count = 0
+    for geom1 in range(model.ngeom):
+        for geom2 in range(geom1 + 1, model.ngeom):
+            if not (
+                model.geom_contype[geom1] & model.geom_conaffinity[geom2]
+                or model.geom_contype[geom2] & model.geom_conaffinity[geom1]
+            ):
+                continue
+            body1 = int(model.geom_bodyid[geom1])
+            body2 = int(model.geom_bodyid[geom2])
+            if body1 == body2:
+                continue
+            # bodies directly connected by a joint never collide, unless one of them is the world
+            if body1 != 0 and body2 != 0:
+                if (
+                    model.body_parentid[body1] == body2
+                    or model.body_parentid[body2] == body1
+                ):
+                    continue
+            if (min(body1, body2), max(body1, body2)) in excluded:
+                continue
+            count += 1
+    return count
+
+
+def _simulate(model: mujoco.MjModel, steps: int) -> Tuple[float, float]:
+    """
+    Simulate the model with random joint targets.
+
+    :param model: The model.
+    :param steps: Number of steps to simulate.
+    :returns: The average number of contacts per step and the number of steps simulated per second.
+    """
+    rng = np.random.Generator(np.random.PCG64(0))
+    data = mujoco.MjData(model)
+    # the runner controls at 60hz with a step of 0.5ms
+    targets_interval = 33
+
+    contacts = 0
+    start = time.perf_counter()
+    for step in range(steps):
+        if step % targets_interval == 0:
+            data.ctrl[:] = rng.uniform(-1.0, 1.0, model.nu)
+        mujoco.mj_step(model, data)
+        contacts += data.ncon
+    elapsed = time.perf_counter() - start
+
+    return contacts / steps, steps / elapsed
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark how long it takes to generate and compile the Mujoco model of a robot, with and without visual assets.
+
+Headless runs that do not record video use models without textures, materials and lights.
+This measures what that saves for every model that is compiled.
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List
+
+import mujoco
+from pyrr import Quaternion, Vector3
+from revolve2.core.modular_robot import Body
+from revolve2.core.physics.running import Environment, PosedActor
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.standard_resources import modular_robots
+
+ROBOTS: Dict[str, Callable[[], Body]] = {
+    "spider": modular_robots.spider,
+    "ant": modular_robots.ant,
+    "snake": modular_robots.snake,
+    "babyA": modular_robots.babya,
+}
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-r", "--repeats", type=int, default=50, help="models compiled per robot"
+    )
+    args = parser.parse_args()
+
+    print(f"{'robot':<12}{'visual (ms)':>14}{'headless (ms)':>16}{'speedup':>10}")
+    for name, make_body in ROBOTS.items():
+        actor, _ = make_body().to_actor()
+        env = Environment()
+        env.actors.append(
+            PosedActor(actor, Vector3(), Quaternion(), [0.0 for _ in actor.joints])
+        )
+
+        visual = _time_compile(env, True, args.repeats)
+        headless = _time_compile(env, False, args.repeats)
+        print(
+            f"{name:<12}{visual * 1000:>14.2f}{headless * 1000:>16.2f}{visual / headless:>10.2f}"
+        )
+
+
+def _time_compile(env: Environment, visual: bool, repeats: int) -> float:
+    """
+    Measure the average time to generate and compile the model of an environment.
+
+    :param env: The environment.
+    :param visual: Whether to add visual assets. See `LocalRunner._make_mjcf`.
+    :param repeats: Number of times to compile the model.
+    :returns: The average time in seconds.
+    """
+    times: List[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        mujoco.MjModel.from_xml_string(
+            LocalRunner._make_mjcf(env, posed=False, visual=visual)
+        )
+        times.append(time.perf_counter() - start)
+    return sum(times) / len(times)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark rollouts of random linear policies with `VectorEnv` against running a batch per rollout with `LocalRunner`.
+
+Both simulate the same environments with the same seeds and policies, so the final positions of the robots must be equal.
+The difference is the work around the simulation: building and checking a batch per rollout,
+against resetting simulation data that is kept alive. It matters most for short rollouts.
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import numpy.typing as npt
+from pyrr import Quaternion, Vector3
+from revolve2.core.modular_robot import Body
+from revolve2.core.physics.running import (
+    PHYSICS_PROFILES,
+    ActorControl,
+    ActorState,
+    Batch,
+    Environment,
+    PosedActor,
+)
+from revolve2.runners.mujoco import LocalRunner, VectorEnv
+from revolve2.standard_resources import modular_robots
+
+ROBOTS: Dict[str, Callable[[], Body]] = {
+    "spider": modular_robots.spider,
+    "ant": modular_robots.ant,
+    "snake": modular_robots.snake,
+    "babyA": modular_robots.babya,
+}
+
+CONTROL_FREQUENCY = 60
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-r", "--rollouts", type=int, default=32, help="rollouts per robot"
+    )
+    parser.add_argument(
+        "-t",
+        "--simulation_time",
+        type=float,
+        default=0.5,
+        help="seconds of simulation per rollout",
+    )
+    parser.add_argument(
+        "-p",
+        "--physics_profile",
+        default="fast",
+        choices=list(PHYSICS_PROFILES.keys()),
+    )
+    args = parser.parse_args()
+
+    print(f"{'robot':<12}{'runner/s':>10}{'vector/s':>10}{'speedup':>9}{'equal':>7}")
+    for name, make_body in ROBOTS.items():
+        actor, dof_ids = make_body().to_actor()
+        bounding_box = actor.calc_aabb()
+        env = Environment(seed=0)
+        env.actors.append(
+            PosedActor(
+                actor,
+                Vector3(
+                    [
+                        0.0,
+                        0.0,
+                        bounding_box.size.z / 2.0 - bounding_box.offset.z,
+                    ]
+                ),
+                Quaternion(),
+                [0.0 for _ in dof_ids],
+            )
+        )
+        rng = np.random.Generator(np.random.PCG64(0))
+        # the policy maps the observation of `VectorEnv`, which is the flattened actor state, to dof targets
+        policies = rng.normal(
+            scale=0.1, size=(args.rollouts, 7 + 2 * len(dof_ids), len(dof_ids))
+        )
+
+        start = time.perf_counter()
+        runner_positions = _run_batches(
+            env, policies, args.simulation_time, args.physics_profile
+        )
+        runner_rate = args.rollouts / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        vector_positions = _run_vector_env(
+            env, policies, args.simulation_time, args.physics_profile
+        )
+        vector_rate = args.rollouts / (time.perf_counter() - start)
+
+        print(
+            f"{name:<12}{runner_rate:>10.1f}{vector_rate:>10.1f}{vector_rate / runner_rate:>9.2f}"
+            f"{str(np.array_equal(runner_positions, vector_positions)):>7}"
+        )
+
+
+def _run_batches(
+    env: Environment,
+    policies: npt.NDArray[np.float_],
+    simulation_time: float,
+    physics_profile: str,
+) -> npt.NDArray[np.float_]:
+    """
+    Simulate every policy in a batch of its own.
+
+    :param env: The environment.
+    :param policies: The policies.
+    :param simulation_time: Seconds to simulate every policy.
+    :param physics_profile: Name of the physics profile.
+    :returns: Final position of the robot for every policy.
+    """
+    runner = LocalRunner(headless=True)
+    positions = []
+    for policy in policies:
+
+        def control(
+            environment_index: int,
+            state: ActorState,
+            dt: float,
+            control: ActorControl,
+        ) -> None:
+            observation = np.concatenate(
+                [
+                    state.position,
+                    state.orientation,
+                    state.hinge_angles,
+                    state.hinge_vels,
+                ]
+            )
+            control.set_dof_targets(0, observation @ policy)
+
+        batch = Batch(
+            simulation_time=simulation_time,
+            sampling_frequency=CONTROL_FREQUENCY,
+            control_frequency=CONTROL_FREQUENCY,
+            control=control,
+            physics_profile=PHYSICS_PROFILES[physics_profile],
+        )
+        batch.environments.append(env)
+        result = runner.run_batch_sync(batch).environment_results[0]
+        positions.append(result.environment_states[-1].actor_states[0].position)
+    return np.array(positions)
+
+
+def _run_vector_env(
+    env: Environment,
+    policies: npt.NDArray[np.float_],
+    simulation_time: float,
+    physics_profile: str,
+) -> npt.NDArray[np.float_]:
+    """
+    Simulate every policy with a `VectorEnv` of a single environment that is reset for every rollout.
+
+    :param env: The environment.
+    :param policies: The policies.
+    :param simulation_time: Seconds to simulate every policy.
+    :param physics_profile: Name of the physics profile.
+    :returns: Final position of the robot for every policy.
+    """
+    vector_env = VectorEnv(
+        [env],
+        CONTROL_FREQUENCY,
+        simulation_time=simulation_time,
+        physics_profile=PHYSICS_PROFILES[physics_profile],
+    )
+    positions: List[npt.NDArray[np.float_]] = []
+    for policy in policies:
+        observations = vector_env.reset()
+        # the runner keeps the initial dof targets until the first control step
+        actions = np.zeros((1, vector_env.action_size))
+        done = np.zeros(1, dtype=np.bool_)
+        while not done[0]:
+            observations, done = vector_env.step(actions)
+            actions = observations @ policy
+        positions.append(observations[0, :3])
+    return np.array(positions)
+
+
+if __name__ == "__main__":
+    main()
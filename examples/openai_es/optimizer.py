@@ -217,7 +217,8 @@ class Optimizer(OpenaiESOptimizer):
 
             bounding_box = self._actor.calc_aabb()
             self._controllers.append(controller)
-            env = Environment()
+            # cpg controllers are open loop, so the runner computes their targets in advance
+            env = Environment(controller=controller)
             env.actors.append(
                 PosedActor(
                     self._actor,
@@ -265,7 +265,8 @@ class Optimizer(EAOptimizer[Genotype, float]):
             actor, controller = develop(genotype).make_actor_and_controller()
             bounding_box = actor.calc_aabb()
             self._controllers.append(controller)
-            env = Environment()
+            # cpg controllers are open loop, so the runner computes their targets in advance
+            env = Environment(controller=controller)
             env.actors.append(
                 PosedActor(
                     actor,
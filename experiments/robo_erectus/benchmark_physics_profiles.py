@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Compare the physics profiles of the mujoco runner on speed and on how much they change the outcome of simulations.
+
+Every body is simulated with a number of random linear controllers under every profile.
+For each profile this reports, relative to the "accurate" profile:
+- simulation steps per second and real time factor (simulated seconds per second),
+- divergence: distance in the xy plane between the trajectories of the core, averaged over the samples and over the final sample,
+- rank correlation of the fitness of the controllers, which is what matters for selection.
+
+The "noise" row is the accurate profile with different hinge noise.
+Simulations of legged robots are chaotic, so this is the divergence and rank correlation
+that is to be expected anyway. A profile that does not do much worse than that does not change which controllers are selected
+more than the noise in the initial state already does.
+"""
+
+import argparse
+import logging
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from pyrr import Quaternion, Vector3
+from revolve2.core.physics.actor import Actor
+from revolve2.core.physics.running import (
+    PHYSICS_PROFILES,
+    Batch,
+    Environment,
+    EnvironmentResults,
+    PosedActor,
+    Termination,
+)
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.standard_resources import modular_robots
+
+from controllers.controller_wrapper import ControllerWrapper
+from controllers.linear_controller import LinearController
+from fitness import fitness_functions
+from genotypes.linear_controller_genotype import LinearControllerGenotype
+from morphologies.morphology import MORPHOLOGIES
+from utilities import actor_get_default_pose
+
+STANDARD_BODIES = ["ant", "snake", "babya", "gecko", "salamander"]
+ERECTUS_BODIES = ["spider", "erectus", "trirectus", "dog"]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-b",
+        "--bodies",
+        nargs="+",
+        default=STANDARD_BODIES + ERECTUS_BODIES,
+        help="names of robo_erectus morphologies or of standard_resources modular robots. Morphologies take precedence.",
+    )
+    parser.add_argument(
+        "-p",
+        "--profiles",
+        nargs="+",
+        default=list(PHYSICS_PROFILES.keys()),
+        choices=list(PHYSICS_PROFILES.keys()),
+    )
+    parser.add_argument(
+        "-c", "--controllers", type=int, default=8, help="random controllers per body"
+    )
+    parser.add_argument("-t", "--simulation_time", type=int, default=5)
+    parser.add_argument(
+        "-f", "--fitness_function", type=str, default="displacement_only"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    print(
+        f"{'body':<12}{'profile':<10}{'steps/s':>10}{'rtf':>8}{'speedup':>9}{'mean div':>10}{'final div':>11}{'rank corr':>11}"
+    )
+    runs = [("accurate", "accurate", 0), ("noise", "accurate", 1)] + [
+        (name, name, 0) for name in args.profiles if name != "accurate"
+    ]
+    for body_name in args.bodies:
+        reference: Optional[Tuple[float, List[EnvironmentResults]]] = None
+        for run_name, profile_name, noise_seed in runs:
+            steps_per_second, real_time_factor, results = _run_profile(
+                body_name,
+                profile_name,
+                args.controllers,
+                args.simulation_time,
+                noise_seed,
+            )
+            fitnesses = np.array(
+                [fitness_functions[args.fitness_function](result) for result in results]
+            )
+            if reference is None:
+                reference = (real_time_factor, results)
+                reference_fitnesses = fitnesses
+            reference_real_time_factor, reference_results = reference
+            divergences = [
+                _divergence(result, reference_result)
+                for result, reference_result in zip(results, reference_results)
+            ]
+            print(
+                f"{body_name:<12}{run_name:<10}{steps_per_second:>10.0f}{real_time_factor:>8.2f}"
+                f"{real_time_factor / reference_real_time_factor:>9.2f}"
+                f"{np.mean([mean for mean, _ in divergences]):>10.3f}{np.mean([final for _, final in divergences]):>11.3f}"
+                f"{_rank_correlation(fitnesses, reference_fitnesses):>11.3f}"
+            )
+
+
+def _run_profile(
+    body_name: str,
+    profile_name: str,
+    num_controllers: int,
+    simulation_time: int,
+    noise_seed: int = 0,
+) -> Tuple[float, float, List[EnvironmentResults]]:
+    """
+    Simulate random controllers on a body with a physics profile.
+
+    Controllers, initial poses and hinge noise only depend on the body, the index of the controller and the noise seed,
+    so they are the same for every profile.
+
+    :param body_name: Name of the body.
+    :param profile_name: Name of the physics profile.
+    :param num_controllers: Number of random controllers.
+    :param simulation_time: Seconds to simulate every controller.
+    :param noise_seed: Seed for the hinge noise, on top of the index of the controller.
+    :returns: Steps per second, real time factor and the results of every controller.
+    """
+    runner = LocalRunner(headless=True)
+    results = []
+    steps = 0
+    elapsed = 0.0
+    for controller_index in range(num_controllers):
+        np.random.seed(controller_index)
+        actor, controller, (position, orientation), termination = _make_robot(body_name)
+        batch = Batch(
+            simulation_time=simulation_time,
+            sampling_frequency=10,
+            control_frequency=60,
+            control=ControllerWrapper(controller)._control,
+            termination=termination,
+            physics_profile=PHYSICS_PROFILES[profile_name],
+        )
+        env = Environment()
+        env.actors.append(
+            PosedActor(
+                actor,
+                position,
+                orientation,
+                [0.0 for _ in controller.get_dof_targets()],
+            )
+        )
+        batch.environments.append(env)
+
+        np.random.seed(controller_index + 1000 * noise_seed)
+        start = time.perf_counter()
+        result = runner.run_batch_sync(batch).environment_results[0]
+        elapsed += time.perf_counter() - start
+        steps += result.steps_completed
+        results.append(result)
+
+    simulated_time = steps * PHYSICS_PROFILES[profile_name].timestep
+    return steps / elapsed, simulated_time / elapsed, results
+
+
+def _make_robot(
+    body_name: str,
+) -> Tuple[Actor, LinearController, Tuple[Vector3, Quaternion], Optional[Termination]]:
+    """
+    Create a body with a random linear controller.
+
+    :param body_name: Name of a robo_erectus morphology or of a standard_resources modular robot.
+    :returns: The actor, the controller, the initial pose and the termination for the body.
+    """
+    if body_name in MORPHOLOGIES:
+        genotype = LinearControllerGenotype.random(body_name)
+        actor, controller = genotype.develop()
+        return (
+            actor,
+            controller,
+            genotype.get_initial_pose(actor),
+            genotype.termination,
+        )
+
+    actor, dof_ids = modular_robots.get(body_name).to_actor()
+    input_size = LinearController.get_input_size(len(dof_ids))
+    policy = np.random.normal(scale=0.1, size=(input_size, len(dof_ids)))
+    return actor, LinearController(policy), actor_get_default_pose(actor), None
+
+
+def _divergence(
+    result: EnvironmentResults, reference: EnvironmentResults
+) -> Tuple[float, float]:
+    """
+    Measure how far the core of the first actor ends up from where it is in a reference simulation.
+
+    Only the samples both simulations have are compared, as they may be terminated at different times.
+
+    :param result: Results of the simulation.
+    :param reference: Results of the reference simulation.
+    :returns: Mean and final distance in the xy plane.
+    """
+    num_samples = min(len(result.environment_states), len(reference.environment_states))
+    distances = [
+        np.linalg.norm(_xy(result, sample) - _xy(reference, sample))
+        for sample in range(num_samples)
+    ]
+    return float(np.mean(distances)), float(distances[-1])
+
+
+def _xy(result: EnvironmentResults, sample: int) -> npt.NDArray[np.float_]:
+    return np.array(result.environment_states[sample].actor_states[0].position[:2])
+
+
+def _rank_correlation(
+    values: npt.NDArray[np.float_], reference: npt.NDArray[np.float_]
+) -> float:
+    """
+    Compute the spearman rank correlation between two sets of values.
+
+    :param values: The values.
+    :param reference: The reference values, in the same order.
+    :returns: The correlation. 1 if both sets are ranked the same.
+    """
+    ranks = np.argsort(np.argsort(values))
+    reference_ranks = np.argsort(np.argsort(reference))
+    if np.all(ranks == reference_ranks):
+        return 1.0
+    return float(np.corrcoef(ranks, reference_ranks)[0, 1])
+
+
+if __name__ == "__main__":
+    main()
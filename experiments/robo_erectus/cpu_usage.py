@@ -0,0 +1,238 @@
+"""
+Control how many threads and which cpus simulation processes use, and detect when there are more of them than cpus.
+
+Only uses the standard library, so it can be imported before numpy: thread limits of BLAS and OpenMP are read when they are loaded.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# environment variables that limit the thread pools of the BLAS and OpenMP libraries numpy may be linked against
+THREAD_LIMIT_VARIABLES = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+]
+
+# fraction of a cpu below which processes are reported to be starved of cpu time
+_STARVED_UTILIZATION = 0.8
+
+
+def thread_limit_environment(num_threads: int) -> Dict[str, str]:
+    """
+    Get the environment variables that limit BLAS and OpenMP to a number of threads.
+
+    They only take effect in processes that load these libraries afterwards, such as new processes.
+
+    :param num_threads: Maximum number of threads of every library.
+    :returns: The variables and their values.
+    """
+    assert num_threads >= 1
+    return {variable: str(num_threads) for variable in THREAD_LIMIT_VARIABLES}
+
+
+def available_cpus() -> List[int]:
+    """
+    Get the cpus this process may run on.
+
+    :returns: The ids of the cpus.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_core_order(cpus: Optional[List[int]] = None) -> List[int]:
+    """
+    Order cpus so that consecutive cpus are on different physical cores for as long as possible.
+
+    The first cpu of every physical core comes first, then the second of every core (its hyperthread sibling), and so on.
+    Without topology information, which is only read on Linux, the cpus are returned as given.
+
+    :param cpus: The cpus to order. If None, the available cpus.
+    :returns: The ordered cpus.
+    """
+    if cpus is None:
+        cpus = available_cpus()
+
+    cores = _group_by_core(cpus)
+    if cores is None:
+        return list(cpus)
+    core_cpus = list(cores.values())
+    return [
+        siblings[index]
+        for index in range(max(len(siblings) for siblings in core_cpus))
+        for siblings in core_cpus
+        if index < len(siblings)
+    ]
+
+
+def count_physical_cores(cpus: Optional[List[int]] = None) -> Optional[int]:
+    """
+    Count the physical cores of cpus.
+
+    :param cpus: The cpus. If None, the available cpus.
+    :returns: The number of physical cores, or None if the topology can not be read.
+    """
+    if cpus is None:
+        cpus = available_cpus()
+    cores = _group_by_core(cpus)
+    return None if cores is None else len(cores)
+
+
+def _group_by_core(cpus: List[int]) -> Optional[Dict[Tuple[int, int], List[int]]]:
+    """
+    Group cpus by the physical core they are on.
+
+    :param cpus: The cpus.
+    :returns: The cpus of every core, by package and core id, or None if the topology can not be read.
+    """
+    cores: Dict[Tuple[int, int], List[int]] = {}
+    for cpu in cpus:
+        topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            with open(os.path.join(topology, "physical_package_id")) as file:
+                package = int(file.read())
+            with open(os.path.join(topology, "core_id")) as file:
+                core = int(file.read())
+        except (OSError, ValueError):
+            return None
+        cores.setdefault((package, core), []).append(cpu)
+    return cores
+
+
+def pin_to_cpu(cpu: int) -> None:
+    """
+    Let the calling process only run on a single cpu.
+
+    Does nothing on platforms that do not support cpu affinity.
+
+    :param cpu: The cpu.
+    """
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+
+
+@dataclass
+class OversubscriptionReport:
+    """How many threads will compete for the cpus of this process."""
+
+    num_processes: int
+    threads_per_process: Optional[int]  # None if not limited
+    num_cpus: int  # cpus this process may run on
+    num_machine_cpus: int  # cpus of the machine
+    num_physical_cores: Optional[int]  # None if unknown
+    load_average: Optional[
+        float
+    ]  # of the last minute, from all processes on the machine. None if unknown
+
+    @property
+    def num_threads(self) -> Optional[int]:
+        """
+        Get the number of threads the processes may run at most.
+
+        :returns: The number of threads, or None if the threads per process are not limited.
+        """
+        if self.threads_per_process is None:
+            return None
+        return self.num_processes * self.threads_per_process
+
+    @property
+    def problems(self) -> List[str]:
+        """
+        Get the reasons the cpus are oversubscribed.
+
+        :returns: The reasons, empty if they are not.
+        """
+        problems = []
+        if self.threads_per_process is None and self.num_cpus > 1:
+            problems.append(
+                f"{self.num_processes} processes without a thread limit may each start a BLAS thread per cpu"
+            )
+        elif self.num_threads is not None and self.num_threads > self.num_cpus:
+            problems.append(
+                f"{self.num_processes} processes x {self.threads_per_process} threads exceed the {self.num_cpus} available cpus"
+            )
+        if (
+            self.load_average is not None
+            # other processes are counted by the rounded load, so that a small load of idle programs is not counted
+            and round(self.load_average) + self.num_processes > self.num_machine_cpus
+        ):
+            problems.append(
+                f"the machine already has a load of {self.load_average:.1f}, so {self.num_processes} more processes exceed its {self.num_machine_cpus} cpus"
+            )
+        return problems
+
+    def __str__(self) -> str:
+        """
+        Describe the report.
+
+        :returns: The description.
+        """
+        cores = (
+            ""
+            if self.num_physical_cores is None
+            else f" on {self.num_physical_cores} physical cores"
+        )
+        load = (
+            ""
+            if self.load_average is None
+            else f", load average {self.load_average:.1f}"
+        )
+        threads = (
+            "unlimited"
+            if self.threads_per_process is None
+            else str(self.threads_per_process)
+        )
+        summary = f"{self.num_processes} processes x {threads} threads, {self.num_cpus} cpus{cores}{load}"
+        if len(self.problems) == 0:
+            return summary
+        return f"{summary}: oversubscribed, " + "; ".join(self.problems)
+
+
+def check_oversubscription(
+    num_processes: int, threads_per_process: Optional[int]
+) -> OversubscriptionReport:
+    """
+    Check whether processes that are about to be started will have more threads than there are cpus.
+
+    Processes of other programs are included through the load average of the machine.
+
+    :param num_processes: Number of processes.
+    :param threads_per_process: Maximum number of threads of every process, or None if not limited.
+    :returns: The report.
+    """
+    cpus = available_cpus()
+    load_average = os.getloadavg()[0] if hasattr(os, "getloadavg") else None
+    return OversubscriptionReport(
+        num_processes=num_processes,
+        threads_per_process=threads_per_process,
+        num_cpus=len(cpus),
+        num_machine_cpus=os.cpu_count() or len(cpus),
+        num_physical_cores=count_physical_cores(cpus),
+        load_average=load_average,
+    )
+
+
+def check_utilization(num_processes: int, cpu_time: float, wall_time: float) -> float:
+    """
+    Check how much cpu time processes got while they were busy, and log a warning if it was too little.
+
+    A process that has work and gets less than a full cpu is waiting for one, because there are more threads than cpus.
+
+    :param num_processes: Number of processes the times are summed over.
+    :param cpu_time: Cpu seconds the processes used while busy, summed.
+    :param wall_time: Seconds the processes were busy, summed.
+    :returns: Cpu seconds per busy second.
+    """
+    utilization = cpu_time / wall_time if wall_time > 0.0 else 1.0
+    if utilization < _STARVED_UTILIZATION:
+        logging.warning(
+            f"{num_processes} processes only got {utilization:.0%} of a cpu while busy: the cpus are oversubscribed."
+        )
+    return utilization
@@ -0,0 +1,426 @@
+"""Evaluate linear controller genotypes in simulation, in the calling process or in a pool of long-lived worker processes."""
+
+import asyncio
+import concurrent.futures
+import logging
+import math
+import multiprocessing
+import multiprocessing.sharedctypes
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from controllers.controller_wrapper import ControllerWrapper
+from cpu_usage import (
+    check_oversubscription,
+    check_utilization,
+    physical_core_order,
+    pin_to_cpu,
+    thread_limit_environment,
+)
+from genotypes.linear_controller_genotype import LinearControllerGenotype
+from measures import make_reducers
+from revolve2.core.physics.actor import Actor
+from revolve2.core.physics.running import (
+    PHYSICS_PROFILES,
+    Batch,
+    Environment,
+    PosedActor,
+)
+from revolve2.core.physics.running._results import EnvironmentResults
+from revolve2.runners.mujoco import LocalRunner
+
+# number of chunks every worker gets per call to `PoolEvaluator.evaluate`, if no chunk size is given.
+# more than one, so workers that finish early can take over work of slower ones.
+_CHUNKS_PER_WORKER = 4
+
+
+@dataclass(frozen=True)
+class EvaluationSettings:
+    """Settings of the simulation of every evaluation."""
+
+    simulation_time: float
+    sampling_frequency: float
+    control_frequency: float
+    physics_profile: str  # name of one of PHYSICS_PROFILES
+    settle_time: float  # see LocalRunner
+    collision_policy: str  # see LocalRunner
+
+
+@dataclass
+class EvaluationTask:
+    """
+    A genotype to evaluate and the seed to evaluate it with.
+
+    Only the parameters of the genotype are sent to workers, not the genotype itself, as its morphology functions cannot be pickled.
+    """
+
+    genotype: npt.NDArray[np.float_]  # parameters of a `LinearControllerGenotype`
+    body_name: str
+    # seed of the initial pose and the hinge noise. if None, numpy's global random state is used.
+    seed: Optional[int]
+
+
+class Evaluator(ABC):
+    """
+    Interface for evaluating genotypes in simulation.
+
+    The result of every task is a summary of the simulation: an `EnvironmentResults` without the states,
+    with the values of the reducers of `measures.make_reducers`, the number of simulation steps and the timings.
+    """
+
+    @abstractmethod
+    async def evaluate(self, tasks: List[EvaluationTask]) -> List[EnvironmentResults]:
+        """
+        Evaluate tasks.
+
+        :param tasks: The tasks.
+        :returns: The result of every task, in the same order.
+        """
+        pass
+
+    def pop_cpu_utilization(self) -> Optional[float]:
+        """
+        Get the cpu seconds per second that the worker processes got while simulating, since the last call.
+
+        Less than 1 means workers were waiting for a cpu.
+
+        :returns: The utilization, or None if this evaluator has no workers or has not simulated since the last call.
+        """
+        return None
+
+    def close(self) -> None:
+        """Release the resources of this evaluator. It can not be used afterwards."""
+        pass
+
+
+class InlineEvaluator(Evaluator):
+    """
+    Evaluator that simulates every task in the calling process, one after another.
+
+    Headless simulations run on a thread of this evaluator, so the event loop is not blocked while they run.
+    Shown simulations run on the calling thread, as the viewer has to be used from there.
+    """
+
+    _simulator: "_Simulator"
+    _headless: bool
+    _executor: Optional[concurrent.futures.ThreadPoolExecutor]
+
+    def __init__(self, settings: EvaluationSettings, headless: bool = True) -> None:
+        """
+        Initialize this object.
+
+        :param settings: Settings of the simulations.
+        :param headless: If False, every simulation is shown.
+        """
+        self._simulator = _Simulator(settings, headless)
+        self._headless = headless
+        self._executor = None
+
+    async def evaluate(self, tasks: List[EvaluationTask]) -> List[EnvironmentResults]:
+        """
+        Evaluate tasks.
+
+        :param tasks: The tasks.
+        :returns: The result of every task, in the same order.
+        """
+        if not self._headless:
+            return self._simulator.evaluate(tasks)
+
+        if self._executor is None:
+            # a single thread, so the simulator is never used concurrently
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="inline-evaluator"
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._simulator.evaluate, tasks
+        )
+
+    def close(self) -> None:
+        """Shut down the thread of this evaluator, if it was started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class PoolEvaluator(Evaluator):
+    """
+    Evaluator that simulates tasks in a pool of worker processes.
+
+    Workers are started on the first evaluation and live until the evaluator is closed,
+    so the morphologies they have built and the models they have compiled are reused by all later evaluations.
+    Tasks are sent to the workers in chunks, to reduce the overhead per task.
+
+    Workers are started fresh instead of forked, with the thread pools of BLAS and OpenMP limited through the environment,
+    so that the workers together do not start more threads than there are cpus.
+    Workers inherit the limits from the environment of this process, which has them while the pool is running,
+    as the pool may start a worker again at any time, for instance to replace one that died.
+    """
+
+    _settings: EvaluationSettings
+    _num_workers: int
+    _chunk_size: Optional[int]
+    _threads_per_worker: Optional[int]
+    _pin_cpus: bool
+    _pool: Optional[concurrent.futures.ProcessPoolExecutor]
+    # values the thread limit variables had before the pool was started, None if a variable was not set
+    _previous_environment: Dict[str, Optional[str]]
+    # cpu time the workers used and time they were busy, since the utilization was last popped
+    _cpu_time: float
+    _busy_time: float
+
+    def __init__(
+        self,
+        settings: EvaluationSettings,
+        num_workers: int,
+        chunk_size: Optional[int] = None,
+        threads_per_worker: Optional[int] = 1,
+        pin_cpus: bool = False,
+    ) -> None:
+        """
+        Initialize this object.
+
+        :param settings: Settings of the simulations.
+        :param num_workers: Number of worker processes.
+        :param chunk_size: Number of tasks sent to a worker at once. If None, every call to `evaluate` gives every worker a few chunks.
+        :param threads_per_worker: Maximum number of threads of BLAS and OpenMP in every worker. If None, they are not limited. Simulation itself is single threaded.
+        :param pin_cpus: If True, every worker only runs on a single cpu, spread over the physical cores this process may run on before their hyperthread siblings are used.
+        """
+        assert num_workers >= 1
+        assert chunk_size is None or chunk_size >= 1
+        assert threads_per_worker is None or threads_per_worker >= 1
+
+        self._settings = settings
+        self._num_workers = num_workers
+        self._chunk_size = chunk_size
+        self._threads_per_worker = threads_per_worker
+        self._pin_cpus = pin_cpus
+        self._pool = None
+        self._previous_environment = {}
+        self._cpu_time = 0.0
+        self._busy_time = 0.0
+
+    async def evaluate(self, tasks: List[EvaluationTask]) -> List[EnvironmentResults]:
+        """
+        Evaluate tasks.
+
+        :param tasks: The tasks.
+        :returns: The result of every task, in the same order.
+        """
+        if self._pool is None:
+            self._start_pool()
+        assert self._pool is not None
+
+        chunk_size = (
+            max(1, math.ceil(len(tasks) / (self._num_workers * _CHUNKS_PER_WORKER)))
+            if self._chunk_size is None
+            else self._chunk_size
+        )
+        chunk_results = await asyncio.gather(
+            *[
+                asyncio.wrap_future(
+                    self._pool.submit(
+                        _evaluate_in_worker, tasks[begin : begin + chunk_size]
+                    )
+                )
+                for begin in range(0, len(tasks), chunk_size)
+            ]
+        )
+        cpu_time = sum(chunk_cpu_time for _, chunk_cpu_time, _ in chunk_results)
+        busy_time = sum(chunk_busy_time for _, _, chunk_busy_time in chunk_results)
+        check_utilization(self._num_workers, cpu_time, busy_time)
+        self._cpu_time += cpu_time
+        self._busy_time += busy_time
+        return [result for results, _, _ in chunk_results for result in results]
+
+    def pop_cpu_utilization(self) -> Optional[float]:
+        """
+        Get the cpu seconds per second that the worker processes got while simulating, since the last call.
+
+        With more than one thread per worker, this can be more than 1.
+
+        :returns: The utilization, or None if there has been no simulation since the last call.
+        """
+        if self._busy_time == 0.0:
+            return None
+        utilization = self._cpu_time / self._busy_time
+        self._cpu_time = 0.0
+        self._busy_time = 0.0
+        return utilization
+
+    def close(self) -> None:
+        """Stop the worker processes, and remove the thread limits of the workers from the environment of this process."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for variable, value in self._previous_environment.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+        self._previous_environment = {}
+
+    def _start_pool(self) -> None:
+        report = check_oversubscription(self._num_workers, self._threads_per_worker)
+        if len(report.problems) > 0:
+            logging.warning(f"Simulation workers: {report}")
+        else:
+            logging.info(f"Simulation workers: {report}")
+
+        # the limits must be in the environment when a worker starts, as numpy is imported before any initializer runs
+        limits = (
+            {}
+            if self._threads_per_worker is None
+            else thread_limit_environment(self._threads_per_worker)
+        )
+        self._previous_environment = {
+            variable: os.environ.get(variable) for variable in limits
+        }
+        os.environ.update(limits)
+        try:
+            context = multiprocessing.get_context("spawn")
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self._num_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(
+                    self._settings,
+                    physical_core_order() if self._pin_cpus else None,
+                    # gives every worker its own index, for the cpu to pin it to
+                    context.Value("i", 0),
+                ),
+            )
+            # the pool starts a worker for every task submitted while all workers are busy, until it has all of them,
+            # so this starts them all now instead of during a later evaluation.
+            for _ in range(self._num_workers):
+                self._pool.submit(_start_worker)
+        except BaseException:
+            self.close()
+            raise
+
+
+def make_evaluator(
+    settings: EvaluationSettings,
+    num_workers: int,
+    headless: bool = True,
+    threads_per_worker: Optional[int] = 1,
+    pin_cpus: bool = False,
+) -> Evaluator:
+    """
+    Create an evaluator.
+
+    :param settings: Settings of the simulations.
+    :param num_workers: Number of processes to simulate in. If 1, an `InlineEvaluator` is created, otherwise a `PoolEvaluator`.
+    :param headless: If False, simulations are shown. Only for a single process; workers are always headless.
+    :param threads_per_worker: See `PoolEvaluator`.
+    :param pin_cpus: See `PoolEvaluator`.
+    :returns: The evaluator.
+    """
+    if num_workers == 1:
+        return InlineEvaluator(settings, headless)
+    return PoolEvaluator(
+        settings,
+        num_workers,
+        threads_per_worker=threads_per_worker,
+        pin_cpus=pin_cpus,
+    )
+
+
+class _Simulator:
+    """Simulates tasks, keeping the bodies of morphologies and the runner between tasks."""
+
+    _settings: EvaluationSettings
+    _runner: LocalRunner
+    # actor and dof ids of every morphology that has been built, by body name
+    _bodies: Dict[str, Tuple[Actor, List[int]]]
+
+    def __init__(self, settings: EvaluationSettings, headless: bool) -> None:
+        self._settings = settings
+        self._runner = LocalRunner(
+            headless=headless,
+            settle_time=settings.settle_time,
+            collision_policy=settings.collision_policy,
+        )
+        self._bodies = {}
+
+    def evaluate(self, tasks: List[EvaluationTask]) -> List[EnvironmentResults]:
+        return [self._evaluate(task) for task in tasks]
+
+    def _evaluate(self, task: EvaluationTask) -> EnvironmentResults:
+        genotype = LinearControllerGenotype(task.genotype, task.body_name)
+        body = self._bodies.get(task.body_name)
+        if body is None:
+            body = LinearControllerGenotype.develop_body(task.body_name)
+            self._bodies[task.body_name] = body
+        actor, dof_ids = body
+        controller = genotype.develop_controller(len(dof_ids))
+        # the initial pose and the hinge noise only depend on the seed, if given
+        rng = None if task.seed is None else np.random.default_rng(task.seed)
+
+        batch = Batch(
+            simulation_time=self._settings.simulation_time,
+            sampling_frequency=self._settings.sampling_frequency,
+            control_frequency=self._settings.control_frequency,
+            control=ControllerWrapper(controller)._control,
+            # only the measures are needed, which are computed while simulating
+            reducers=make_reducers(),
+            record_trajectory=False,
+            physics_profile=PHYSICS_PROFILES[self._settings.physics_profile],
+            seed=task.seed,
+            record_timings=True,
+        )
+
+        pos, rot = genotype.get_initial_pose(actor, rng)
+        env = Environment(termination=genotype.termination)
+        env.actors.append(
+            PosedActor(
+                actor,
+                pos,
+                rot,
+                [0.0 for _ in controller.get_dof_targets()],
+            ),
+        )
+        batch.environments.append(env)
+
+        return self._runner.run_batch_sync(batch).environment_results[0]
+
+
+# simulator of a worker process of a `PoolEvaluator`
+_worker_simulator: Optional[_Simulator] = None
+
+
+def _init_worker(
+    settings: EvaluationSettings,
+    cpus: Optional[List[int]],
+    worker_counter: multiprocessing.sharedctypes.Synchronized,
+) -> None:
+    global _worker_simulator
+    if cpus is not None:
+        with worker_counter.get_lock():
+            worker_index = worker_counter.value
+            worker_counter.value += 1
+        pin_to_cpu(cpus[worker_index % len(cpus)])
+    _worker_simulator = _Simulator(settings, headless=True)
+
+
+def _start_worker() -> None:
+    pass
+
+
+def _evaluate_in_worker(
+    tasks: List[EvaluationTask],
+) -> Tuple[List[EnvironmentResults], float, float]:
+    # also returns the cpu time used and the time it took, to detect oversubscription
+    assert _worker_simulator is not None
+    start_cpu_time = time.process_time()
+    start_time = time.perf_counter()
+    results = _worker_simulator.evaluate(tasks)
+    return (
+        results,
+        time.process_time() - start_cpu_time,
+        time.perf_counter() - start_time,
+    )
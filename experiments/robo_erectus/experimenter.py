@@ -8,6 +8,11 @@ import yaml
 import math
 from multiprocessing import cpu_count
 from morphologies.morphology import MORPHOLOGIES
+from cpu_usage import (
+    check_oversubscription,
+    physical_core_order,
+    thread_limit_environment,
+)
 import random
 
 SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -77,6 +82,12 @@ def main():
         default=100_000,
         help="defaults to arbitrarily high",
     )
+    parser.add_argument(
+        "--pin_cpus",
+        action="store_true",
+        default=False,
+        help="give every batch its own cpus (spread over physical cores), and pin its workers to them",
+    )
     parser.add_argument(
         "--venv",
         type=str,
@@ -173,12 +184,14 @@ def main():
     if args.shuffle:
         print(f"shuffling tasks before scheduling...")
         random.shuffle(task_batch)
+    print(f"\ncpu usage: {check_oversubscription(args.max_cpus, 1)}")
     schedule_jobs(
         task_batch,
         args.prefix,
         args.max_cpus,
         args.venv,
         dry_run=args.dry,
+        pin_cpus=args.pin_cpus,
     )
 
 
@@ -188,6 +201,7 @@ def schedule_jobs(
     max_cpus: int,
     venv_dir: str,
     dry_run=False,
+    pin_cpus=False,
 ):
     """
     Schedule jobs to run in a tmux session.
@@ -196,6 +210,7 @@ def schedule_jobs(
         task_batch: list of commands (where each command is a list strings)
         max_cpus: max number of tasks to run in parallel (as separate tmux tabs)
         name: name of tmux session to create
+        pin_cpus: run every batch on its own cpus with taskset, and pin its workers to them
     """
     num_tasks = len(task_batch)
     print(
@@ -209,6 +224,17 @@ def schedule_jobs(
     # bin_size = math.ceil(num_tasks / num_batches)
 
     precommands = [f"source '{os.path.join(venv_dir, 'bin/activate')}'"]
+    # every experiment only gets a few cpus, so BLAS/OpenMP must not start a thread per cpu of the machine
+    precommands += [
+        f"export {variable}={value}"
+        for variable, value in thread_limit_environment(1).items()
+    ]
+    # cpus given to the batches in order, so batches are spread over physical cores
+    cpu_order = physical_core_order()
+    if pin_cpus and max_cpus > len(cpu_order):
+        raise ValueError(
+            f"cannot pin {max_cpus} cpus: this process may only run on {len(cpu_order)} cpus ({','.join(str(cpu) for cpu in cpu_order)}). lower --max_cpus or drop --pin_cpus."
+        )
     postcommands = ["echo jobs done at time:", "date", "date +%s"]
     # create dict defining layout of tmux session (for teamocil)
     data = {
@@ -232,6 +258,23 @@ def schedule_jobs(
 
         # add -cpu flag to all tasks in batch
         cur_tasks = [[*cmd, "-cpu", str(batch_cpus)] for cmd in tasks[0:batch_size]]
+        if pin_cpus:
+            # the cpus of the batches before this one are taken
+            first_cpu = max_cpus - remaining_cpus - batch_cpus
+            taskset = [
+                "taskset",
+                "-c",
+                ",".join(
+                    str(cpu) for cpu in cpu_order[first_cpu : first_cpu + batch_cpus]
+                ),
+            ]
+            # after the shell's time keyword, which must come first
+            cur_tasks = [
+                [*cmd[:1], *taskset, *cmd[1:], "--pin_cpus"]
+                if cmd[0] == "time"
+                else [*taskset, *cmd, "--pin_cpus"]
+                for cmd in cur_tasks
+            ]
         # flatten tasks into list of strings
         cur_tasks = [" ".join(cmd) for cmd in cur_tasks]
         batch_name = f"batch{str(b+1).zfill(2)}"
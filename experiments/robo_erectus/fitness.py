@@ -54,7 +54,7 @@ def health_with_control_cost(environment_results: EnvironmentResults) -> float:
     base_fitness = measures.displacement_measure(environment_results)
     control_cost = control_cost_weight * measures.control_cost(environment_results)
 
-    total_steps = len(environment_results.environment_states)
+    total_steps = measures.num_samples(environment_results)
     HEALTHY_STEP_REWARD = 0.05
     # (experiment should have stopped when an unhealthy step was reached)
     healthy_reward = total_steps * HEALTHY_STEP_REWARD
@@ -64,7 +64,7 @@ def health_with_control_cost(environment_results: EnvironmentResults) -> float:
 
 
 def clipped_health(environment_results: EnvironmentResults) -> float:
-    total_steps = len(environment_results.environment_states)
+    total_steps = measures.num_samples(environment_results)
 
     base_fitness = measures.displacement_measure(environment_results)
     healthy_reward = total_steps * 0.05
@@ -73,8 +73,8 @@ def clipped_health(environment_results: EnvironmentResults) -> float:
 
 
 def health_only(environment_results: EnvironmentResults) -> float:
-    print(float(len(environment_results.environment_states)))
-    return float(len(environment_results.environment_states))
+    print(float(measures.num_samples(environment_results)))
+    return float(measures.num_samples(environment_results))
 
 
 def with_control_cost(environment_results: EnvironmentResults) -> float:
@@ -19,19 +19,19 @@ class LinearControllerGenotype:
         self.genotype = genotype
         self.body_name = body_name  # for morphology
         self.is_healthy = MORPHOLOGIES[body_name]["is_healthy"]
+        self.termination = MORPHOLOGIES[body_name]["termination"]
 
     def develop(self):
         actor, dof_ids = LinearControllerGenotype.develop_body(self.body_name)
+        return actor, self.develop_controller(len(dof_ids))
 
-        dof_size = len(dof_ids)
+    def develop_controller(self, dof_size: int) -> LinearController:
         input_size = LinearController.get_input_size(dof_size)
         policy = self.genotype.reshape((input_size, dof_size))
-        controller = LinearController(policy)
-
-        return actor, controller
+        return LinearController(policy)
 
-    def get_initial_pose(self, actor: Actor):
-        return MORPHOLOGIES[self.body_name]["get_pose"](actor)
+    def get_initial_pose(self, actor: Actor, rng: Optional[np.random.Generator] = None):
+        return MORPHOLOGIES[self.body_name]["get_pose"](actor, rng)
 
     @classmethod
     def random(cls, body_name: str):
@@ -2,17 +2,22 @@
 import logging
 import math
 import numpy as np
-from typing import Union
+import numpy.typing as npt
+from typing import Dict, Optional, Union
 
 from numpy import average
+from revolve2.core.physics.running import EnvironmentState, Reducer
 from revolve2.core.physics.running._results import EnvironmentResults
 
 
 def control_cost(environment_results: EnvironmentResults) -> float:
-    action_diffs = sum(
-        [state.action_diffs for state in environment_results.environment_states], []
-    )
-    control_costs = [np.sum(np.square(diff)) for diff in action_diffs]
+    if "control_cost" in environment_results.reduced:
+        return environment_results.reduced["control_cost"]
+    control_costs = [
+        np.sum(np.square(diff))
+        for state in environment_results.environment_states
+        for diff in state.action_diffs
+    ]
     return float(np.sum(control_costs))
 
 
@@ -25,6 +30,8 @@ def control_cost(environment_results: EnvironmentResults) -> float:
 
 
 def directed_displacement_measure(environment_results: EnvironmentResults) -> float:
+    if "directed_displacement" in environment_results.reduced:
+        return environment_results.reduced["directed_displacement"]
     begin_state = environment_results.environment_states[0].actor_states[0]
     end_state = environment_results.environment_states[-1].actor_states[0]
     distance = (begin_state.position[0] - end_state.position[0]) ** 2
@@ -34,6 +41,8 @@ def directed_displacement_measure(environment_results: EnvironmentResults) -> fl
 
 def displacement_measure(environment_results: EnvironmentResults) -> float:
     """Measure how far robot moved from start to end of simulation."""
+    if "displacement" in environment_results.reduced:
+        return environment_results.reduced["displacement"]
     begin_state = environment_results.environment_states[0].actor_states[0]
     end_state = environment_results.environment_states[-1].actor_states[0]
     distance = math.sqrt(
@@ -44,6 +53,8 @@ def displacement_measure(environment_results: EnvironmentResults) -> float:
 
 
 def average_height_measure(environment_results: EnvironmentResults) -> float:
+    if "average_height" in environment_results.reduced:
+        return environment_results.reduced["average_height"]
     heights = [
         s.actor_states[0].position[2] for s in environment_results.environment_states
     ]
@@ -54,6 +65,8 @@ def max_height_relative_to_avg_height_measure(
     environment_results: EnvironmentResults,
 ) -> float:
     """Attempt to discourage jumping behavior."""
+    if "max_height_relative_to_avg_height" in environment_results.reduced:
+        return environment_results.reduced["max_height_relative_to_avg_height"]
     heights = [
         environment_results.environment_states[i + 1].actor_states[0].position[2]
         for i in range(len(environment_results.environment_states) - 1)
@@ -70,46 +83,202 @@ def ground_contact_measure(
     The percent of time each geometry within the Actor was in contact with the ground is tabulated.
     The top two geometries with the most ground contact are considered the "feet" and aren't penalized.
     """
-    geom_data = (
-        {}
-    )  # map geom IDs to a count of samples in which they were touching ground
+    if "ground_contact" in environment_results.reduced:
+        score = environment_results.reduced["ground_contact"]
+        return None if math.isnan(score) else score
+
     actor_states = [
         env_state.actor_states[0]
         for env_state in environment_results.environment_states
     ]
-    for a in actor_states:
-        if a.groundcontacts == None or a.numgeoms == None:
-            return None  # in case necessary data wasn't tracked
-        for geomid in a.groundcontacts:
-            if geomid not in geom_data:
-                geom_data[geomid] = 0
-            geom_data[geomid] += 1
-
-    numgeoms = actor_states[0].numgeoms
-    if numgeoms <= 2 or len(geom_data) <= 2:
-        return 1.0  # nothing to penalize
+    if any(a.groundcontacts is None or a.numgeoms is None for a in actor_states):
+        return None  # in case necessary data wasn't tracked
 
-    # convert to a float (ratio of time at which geom was in contact with ground):
-    for key in geom_data:
-        geom_data[key] /= len(actor_states)
+    # ratio of samples in which each geom was touching ground
+    geom_data = np.mean([a.groundcontacts for a in actor_states], axis=0)
+    return _ground_contact_score(geom_data, actor_states[0].numgeoms)
+
+
+def _ground_contact_score(geom_data: npt.NDArray[np.float_], numgeoms: int) -> float:
+    num_touching = np.count_nonzero(geom_data)
+    if numgeoms <= 2 or num_touching <= 2:
+        return 1.0  # nothing to penalize
 
-    # sort geom IDs by most contact with ground (descending) to least
-    ranked_ids = sorted(geom_data.keys(), key=lambda id: -geom_data[id])
+    # sort geoms by most contact with ground (descending) to least
+    ranked = -np.sort(-geom_data)
 
-    ranked_nonfeet = ranked_ids[2:]
+    ranked_nonfeet = ranked[2:]
 
-    logging.debug(f"tabulated geom_data (num actor_states = {len(actor_states)}):")
+    logging.debug("tabulated geom_data:")
     logging.debug(geom_data)
     # weights determining important of penalizing most active non-foot, vs penalizing average of ALL non-feet
     w1, w2 = (0.6, 0.4)  # should sum to 1.0
 
     # get average ratio of time each non-foot geom is in contact with ground
-    #   (considering also that geoms that never touch ground won't be in geom_data)
-    average_non_feet = average(
-        [geom_data[id] for id in ranked_nonfeet]
-        + [0.0 for _ in range(numgeoms - len(geom_data))]
-    )
+    #   (geoms that never touch ground are part of ranked_nonfeet with a ratio of 0)
+    average_non_feet = average(ranked_nonfeet)
     # take weighted average such that result will be in [0, 1]
 
-    score = average([geom_data[ranked_nonfeet[0]], average_non_feet], weights=[w1, w2])
+    score = average([ranked_nonfeet[0], average_non_feet], weights=[w1, w2])
     return 1.0 - float(score)
+
+
+def num_samples(environment_results: EnvironmentResults) -> int:
+    """Number of states that were sampled, which shows how long the robot stayed healthy."""
+    if "num_samples" in environment_results.reduced:
+        return int(environment_results.reduced["num_samples"])
+    return len(environment_results.environment_states)
+
+
+class DisplacementReducer(Reducer):
+    """Streaming version of `displacement_measure`."""
+
+    _begin: Optional[npt.NDArray[np.float_]]
+    _end: Optional[npt.NDArray[np.float_]]
+
+    def init(self) -> None:
+        self._begin = None
+        self._end = None
+
+    def update(self, state: EnvironmentState) -> None:
+        position = np.array(state.actor_states[0].position)
+        if self._begin is None:
+            self._begin = position
+        self._end = position
+
+    def finalize(self) -> float:
+        assert self._begin is not None and self._end is not None
+        return float(
+            math.sqrt(
+                (self._begin[0] - self._end[0]) ** 2
+                + ((self._begin[1] - self._end[1]) ** 2)
+            )
+        )
+
+
+class DirectedDisplacementReducer(DisplacementReducer):
+    """Streaming version of `directed_displacement_measure`."""
+
+    def finalize(self) -> float:
+        assert self._begin is not None and self._end is not None
+        distance = (self._begin[0] - self._end[0]) ** 2
+        distance = distance - abs(self._begin[1] - self._end[1])
+        return float(distance)
+
+
+class AverageHeightReducer(Reducer):
+    """Streaming version of `average_height_measure`."""
+
+    _sum: float
+    _count: int
+
+    def init(self) -> None:
+        self._sum = 0
+        self._count = 0
+
+    def update(self, state: EnvironmentState) -> None:
+        self._sum += state.actor_states[0].position[2]
+        self._count += 1
+
+    def finalize(self) -> float:
+        return float(self._sum / self._count)
+
+
+class MaxRelativeHeightReducer(Reducer):
+    """Streaming version of `max_height_relative_to_avg_height_measure`. Like the measure, the first state is skipped."""
+
+    _sum: float
+    _max: float
+    _count: int
+
+    def init(self) -> None:
+        self._sum = 0
+        self._max = -math.inf
+        self._count = -1
+
+    def update(self, state: EnvironmentState) -> None:
+        self._count += 1
+        if self._count == 0:
+            return
+        height = state.actor_states[0].position[2]
+        self._sum += height
+        self._max = max(self._max, height)
+
+    def finalize(self) -> float:
+        return float(self._max / (self._sum / self._count))
+
+
+class ControlCostReducer(Reducer):
+    """Streaming version of `control_cost`."""
+
+    # summed as the actions come in, so it can differ from `control_cost` by floating point rounding
+    _cost: float
+
+    def init(self) -> None:
+        self._cost = 0.0
+
+    def update(self, state: EnvironmentState) -> None:
+        for diff in state.action_diffs:
+            self._cost += float(np.sum(np.square(diff)))
+
+    def finalize(self) -> float:
+        return self._cost
+
+
+class GroundContactReducer(Reducer):
+    """Streaming version of `ground_contact_measure`. Returns nan if ground contacts were not tracked."""
+
+    _counts: Optional[npt.NDArray[np.int_]]
+    _numgeoms: Optional[int]
+    _count: int
+    _tracked: bool
+
+    def init(self) -> None:
+        self._counts = None
+        self._numgeoms = None
+        self._count = 0
+        self._tracked = True
+
+    def update(self, state: EnvironmentState) -> None:
+        actor_state = state.actor_states[0]
+        if actor_state.groundcontacts is None or actor_state.numgeoms is None:
+            self._tracked = False
+            return
+        if self._counts is None:
+            self._counts = np.zeros(len(actor_state.groundcontacts), dtype=np.int_)
+            self._numgeoms = actor_state.numgeoms
+        self._counts += actor_state.groundcontacts
+        self._count += 1
+
+    def finalize(self) -> float:
+        if not self._tracked or self._counts is None or self._numgeoms is None:
+            return math.nan
+        return _ground_contact_score(self._counts / self._count, self._numgeoms)
+
+
+class SampleCountReducer(Reducer):
+    """Streaming version of `num_samples`."""
+
+    _count: int
+
+    def init(self) -> None:
+        self._count = 0
+
+    def update(self, state: EnvironmentState) -> None:
+        self._count += 1
+
+    def finalize(self) -> float:
+        return float(self._count)
+
+
+def make_reducers() -> Dict[str, Reducer]:
+    """Create reducers for all measures, under the names the measures look them up by."""
+    return {
+        "displacement": DisplacementReducer(),
+        "directed_displacement": DirectedDisplacementReducer(),
+        "average_height": AverageHeightReducer(),
+        "max_height_relative_to_avg_height": MaxRelativeHeightReducer(),
+        "control_cost": ControlCostReducer(),
+        "ground_contact": GroundContactReducer(),
+        "num_samples": SampleCountReducer(),
+    }
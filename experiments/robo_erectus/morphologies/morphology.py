@@ -17,6 +17,7 @@ from revolve2.core.physics.running._results import ActorState
 from revolve2.core.physics.running import (
     Environment,
     PosedActor,
+    Termination,
 )
 import logging
 from revolve2.runners.mujoco import LocalRunner
@@ -256,6 +257,8 @@ for key, m in MORPHOLOGIES.items():
 
     # m["is_healthy"] = lambda state: utilities.is_healthy_state(state, min_z)
     m["is_healthy"] = healthy_factory(min_z)
+    # same check as is_healthy, but evaluated by the runner itself
+    m["termination"] = Termination(min_height=min_z)
 
 
 def output_all():
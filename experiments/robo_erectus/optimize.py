@@ -9,6 +9,7 @@ import random
 
 from revolve2.core.database import open_async_database_sqlite
 from revolve2.core.optimization import ProcessIdGen
+from revolve2.core.physics.running import PHYSICS_PROFILES
 
 import wandb
 
@@ -55,7 +56,43 @@ async def main() -> None:
     parser.add_argument("--wandb_os_logs", action="store_true")
     parser.add_argument("-d", "--debug", action="store_true")
     parser.add_argument("-cpu", "--n_jobs", type=int, default=1)
+    parser.add_argument(
+        "--threads_per_worker",
+        type=int,
+        default=1,
+        help="BLAS/OpenMP threads of every simulation worker, 0 for no limit",
+    )
+    parser.add_argument(
+        "--pin_cpus",
+        action="store_true",
+        help="pin every simulation worker to a cpu of its own, spread over physical cores",
+    )
     parser.add_argument("-s", "--samples", type=int, default=4)
+    parser.add_argument(
+        "--settle_time",
+        type=float,
+        default=0.0,
+        help="start rollouts from a keyframe in which the robot has settled for this many seconds",
+    )
+    parser.add_argument(
+        "--collision_policy",
+        type=str,
+        default="full",
+        choices=["full", "nonadjacent", "world", "ground"],
+        help="which collisions between parts of the robot are simulated",
+    )
+    parser.add_argument(
+        "--common_random_numbers",
+        action="store_true",
+        help="evaluate all genotypes of a generation on the same initial state noise, derived from rng_seed",
+    )
+    parser.add_argument(
+        "--physics_profile",
+        type=str,
+        default="accurate",
+        choices=list(PHYSICS_PROFILES.keys()),
+        help="timestep, integrator and actuator gains of the simulation, see benchmark_physics_profiles.py",
+    )
     parser.add_argument("--sigma0", type=float, default=0.2, help="param for CMA")
     parser.add_argument("--step_size", type=float, default=0.02, help="param for ARS")
     parser.add_argument(
@@ -233,7 +270,16 @@ async def main() -> None:
         )
 
     optimizer.n_jobs = args.n_jobs
+    optimizer.threads_per_worker = (
+        None if args.threads_per_worker == 0 else args.threads_per_worker
+    )
+    optimizer.pin_cpus = args.pin_cpus
     optimizer.samples = args.samples
+    optimizer.settle_time = args.settle_time
+    optimizer.collision_policy = args.collision_policy
+    optimizer.physics_profile = args.physics_profile
+    if args.common_random_numbers:
+        optimizer.noise_seed = args.rng_seed
     if isinstance(optimizer, ArsOptimizer):
         optimizer.override_params = {
             "n_directions": ars_directions,
@@ -251,7 +297,10 @@ async def main() -> None:
     logging.info(
         f"Starting optimization process (max generations={args.num_generations:,}, max steps={max_steps_str})..."
     )
-    await optimizer.run()
+    try:
+        await optimizer.run()
+    finally:
+        optimizer.close()
 
     logging.info(
         f"Finished optimizing. (reached generation {optimizer.generation_index}/{args.num_generations}, sim step {optimizer._unique_sim_steps:,}/{max_steps_str})"
@@ -2,13 +2,14 @@
 
 import logging
 import pickle
+import time
 from random import Random
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import revolve2.core.optimization.ea.generic_ea.population_management as population_management
 import revolve2.core.optimization.ea.generic_ea.selection as selection
-from revolve2.core.physics.running._results import ActorState, BatchResults
+from revolve2.core.physics.running._results import ActorState
 import sqlalchemy
 import wandb
 from fitness import fitness_functions
@@ -20,18 +21,12 @@ from revolve2.core.database.serializers import FloatSerializer
 from revolve2.core.optimization import ProcessIdGen
 from revolve2.core.optimization.ea.generic_ea import EAOptimizer
 from revolve2.core.physics.actor import Actor
-from revolve2.core.physics.running import (
-    Batch,
-    Environment,
-    PosedActor,
-)
-from revolve2.runners.mujoco import LocalRunner
+from revolve2.core.physics.running import PhaseTimings
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.future import select
-from joblib import Parallel, delayed
-from controllers.controller_wrapper import *
+from evaluator import EvaluationSettings, EvaluationTask, Evaluator, make_evaluator
 
 from genotypes.linear_controller_genotype import (
     LinearControllerGenotype,
@@ -74,6 +69,27 @@ class Optimizer(EAOptimizer[LinearControllerGenotype, float]):
 
     n_jobs: int = 1
     samples: int = 1
+    settle_time: float = (
+        0.0  # seconds to settle each morphology once, instead of in every rollout
+    )
+    collision_policy: str = "full"  # see LocalRunner
+    physics_profile: str = "accurate"  # name of one of PHYSICS_PROFILES
+    # if set, every genotype in a generation is evaluated on the same noise seeds (common random numbers)
+    noise_seed: Optional[int] = None
+    threads_per_worker: Optional[
+        int
+    ] = 1  # BLAS/OpenMP threads of every worker, None for no limit
+    pin_cpus: bool = False  # pin every worker to a cpu of its own, see PoolEvaluator
+
+    # evaluator shared by all generations, and the settings and number of jobs it was made for
+    _evaluator: Optional[Evaluator] = None
+    _evaluator_key: Optional[
+        Tuple[EvaluationSettings, int, bool, Optional[int], bool]
+    ] = None
+
+    # timings of the evaluations since the results were last logged
+    _pending_timings: Optional[PhaseTimings] = None
+    _pending_evaluation_time: float = 0.0
 
     _body_name: str
 
@@ -284,68 +300,40 @@ class Optimizer(EAOptimizer[LinearControllerGenotype, float]):
         process_id: int,
         process_id_gen: ProcessIdGen,
     ) -> List[float]:
-        _simulation_time = self._simulation_time
-        _sampling_frequency = self._sampling_frequency
-        _control_frequency = self._control_frequency
-
-        def _evaluate(genotype, headless):
-            actor, controller = genotype.develop()
-
-            controller_wrapper = ControllerWrapper(controller)
-            batch = Batch(
-                simulation_time=_simulation_time,
-                sampling_frequency=_sampling_frequency,
-                control_frequency=_control_frequency,
-                control=controller_wrapper._control,
-            )
-
-            pos, rot = genotype.get_initial_pose(actor)
-            # pos, rot = actor_get_default_pose(actor)
-            env = Environment()
-            env.actors.append(
-                PosedActor(
-                    actor,
-                    pos,
-                    rot,
-                    [0.0 for _ in controller.get_dof_targets()],
-                ),
-            )
-            batch.environments.append(env)
-
-            # assumes all genotypes are same body name/type (e.g. "spider")
-            is_healthy = genotypes[0].is_healthy
-            return LocalRunner(headless=headless).run_batch_sync(
-                batch, is_healthy=is_healthy
-            )
-
         n_samples = self.samples if len(genotypes) > 1 else 16
         logging.info(
             f"Starting simulation batch with mujoco - {len(genotypes)} evaluations, {n_samples} samples."
         )
-        _batch_result_samples = []
-        batch_result_samples = []
-        if self.n_jobs > 1:
-            _batch_result_samples = Parallel(n_jobs=self.n_jobs)(
-                delayed(_evaluate)(genotype, True) for genotype in genotypes * n_samples
-            )
+        if self.noise_seed is None:
+            sample_seeds = [None] * n_samples
         else:
-            _batch_result_samples = [
-                _evaluate(genotype, self._headless)
-                for genotype in genotypes * n_samples
+            sample_seeds = [
+                int(seed)
+                for seed in np.random.SeedSequence(
+                    [self.noise_seed, self.generation_index]
+                ).generate_state(n_samples)
             ]
-        for i in range(n_samples):
-            batch_result_samples.append(
-                _batch_result_samples[i * len(genotypes) : (i + 1) * len(genotypes)]
-            )
-        batch_res: BatchResults
+        evaluation_start = time.perf_counter()
+        _environment_result_samples = await self._get_evaluator().evaluate(
+            [
+                EvaluationTask(genotype.genotype, genotype.body_name, seed)
+                for seed in sample_seeds
+                for genotype in genotypes
+            ]
+        )
+        self._pending_evaluation_time += time.perf_counter() - evaluation_start
+        environment_result_samples = [
+            _environment_result_samples[i * len(genotypes) : (i + 1) * len(genotypes)]
+            for i in range(n_samples)
+        ]
         # tabulate total steps of simulation performed (across all samples etc)
         total_steps = 0
-        for batch_res in _batch_result_samples:
-            assert isinstance(
-                batch_res, BatchResults
-            ), f"unexpected type {type(batch_res)}"  # sanity check
-            for env_res in batch_res.environment_results:
-                total_steps += env_res.steps_completed
+        for env_res in _environment_result_samples:
+            total_steps += env_res.steps_completed
+            if env_res.timings is not None:
+                if self._pending_timings is None:
+                    self._pending_timings = PhaseTimings()
+                self._pending_timings.merge(env_res.timings)
         self._unique_sim_steps += total_steps
         logging.info(
             f"Finished batch (with {total_steps:,} total steps, and {self._unique_sim_steps:,} steps in experiment so far)."
@@ -354,10 +342,7 @@ class Optimizer(EAOptimizer[LinearControllerGenotype, float]):
 
         environment_results = []
         fitness_samples = []
-        for batch_results_sample in batch_result_samples:
-            environment_results_sample = [
-                br.environment_results[0] for br in batch_results_sample
-            ]
+        for environment_results_sample in environment_result_samples:
             environment_results += environment_results_sample
 
             fitness_sample = [
@@ -378,9 +363,45 @@ class Optimizer(EAOptimizer[LinearControllerGenotype, float]):
 
         return fitness, environment_results
 
+    def _get_evaluator(self) -> Evaluator:
+        """
+        Get the evaluator for the current settings, creating it if needed.
+
+        The evaluator is kept between generations, so a pool of workers stays alive.
+        It is recreated if the settings, the number of jobs or their cpu usage have changed.
+
+        :returns: The evaluator.
+        """
+        key = (
+            EvaluationSettings(
+                simulation_time=self._simulation_time,
+                sampling_frequency=self._sampling_frequency,
+                control_frequency=self._control_frequency,
+                physics_profile=self.physics_profile,
+                settle_time=self.settle_time,
+                collision_policy=self.collision_policy,
+            ),
+            self.n_jobs,
+            self._headless,
+            self.threads_per_worker,
+            self.pin_cpus,
+        )
+        if self._evaluator is None or key != self._evaluator_key:
+            self.close()
+            self._evaluator = make_evaluator(*key)
+            self._evaluator_key = key
+        return self._evaluator
+
+    def close(self) -> None:
+        """Release the evaluator, stopping its worker processes if it has them."""
+        if self._evaluator is not None:
+            self._evaluator.close()
+            self._evaluator = None
+            self._evaluator_key = None
+
     def _log_results(self) -> None:
         displacement = [displacement_measure(r) for r in self._latest_results]
-        steps = [len(r.environment_states) for r in self._latest_results]
+        steps = [num_samples(r) for r in self._latest_results]
 
         wandb.log(
             {
@@ -406,9 +427,36 @@ class Optimizer(EAOptimizer[LinearControllerGenotype, float]):
                 "ground_contact_measure": wandb.Histogram(
                     [ground_contact_measure(r) for r in self._latest_results]
                 ),
+                **self._pop_timings(),
             }
         )
 
+    def _pop_timings(self) -> Dict[str, float]:
+        """
+        Get the simulation timings of the evaluations since the last call, for logging.
+
+        Phase times are summed over all simulations, so with multiple jobs they add up to more than the evaluation time.
+        `parallel_speedup` is how many simulations ran at the same time on average.
+        `worker_cpu_utilization` is the cpu time workers got per second of simulating, which drops below 1 when the cpus are oversubscribed.
+
+        :returns: The timings, with keys prefixed by "timing/".
+        """
+        if self._pending_timings is None:
+            return {}
+        timings = self._pending_timings.summary("timing/")
+        timings["timing/evaluation_time"] = self._pending_evaluation_time
+        if self._pending_evaluation_time > 0.0:
+            timings["timing/parallel_speedup"] = (
+                self._pending_timings.wall_time / self._pending_evaluation_time
+            )
+        if self._evaluator is not None:
+            utilization = self._evaluator.pop_cpu_utilization()
+            if utilization is not None:
+                timings["timing/worker_cpu_utilization"] = utilization
+        self._pending_timings = None
+        self._pending_evaluation_time = 0.0
+        return timings
+
     def _on_generation_checkpoint(self, session: AsyncSession) -> None:
         session.add(
             DbOptimizerState(
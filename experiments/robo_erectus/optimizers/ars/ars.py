@@ -14,6 +14,7 @@ sys.path.append(
 )
 
 import numpy as np
+import measures
 
 # import logz
 import optimizers.ars.utils as utils
@@ -73,7 +74,7 @@ class Worker(object):
         total_rewards = fitness
         n_points = len(genotypes)
         steps_list = [
-            len(env_results.environment_states) for env_results in environment_results
+            measures.num_samples(env_results) for env_results in environment_results
         ]
         n_resamples = len(steps_list) // n_points
         averaged_steps = []
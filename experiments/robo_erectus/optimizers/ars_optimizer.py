@@ -136,7 +136,7 @@ class ArsOptimizer(Optimizer):
 
     def _log_results(self) -> None:
         displacement = [displacement_measure(r) for r in self._latest_results]
-        steps = [len(r.environment_states) for r in self._latest_results]
+        steps = [num_samples(r) for r in self._latest_results]
 
         wandb.log(
             {
@@ -162,5 +162,6 @@ class ArsOptimizer(Optimizer):
                 "ground_contact_measure": wandb.Histogram(
                     [ground_contact_measure(r) for r in self._latest_results]
                 ),
+                **self._pop_timings(),
             }
         )
@@ -63,6 +63,20 @@ async def main() -> None:
         action="store_true",
         help="whether to write video of sim to file (runs headless)",
     )
+    parser.add_argument(
+        "--video_size",
+        type=int,
+        nargs=2,
+        default=[640, 480],
+        metavar=("WIDTH", "HEIGHT"),
+        help="resolution of the video in pixels",
+    )
+    parser.add_argument(
+        "--video_stride",
+        type=int,
+        default=1,
+        help="only render every n-th video frame (the video is written at a lower frame rate)",
+    )
     parser.add_argument(
         "--dir",
         type=str,
@@ -201,6 +215,8 @@ async def main() -> None:
                 simulation_time=args.time,
                 get_pose=pose_getter,
                 video_path=video_path,
+                video_size=tuple(args.video_size),
+                video_frame_stride=args.video_stride,
             )
             if video_path:
                 print(f"wrote file: {video_path}")
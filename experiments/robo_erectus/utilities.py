@@ -52,15 +52,21 @@ def set_latest_run(full_run_name: str):
         file.write(full_run_name)
 
 
-def get_random_rotation(scale=0.02) -> Quaternion:
-    rot = Quaternion.from_x_rotation(np.random.uniform(-1.0, 1.0) * np.pi * scale)
-    rot = rot * Quaternion.from_y_rotation(np.random.uniform(-1.0, 1.0) * np.pi * scale)
-    rot = rot * Quaternion.from_z_rotation(np.random.uniform(-1.0, 1.0) * np.pi * scale)
+def get_random_rotation(
+    scale=0.02, rng: Optional[np.random.Generator] = None
+) -> Quaternion:
+    """Small random rotation. Uses numpy's global random state if `rng` is None."""
+    random = np.random if rng is None else rng
+    rot = Quaternion.from_x_rotation(random.uniform(-1.0, 1.0) * np.pi * scale)
+    rot = rot * Quaternion.from_y_rotation(random.uniform(-1.0, 1.0) * np.pi * scale)
+    rot = rot * Quaternion.from_z_rotation(random.uniform(-1.0, 1.0) * np.pi * scale)
     return rot
 
 
 # TODO: add param for tweaking the initial pose (making it stochastic)
-def actor_get_standing_pose(actor: Actor) -> Tuple[Vector3, Quaternion]:
+def actor_get_standing_pose(
+    actor: Actor, rng: Optional[np.random.Generator] = None
+) -> Tuple[Vector3, Quaternion]:
     """
     Given an actor, return a pose (such that it starts out "standing" upright).
 
@@ -77,12 +83,14 @@ def actor_get_standing_pose(actor: Actor) -> Tuple[Vector3, Quaternion]:
     )
 
     rot = Quaternion.from_y_rotation(np.pi / 2)
-    rot = rot * get_random_rotation()
+    rot = rot * get_random_rotation(rng=rng)
 
     return (pos, rot)
 
 
-def actor_get_default_pose(actor: Actor) -> Tuple[Vector3, Quaternion]:
+def actor_get_default_pose(
+    actor: Actor, rng: Optional[np.random.Generator] = None
+) -> Tuple[Vector3, Quaternion]:
     """Original method of computing initial pose for an Actor (so it starts "flat" on the ground)."""
     bounding_box = actor.calc_aabb()
     pos = Vector3(
@@ -94,7 +102,7 @@ def actor_get_default_pose(actor: Actor) -> Tuple[Vector3, Quaternion]:
     )
 
     rot = Quaternion()
-    rot = rot * get_random_rotation()
+    rot = rot * get_random_rotation(rng=rng)
 
     return (pos, rot)
 
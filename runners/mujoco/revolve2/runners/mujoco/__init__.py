@@ -1,6 +1,16 @@
 """Physics runner using the Mujoco simulator."""
 
 from ._local_runner import LocalRunner
+from ._model_cache import ModelCache
 from ._modular_robot_rerunner import ModularRobotRerunner
+from ._snapshot import KeyframeCache, Snapshot
+from ._vector_env import VectorEnv
 
-__all__ = ["LocalRunner", "ModularRobotRerunner"]
+__all__ = [
+    "KeyframeCache",
+    "LocalRunner",
+    "ModelCache",
+    "ModularRobotRerunner",
+    "Snapshot",
+    "VectorEnv",
+]
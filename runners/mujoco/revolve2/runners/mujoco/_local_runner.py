@@ -1,62 +1,155 @@
+import asyncio
+import concurrent.futures
+import copy
+import dataclasses
+import functools
+import logging
 import math
-import tempfile
-from typing import List, Set
+import multiprocessing
+from typing import Callable, Dict, List, Optional, Tuple
 
-import cv2
+import glfw
 import mujoco_viewer
 import numpy as np
 
 import mujoco
-
-try:
-    import logging
-
-    old_len = len(logging.root.handlers)
-
-    from dm_control import mjcf
-
-    new_len = len(logging.root.handlers)
-
-    assert (
-        old_len + 1 == new_len
-    ), "dm_control not adding logging handler as expected. Maybe they fixed their annoying behaviour? https://github.com/deepmind/dm_control/issues/314https://github.com/deepmind/dm_control/issues/314"
-
-    logging.root.removeHandler(logging.root.handlers[-1])
-except Exception as e:
-    print("Failed to fix absl logging bug", e)
-    pass
-
-from pyrr import Quaternion, Vector3
-from revolve2.core.physics.actor.urdf import to_urdf as physbot_to_urdf
 from revolve2.core.physics.running import (
     ActorControl,
-    ActorState,
     Batch,
     BatchResults,
     Environment,
     EnvironmentResults,
-    EnvironmentState,
+    PhaseTimings,
     Runner,
+    Trajectory,
 )
-from typing import Callable, Optional, Tuple
+
+from ._mjcf import COLLISION_POLICIES, MAX_VIDEO_SIZE, make_mjcf
+from ._model_cache import ModelCache, environment_fingerprint
+from ._open_loop_targets import OpenLoopTargets
+from ._phase_clock import PhaseClock
+from ._simulation import (
+    get_actor_states,
+    get_ground_contact_actors,
+    get_keyframe,
+    get_model,
+    keyframe_translation,
+    perturb_hinge_states,
+    restore_actor_states,
+    restore_keyframe,
+    set_actor_poses,
+    set_actor_targets,
+    set_initial_hinge_states,
+    steps_before,
+)
+from ._snapshot import KeyframeCache
+from ._termination_checker import TerminationChecker
+from ._video_recorder import VideoRecorder
+
+# Distance in meters between environments that are simulated together in one model.
+_PACKED_ENVIRONMENT_SPACING = 10.0
+
+# Maximum number of control steps the targets of open loop controllers are computed for at once.
+_MAX_OPEN_LOOP_CHUNK_SIZE = 4096
 
 
 class LocalRunner(Runner):
     """Runner for simulating using Mujoco."""
 
     _headless: bool
-
-    def __init__(self, headless: bool = False):
+    _model_cache: ModelCache
+    _num_workers: int
+    _pack_size: int
+    _pool: Optional[concurrent.futures.ProcessPoolExecutor]
+    _executor: Optional[concurrent.futures.ThreadPoolExecutor]
+    _settle_time: float
+    _keyframe_cache: KeyframeCache
+    _video_size: Tuple[int, int]
+    _video_fps: float
+    _video_frame_stride: int
+    _collision_policy: str
+
+    # creates models the way the runner does, for code that compiles or inspects them itself
+    _make_mjcf = staticmethod(make_mjcf)
+
+    def __init__(
+        self,
+        headless: bool = False,
+        model_cache: Optional[ModelCache] = None,
+        num_workers: int = 1,
+        pack_size: int = 1,
+        settle_time: float = 0.0,
+        keyframe_cache: Optional[KeyframeCache] = None,
+        video_size: Tuple[int, int] = (640, 480),
+        video_fps: float = 24.0,
+        video_frame_stride: int = 1,
+        collision_policy: str = "full",
+    ):
         """
         Initialize this object.
 
         :param headless: If True, the simulation will not be rendered. This drastically improves performance.
+        :param model_cache: Cache for compiled models. If None, the cache shared by all runners in this process is used. Worker processes (see `num_workers`) each use an empty cache with the same settings.
+        :param num_workers: Number of processes to simulate the environments of a batch in. If 1, environments are simulated one by one in the calling process. Only used for headless batches without video. See `run_batch`.
+        :param pack_size: Maximum number of environments to simulate together in a single model. Environments are only packed with environments that contain the same actors, and never interact with each other. Packing pays off for many small robots, where one larger simulation step is cheaper than many small ones. Only used for headless batches without video. At most 31.
+        :param settle_time: If positive, environments do not start from the pose of their actors, but from a keyframe: the state after simulating the environment for this many seconds without control and without hinge noise, so the actors have settled on the ground. The keyframe is created once per set of actors, initial dof targets and pose, and reused for all environments with the same actors, dof targets and pose. Environments that only differ in the horizontal position of their actors as a whole share a keyframe, as settling on the flat ground does not depend on it; any other difference in pose, such as a different orientation, means a keyframe of its own. Hinge noise is added on top of the keyframe. Simulation time starts at zero after the keyframe.
+        :param keyframe_cache: Cache for keyframes. If None, the cache shared by all runners in this process is used. Worker processes (see `num_workers`) each use an empty cache with the same settings.
+        :param video_size: Width and height in pixels of recorded videos. At most 1920x1080.
+        :param video_fps: Frame rate of recorded videos, in frames per second of simulation time.
+        :param video_frame_stride: Only render every this many frames. The video is written at a correspondingly lower frame rate, so it still plays in real time.
+        :param collision_policy: Which collisions of actors are simulated. "full": all of them, except between bodies directly connected by a joint, which mujoco always filters. "nonadjacent": as "full", but also not between bodies that are connected to the same body, or that are two joints apart. "world": no collisions between the parts of an actor, only with the ground and other actors. "ground": only with the ground. Fewer collisions make collision detection cheaper.
+        :raises ValueError: If the collision policy is unknown.
         """
+        assert num_workers >= 1
+        assert 1 <= pack_size <= 31
+        assert settle_time >= 0.0
+        assert (
+            0 < video_size[0] <= MAX_VIDEO_SIZE[0]
+            and 0 < video_size[1] <= MAX_VIDEO_SIZE[1]
+        )
+        assert video_fps > 0.0
+        assert video_frame_stride >= 1
+        if collision_policy not in COLLISION_POLICIES:
+            raise ValueError(
+                f"Unknown collision policy '{collision_policy}'. Choose from {COLLISION_POLICIES}."
+            )
+
         self._headless = headless
+        self._model_cache = ModelCache.shared() if model_cache is None else model_cache
+        self._num_workers = num_workers
+        self._pack_size = pack_size
+        self._pool = None
+        self._executor = None
+        self._settle_time = settle_time
+        self._keyframe_cache = (
+            KeyframeCache.shared() if keyframe_cache is None else keyframe_cache
+        )
+        self._video_size = video_size
+        self._video_fps = video_fps
+        self._video_frame_stride = video_frame_stride
+        self._collision_policy = collision_policy
 
     def run_batch_sync(
         self, batch: Batch, is_healthy: Optional[Callable] = None, video_path: str = ""
     ) -> BatchResults:
+        """
+        Run the provided batch by simulating each contained environment, blocking until done.
+
+        See `run_batch`.
+
+        :param batch: The batch to run.
+        :param is_healthy: function that evaluates whether the robot is in a "healthy state". (If not the simulation should be terminated).
+        :param video_path: If not empty, a video of the simulation is stored at this path.
+        :returns: List of simulation states in ascending order of time.
+        """
+        if self._use_pool(video_path):
+            return self._collect_results(
+                batch,
+                [
+                    (pack, future.result())
+                    for pack, future in self._submit_to_pool(batch, is_healthy)
+                ],
+            )
         return self._run_batch(batch, is_healthy=is_healthy, video_path=video_path)
 
     async def run_batch(
@@ -65,496 +158,694 @@ class LocalRunner(Runner):
         """
         Run the provided batch by simulating each contained environment.
 
+        The simulation does not block the event loop, so other tasks can run while the batch is simulated.
+        If this runner has more than one worker, the environments are distributed over a pool of processes that lives as long as the runner.
+        The batch's control function and `is_healthy` must then be picklable,
+        and changes they make to their own state in the worker processes are not visible in the calling process.
+        Otherwise, headless batches are simulated on a thread of this runner, on which the control function and `is_healthy` are also called.
+        Batches passed to the same runner are simulated one after another.
+        Batches with a viewer are simulated on the calling thread, as the viewer's window can only be used from the thread that created it,
+        so those block the event loop.
+
         :param batch: The batch to run.
         :param is_healthy: function that evaluates whether the robot is in a "healthy state". (If not the simulation should be terminated).
+        :param video_path: If not empty, a video of the simulation is stored at this path.
         :returns: List of simulation states in ascending order of time.
         """
-        return self._run_batch(batch, is_healthy=is_healthy, video_path=video_path)
+        if self._use_pool(video_path):
+            submitted = self._submit_to_pool(batch, is_healthy)
+            pack_results = await asyncio.gather(
+                *[asyncio.wrap_future(future) for _, future in submitted]
+            )
+            return self._collect_results(
+                batch,
+                [
+                    (pack, results)
+                    for (pack, _), results in zip(submitted, pack_results)
+                ],
+            )
+        if not self._headless:
+            return self._run_batch(batch, is_healthy=is_healthy, video_path=video_path)
 
-    def _run_batch(
-        self, batch: Batch, is_healthy: Optional[Callable] = None, video_path: str = ""
-    ) -> BatchResults:
-        logging.info("Starting simulation batch with mujoco.")
-        video_fps = 24
-        control_step = 1 / batch.control_frequency * 2
-        sample_step = 1 / batch.sampling_frequency
-        video_step = 1 / video_fps
+        if self._executor is None:
+            # a single thread, so the caches of this runner are never used concurrently
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="mujoco-runner"
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            functools.partial(
+                self._run_batch, batch, is_healthy=is_healthy, video_path=video_path
+            ),
+        )
 
-        results = BatchResults([EnvironmentResults([]) for _ in batch.environments])
+    def close(self) -> None:
+        """Shut down the worker processes and thread of this runner, if any were started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
-        for env_index, env_descr in enumerate(batch.environments):
-            xml_string = self._make_mjcf(env_descr)
-            model = mujoco.MjModel.from_xml_string(xml_string)
+    def _use_pool(self, video_path: str) -> bool:
+        return self._num_workers > 1 and self._headless and not video_path
 
-            data = mujoco.MjData(model)
+    def _make_packs(self, batch: Batch, video_path: str) -> List[List[int]]:
+        """
+        Divide the environments of a batch into groups that are simulated together in one model.
 
-            # set initial dof state
-            LocalRunner._set_initial_hinge_states(
-                data, model, noise_angles=0.02, noise_vels=0.02
+        Environments with the same actors are grouped together so the combined models can be reused.
+
+        :param batch: The batch to divide.
+        :param video_path: See `run_batch`.
+        :returns: Indices of the environments in each group.
+        """
+        if self._pack_size == 1 or not self._headless or video_path:
+            return [[env_index] for env_index in range(len(batch.environments))]
+
+        by_actors: Dict[str, List[int]] = {}
+        for env_index, env_descr in enumerate(batch.environments):
+            by_actors.setdefault(environment_fingerprint(env_descr), []).append(
+                env_index
             )
+        return [
+            env_indices[i : i + self._pack_size]
+            for env_indices in by_actors.values()
+            for i in range(0, len(env_indices), self._pack_size)
+        ]
 
-            initial_targets = [
-                dof_state
-                for posed_actor in env_descr.actors
-                for dof_state in posed_actor.dof_states
-            ]
-            self._set_dof_targets(data, initial_targets)
+    def _submit_to_pool(
+        self, batch: Batch, is_healthy: Optional[Callable]
+    ) -> List[Tuple[List[int], concurrent.futures.Future]]:
+        """
+        Submit the environments of a batch to the worker pool, a task per pack of environments.
 
-            for posed_actor in env_descr.actors:
-                posed_actor.dof_states
+        Tasks are submitted from most to least expensive, so the pool schedules them longest processing time first.
 
-            if not self._headless or video_path:
-                viewer = mujoco_viewer.MujocoViewer(
-                    model,
-                    data,
-                )
-                if video_path:
-                    # viewer._render_every_frame = False  # save a lot of time
-                    # http://tsaith.github.io/combine-images-into-a-video-with-python-3-and-opencv-3.html
-                    # https://stackoverflow.com/a/55987868
-                    fourcc = cv2.VideoWriter_fourcc(*"VP80")  # "mp4v" "H264" "avc1"
-                    vid = cv2.VideoWriter(
-                        video_path,
-                        fourcc,
-                        video_fps,
-                        (viewer.viewport.width, viewer.viewport.height),
-                    )
+        :param batch: The batch to run.
+        :param is_healthy: See `run_batch`.
+        :returns: The environment indices of each task and a future for its results.
+        """
+        if self._pool is None:
+            # spawned instead of forked, so workers do not inherit the state of this process,
+            # and the caches of this runner are recreated in them with the same settings
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self._num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._model_cache, self._keyframe_cache),
+            )
 
-            last_control_time = 0.0
-            last_sample_time = 0.0
-            last_video_time = 0.0  # time at which last video frame was saved
+        packs = self._make_packs(batch, "")
+        costs = [
+            sum(
+                LocalRunner._estimate_cost(batch, batch.environments[env_index])
+                for env_index in pack
+            )
+            for pack in packs
+        ]
 
-            # sample initial state
-            results.environment_results[env_index].environment_states.append(
-                EnvironmentState(
-                    0.0, [], [], self._get_actor_states(env_descr, data, model)
+        submitted = []
+        for pack_index in sorted(range(len(packs)), key=lambda i: -costs[i]):
+            pack = packs[pack_index]
+            # only send the environments that are simulated, not the whole batch
+            pack_batch = dataclasses.replace(batch)
+            pack_batch.environments.extend(
+                batch.environments[env_index] for env_index in pack
+            )
+            submitted.append(
+                (
+                    pack,
+                    self._pool.submit(
+                        _run_environments_in_worker,
+                        pack_batch,
+                        pack,
+                        is_healthy,
+                        self._settle_time,
+                        self._collision_policy,
+                    ),
                 )
             )
+        return submitted
 
-            actions = []
-            action_diffs = []
-            last_action = None
-            while (time := data.time) < batch.simulation_time:
-                # do control if it is time
-                if time >= last_control_time + control_step:
-                    last_control_time = math.floor(time / control_step) * control_step
-                    control = ActorControl()
+    @staticmethod
+    def _collect_results(
+        batch: Batch, pack_results: List[Tuple[List[int], List[EnvironmentResults]]]
+    ) -> BatchResults:
+        """
+        Put the results of packs of environments back in the order of the environments in the batch.
 
-                    # get actor state so we can read joint angles/velocities
-                    actor_state = self._get_actor_states(
-                        env_descr,
-                        data,
-                        model,
-                        ground_contacts=False,
-                    )[0]
-
-                    logging.debug(f"actor height = {actor_state.position.z:0.3f}")
-                    # TODO: the exact time at which we terminate isn't tracked exactly
-                    #   (whatever last sample time was is taken to be the duration)
-                    if is_healthy is not None:
-                        if not is_healthy(actor_state):
-                            total_steps = results.environment_results[
-                                env_index
-                            ].steps_completed
-                            # end the simulation
-                            logging.info(
-                                f"stopping sim at time {time:0.3f} (step {total_steps}) due to unhealthy actor!"
-                            )
-                            break
+        :param batch: The batch that was run.
+        :param pack_results: The indices of the environments in each pack and their results.
+        :returns: The results of the batch.
+        """
+        results: List[Optional[EnvironmentResults]] = [None] * len(batch.environments)
+        for pack, pack_result in pack_results:
+            for env_index, env_result in zip(pack, pack_result):
+                results[env_index] = env_result
+
+        timings = None
+        if batch.record_timings:
+            timings = PhaseTimings()
+            for env_result in results:
+                assert env_result is not None and env_result.timings is not None
+                timings.merge(env_result.timings)
+        return BatchResults(results, timings)  # type: ignore # all results are set
 
-                    batch.control(
-                        env_index,
-                        actor_state,
-                        control_step,
-                        control,
-                    )
-                    actor_targets = control._dof_targets
-                    action = control._dof_targets[0][1]
-                    actions.append(action)
-                    if last_action is None:
-                        action_diffs.append(action)
-                    else:
-                        action_diffs.append(
-                            [action[i] - last_action[i] for i in range(len(action))]
-                        )
-                    last_action = action
-                    actor_targets.sort(key=lambda t: t[0])
-                    targets = [
-                        target
-                        for actor_target in actor_targets
-                        for target in actor_target[1]
-                    ]
-                    # set target angles of the joints
-                    self._set_dof_targets(data, targets)
-
-                # sample state if it is time
-                if time >= last_sample_time + sample_step:
-                    last_sample_time = int(time / sample_step) * sample_step
-                    # for experimenting with proper min_z param for morphology
-                    """
-                    actor_state = (
-                       self._get_actor_states(
-                           env_descr,
-                           data,
-                           model,
-                       ),
-                    )
-                    print(f"actor height = {actor_state[0][0].position[2]:.3f}")
-                    import pdb
-
-                    # pdb.set_trace()
-                    """
-                    env_state = EnvironmentState(
-                        time,
-                        actions,
-                        action_diffs,
-                        self._get_actor_states(
-                            env_descr,
-                            data,
-                            model,
-                        ),
-                    )
-                    results.environment_results[env_index].environment_states.append(
-                        env_state
-                    )
-                    actions = []
-                    action_diffs = []
-
-                # step simulation
-                mujoco.mj_step(model, data)
-                results.environment_results[env_index].steps_completed += 1
-
-                if not self._headless:
-                    viewer.render()
-
-                # capture video frame if it's time
-                if video_path and time >= last_video_time + video_step:
-                    last_video_time = int(time / video_step) * video_step
-
-                    if self._headless:
-                        # ensure render is called anyways
-                        viewer._hide_menu = (
-                            viewer._hide_menu or video_path
-                        )  # hack (don't show overlay in video)
-                        viewer.render()
-
-                    # https://github.com/deepmind/mujoco/issues/285 (see also record.cc)
-                    img = np.empty(
-                        (viewer.viewport.height, viewer.viewport.width, 3),
-                        dtype=np.uint8,
-                    )
+    @staticmethod
+    def _estimate_cost(batch: Batch, env_descr: Environment) -> float:
+        """
+        Estimate the relative cost of simulating an environment.
 
-                    mujoco.mjr_readPixels(
-                        rgb=img,
-                        depth=None,
-                        viewport=viewer.viewport,
-                        con=viewer.ctx,
-                    )
-                    img = np.flip(img, axis=0)  # img is upside down initially
-                    vid.write(img)
-                    # matplotlib.image.imsave("/tmp/first.png", img)
-
-            if not self._headless or video_path:
-                viewer.close()
-            if video_path:
-                vid.release()
-
-            # sample one final time
-            results.environment_results[env_index].environment_states.append(
-                EnvironmentState(
-                    time,
-                    actions,
-                    action_diffs,
-                    self._get_actor_states(env_descr, data, model),
-                )
-            )
+        :param batch: The batch the environment is part of.
+        :param env_descr: The environment.
+        :returns: The estimated cost.
+        """
+        num_dofs = sum(
+            len(posed_actor.actor.joints) for posed_actor in env_descr.actors
+        )
+        # actors without joints still need to be simulated
+        return max(1, num_dofs) * batch.simulation_time
 
-        return results
+    def _run_batch(
+        self, batch: Batch, is_healthy: Optional[Callable] = None, video_path: str = ""
+    ) -> BatchResults:
+        logging.info("Starting simulation batch with mujoco.")
+        packs = self._make_packs(batch, video_path)
+        return self._collect_results(
+            batch,
+            [
+                (
+                    pack,
+                    self._run_environments(
+                        batch,
+                        pack,
+                        [batch.environments[env_index] for env_index in pack],
+                        is_healthy,
+                        video_path,
+                    ),
+                )
+                for pack in packs
+            ],
+        )
 
-    @staticmethod
-    def _make_mjcf(env_descr: Environment, checkered: bool = True) -> str:
-        env_mjcf = mjcf.RootElement(model="environment")
+    def _run_environments(
+        self,
+        batch: Batch,
+        env_indices: List[int],
+        env_descrs: List[Environment],
+        is_healthy: Optional[Callable] = None,
+        video_path: str = "",
+    ) -> List[EnvironmentResults]:
+        """
+        Simulate one or more environments together in a single model.
 
-        env_mjcf.compiler.angle = "radian"
+        The environments do not interact with each other.
+        An environment that is terminated, or whose actor becomes unhealthy, stops being controlled and recorded, while the others continue.
 
-        env_mjcf.option.timestep = 0.0005
-        env_mjcf.option.integrator = "RK4"
+        :param batch: The batch the environments are part of.
+        :param env_indices: Index of each environment in the batch, as passed to the control function.
+        :param env_descrs: The environments.
+        :param is_healthy: See `run_batch`.
+        :param video_path: See `run_batch`. Only possible when simulating a single environment.
+        :returns: The results of each environment.
+        """
+        assert len(env_descrs) == 1 or not video_path
 
-        env_mjcf.option.gravity = [0, 0, -9.81]
+        # time spent on all environments together, divided among them at the end
+        clock = PhaseClock("setup")
 
-        env_mjcf.worldbody.add(
-            "geom",
-            name="ground",
-            type="plane",
-            size=[10, 10, 1],
-            rgba=[0.2, 0.2, 0.2, 1],
-            material=("MatPlane" if checkered else None),
-        )
-        env_mjcf.worldbody.add(
-            "light",
-            pos=[0, 0, 100],
-            ambient=[1.0, 1.0, 1.0],
-            directional=True,
-            castshadow=False,
-        )
-        env_mjcf.visual.headlight.active = 0
-
-        # textures based on https://github.com/Farama-Foundation/Gymnasium/blob/main/gymnasium/envs/mujoco/assets/hopper.xml
-        env_mjcf.asset.add(
-            "texture",
-            type="skybox",
-            builtin="gradient",
-            rgb1=".4 .5 .6",
-            rgb2="0 0 0",
-            width="100",
-            height="100",
-        )
-        env_mjcf.asset.add(
-            "texture",
-            builtin="flat",
-            height="1278",
-            mark="cross",
-            markrgb="1 1 1",
-            name="texgeom",
-            random="0.01",
-            rgb1="0.8 0.6 0.4",
-            rgb2="0.8 0.6 0.4",
-            type="cube",
-            width="127",
-        )
-        env_mjcf.asset.add(
-            "texture",
-            builtin="checker",
-            height="100",
-            name="texplane",
-            rgb1="0 0 0",
-            rgb2="0.8 0.8 0.8",
-            type="2d",
-            width="100",
-        )
-        env_mjcf.asset.add(
-            "material",
-            name="MatPlane",
-            reflectance="0.0",
-            shininess="1",
-            specular="1",
-            texrepeat="60 60",
-            texture="texplane",
-        )
-        env_mjcf.asset.add(
-            "material",
-            name="geom",
-            texture="texgeom",
-            texuniform="true",
+        control_step = 1 / batch.control_frequency * 2
+        sample_step = 1 / batch.sampling_frequency
+        video_step = self._video_frame_stride / self._video_fps
+
+        # models of runs that are never rendered are generated without visual assets
+        clock.enter("model", 1)
+        model, layout = get_model(
+            env_descrs,
+            batch.physics_profile,
+            self._model_cache,
+            self._collision_policy,
+            visual=not self._headless or bool(video_path),
+            clock=clock,
         )
+        clock.enter("setup")
 
-        for actor_index, posed_actor in enumerate(env_descr.actors):
-            urdf = physbot_to_urdf(
-                posed_actor.actor,
-                f"robot_{actor_index}",
-                Vector3(),
-                Quaternion(),
+        # actors of all environments, in the order they are in the model
+        actors = [
+            posed_actor for env_descr in env_descrs for posed_actor in env_descr.actors
+        ]
+        # range of the actor indices of every environment
+        actor_ranges: List[Tuple[int, int]] = []
+        for env_descr in env_descrs:
+            begin = actor_ranges[-1][1] if len(actor_ranges) > 0 else 0
+            actor_ranges.append((begin, begin + len(env_descr.actors)))
+
+        if len(env_descrs) == 1:
+            root_offsets = None
+        else:
+            # Place the environments on a grid, so their actors are not all in the same spot.
+            # They would not collide anyway, but with overlapping bounding boxes mujoco's broadphase
+            # produces a candidate pair for every two geoms, which makes collision detection quadratic.
+            grid_size = math.ceil(math.sqrt(len(env_descrs)))
+            root_offsets = np.zeros((len(actors), 3))
+            for env, (actor_begin, actor_end) in enumerate(actor_ranges):
+                root_offsets[actor_begin:actor_end, 0] = (
+                    env % grid_size
+                ) * _PACKED_ENVIRONMENT_SPACING
+                root_offsets[actor_begin:actor_end, 1] = (
+                    env // grid_size
+                ) * _PACKED_ENVIRONMENT_SPACING
+
+        data = mujoco.MjData(model)
+        if self._settle_time > 0.0:
+            for env, env_descr in enumerate(env_descrs):
+                keyframe, keyframe_layout = get_keyframe(
+                    env_descr,
+                    batch.physics_profile,
+                    self._settle_time,
+                    self._model_cache,
+                    self._keyframe_cache,
+                    self._collision_policy,
+                    clock,
+                )
+                if len(env_descrs) == 1:
+                    restore_keyframe(keyframe, env_descr, data, layout)
+                else:
+                    restore_actor_states(
+                        keyframe,
+                        keyframe_layout,
+                        data,
+                        layout,
+                        actor_ranges[env][0],
+                        keyframe_translation(env_descr),
+                        root_offsets,
+                    )
+            data.time = 0.0
+        else:
+            set_actor_poses(actors, data, layout, root_offsets)
+
+        # hinges of all actors, actor after actor
+        hinge_qpos_adr = np.concatenate(layout.hinge_qpos_adr)
+        hinge_dof_adr = np.concatenate(layout.hinge_dof_adr)
+        # range of the hinges of every environment
+        hinge_ranges: List[Tuple[int, int]] = []
+        for actor_begin, actor_end in actor_ranges:
+            begin = hinge_ranges[-1][1] if len(hinge_ranges) > 0 else 0
+            hinge_ranges.append(
+                (
+                    begin,
+                    begin
+                    + sum(
+                        len(actor_hinges)
+                        for actor_hinges in layout.hinge_qpos_adr[actor_begin:actor_end]
+                    ),
+                )
             )
 
-            model = mujoco.MjModel.from_xml_string(urdf)
+        # geoms of every environment, as if it had a model of its own, so ground contacts do not depend on packing
+        env_geoms = [
+            layout.env_geoms(actor_begin, actor_end)
+            for actor_begin, actor_end in actor_ranges
+        ]
+        actor_geoms = [
+            env_geoms[env]
+            for env, (actor_begin, actor_end) in enumerate(actor_ranges)
+            for _ in range(actor_begin, actor_end)
+        ]
 
-            # mujoco can only save to a file, not directly to string,
-            # so we create a temporary file.
-            botfile = tempfile.NamedTemporaryFile(
-                mode="r+", delete=True, suffix=".urdf"
-            )
-            mujoco.mj_saveLastXML(botfile.name, model)
-            robot = mjcf.from_file(botfile)
-            botfile.close()
-
-            force_range = 4.0  # limits force of each actuator (preventing jumping)
-            for joint in posed_actor.actor.joints:
-                # robot.actuator.add(
-                #     "intvelocity",
-                #     actrange="-1.57 1.57",
-                #     kp=5.0,
-                #     forcerange=f"{-force_range} {force_range}",
-                #     joint=robot.find(namespace="joint", identifier=joint.name),
-                # )
-
-                # note that the armature is related to "inertia"
-                robot.find(namespace="joint", identifier=joint.name).armature = "0.2"
-                # damping is kinda like friction in the rotation
-                # robot.find(namespace="joint", identifier=joint.name).damping = "0.005"
-                robot.actuator.add(
-                    "position",
-                    kp=10000.0,  # this is the p value for PID
-                    # kp=5.0,
-                    # kp=0.2,
-                    ctrlrange="-1.0 1.0",
-                    forcerange=f"{-force_range} {force_range}",
-                    joint=robot.find(
-                        namespace="joint",
-                        identifier=joint.name,
-                    ),
+        # set initial dof state
+        for env, (hinge_begin, hinge_end) in enumerate(hinge_ranges):
+            rng = LocalRunner._make_rng(batch, env_descrs[env], env_indices[env])
+            if self._settle_time > 0.0:
+                perturb_hinge_states(
+                    data,
+                    hinge_qpos_adr[hinge_begin:hinge_end],
+                    hinge_dof_adr[hinge_begin:hinge_end],
+                    noise_angles=0.02,
+                    noise_vels=0.02,
+                    rng=rng,
                 )
-                robot.actuator.add(
-                    "velocity",
-                    kv=0.1,  # this is the v value for PID
-                    # kv=0.4,
-                    # kv=0.05,
-                    ctrlrange="-1.0 1.0",
-                    forcerange=f"{-force_range} {force_range}",
-                    joint=robot.find(namespace="joint", identifier=joint.name),
+            else:
+                set_initial_hinge_states(
+                    data,
+                    hinge_qpos_adr[hinge_begin:hinge_end],
+                    hinge_dof_adr[hinge_begin:hinge_end],
+                    noise_angles=0.02,
+                    noise_vels=0.02,
+                    rng=rng,
                 )
+        if self._settle_time > 0.0:
+            # the actors start on the ground, so make the contacts of the initial sample match the state
+            mujoco.mj_forward(model, data)
+
+        termination_checker = TerminationChecker(
+            [
+                batch.termination
+                if env_descr.termination is None
+                else env_descr.termination
+                for env_descr in env_descrs
+            ],
+            actor_ranges,
+            layout,
+            data,
+            root_offsets,
+        )
 
-            attachment_frame = env_mjcf.attach(robot)
-            attachment_frame.add("freejoint")
-            attachment_frame.pos = [
-                posed_actor.position.x,
-                posed_actor.position.y,
-                posed_actor.position.z,
-            ]
-
-            attachment_frame.quat = [
-                posed_actor.orientation.x,
-                posed_actor.orientation.y,
-                posed_actor.orientation.z,
-                posed_actor.orientation.w,
-            ]
-
-        xml = env_mjcf.to_xml_string()
-        if not isinstance(xml, str):
-            raise RuntimeError("Error generating mjcf xml.")
-
-        return xml
-
-    @classmethod
-    def _get_actor_states(
-        cls,
-        env_descr: Environment,
-        data: mujoco.MjData,
-        model: mujoco.MjModel,
-        ground_contacts: bool = True,
-    ) -> List[ActorState]:
-        return [
-            cls._get_actor_state(i, data, model, ground_contacts)
-            for i in range(len(env_descr.actors))
-        ]
+        # targets of all actors, written to the actuators in ctrl_adr in one go
+        ctrl_adr = np.concatenate(layout.target_ctrl_adr)
+        targets = np.zeros(len(ctrl_adr))
+        # range of every actor in targets
+        target_ranges: List[Tuple[int, int]] = []
+        for actor_ctrl_adr in layout.target_ctrl_adr:
+            begin = target_ranges[-1][1] if len(target_ranges) > 0 else 0
+            target_ranges.append((begin, begin + len(actor_ctrl_adr)))
+        for actor_index, posed_actor in enumerate(actors):
+            set_actor_targets(
+                targets, target_ranges[actor_index], posed_actor.dof_states
+            )
+        data.ctrl[ctrl_adr] = targets
 
-    @staticmethod
-    def _get_actor_state(
-        robot_index: int,
-        data: mujoco.MjData,
-        model: mujoco.MjModel,
-        ground_contacts: bool = True,  # whether to track ground contacts (could be slow)
-    ) -> ActorState:
-        robotname = f"robot_{robot_index}/"  # the slash is added by dm_control. ugly but deal with it
-        bodyid = mujoco.mj_name2id(
-            model,
-            mujoco.mjtObj.mjOBJ_BODY,
-            robotname,
-        )
-        assert bodyid >= 0
-
-        qindex = model.body_jntadr[bodyid]
-
-        # explicitly copy because the Vector3 and Quaternion classes don't copy the underlying structure
-        position = Vector3([n for n in data.qpos[qindex : qindex + 3]])
-        orientation = Quaternion([n for n in data.qpos[qindex + 3 : qindex + 3 + 4]])
-
-        geomids: Optional[Set[int]] = None
-        numgeoms: Optional[int] = None
-        if ground_contacts:
-            contacts = data.contact
-            # https://mujoco.readthedocs.io/en/latest/overview.html#floating-objects
-            groundid = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_GEOM, "ground")
-
-            geomids = set()  # ids of geometries in contact with ground
-            for c in contacts:
-                if groundid in [c.geom1, c.geom2] and c.geom1 != c.geom2:
-                    otherid = c.geom1 if c.geom2 == groundid else c.geom2
-                    othername = mujoco.mj_id2name(
-                        model, mujoco.mjtObj.mjOBJ_GEOM, otherid
+        if not self._headless:
+            viewer = mujoco_viewer.MujocoViewer(
+                model,
+                data,
+            )
+        if video_path:
+            recorder = VideoRecorder(
+                model,
+                video_path,
+                self._video_fps / self._video_frame_stride,
+                *self._video_size,
+            )
+
+        last_control_time = 0.0
+        last_sample_time = 0.0
+        last_video_time = 0.0  # time at which last video frame was saved
+
+        # the action of an environment are the targets of the first actor that is controlled.
+        # without recording, a trajectory only holds the sample the reducers are processing
+        # and the actions given since the previous one.
+        trajectories = [
+            Trajectory(
+                [
+                    len(actor_hinges)
+                    for actor_hinges in layout.hinge_qpos_adr[actor_begin:actor_end]
+                ],
+                len(layout.target_ctrl_adr[actor_begin]),
+                num_geoms=len(env_geoms[env]),
+                capacity=math.ceil(batch.simulation_time / sample_step) + 2
+                if batch.record_trajectory
+                else 1,
+                action_capacity=math.ceil(
+                    (
+                        batch.simulation_time
+                        if batch.record_trajectory
+                        else min(sample_step, batch.simulation_time)
                     )
-                    # logging.debug(f"found ground collision with geom ID: {otherid} (name '{othername}')")
-                    if not othername.startswith(robotname):
-                        continue  # ensure contact is with part of the robot (e.g. not obstacle and ground)
-                    geomids.add(otherid)
-
-            # if len(geomids) > 0:
-            #    logging.debug(f"found {len(geomids)} total geoms in contact with ground")
-            #    names = list([mujoco.mj_id2name(model, mujoco.mjtObj.mjOBJ_GEOM, curid) for curid in geomids])
-            #    logging.debug(names)
-
-        # track states of hinge joints
-        #   for reference see mjmodel.h and simulate.cc:makejoint()
-        jnt_hinge_indices = [
-            i
-            for i, val in enumerate(model.jnt_type)
-            if val == mujoco.mjtJoint.mjJNT_HINGE
+                    / control_step
+                )
+                + 1,
+            )
+            for env, (actor_begin, actor_end) in enumerate(actor_ranges)
         ]
-        hinge_angles = [data.qpos[model.jnt_qposadr[i]] for i in jnt_hinge_indices]
-        hinge_vels = [data.qvel[model.jnt_dofadr[i]] for i in jnt_hinge_indices]
-
-        return ActorState(
-            position,
-            orientation,
-            geomids,
-            model.ngeom,
-            hinge_angles,
-            hinge_vels,
+        results = [EnvironmentResults(trajectory) for trajectory in trajectories]
+
+        # targets of the first actor of environments with an open loop controller,
+        # which are computed in advance instead of calling the control function for them.
+        # controllers of the same type and number of dofs are stepped together;
+        # every such environment gets the targets of its group and its row in them.
+        open_loop_groups: Dict[Tuple[type, int], List[int]] = {}
+        for env, env_descr in enumerate(env_descrs):
+            if env_descr.controller is not None and env_descr.controller.is_open_loop:
+                open_loop_groups.setdefault(
+                    (
+                        type(env_descr.controller),
+                        len(env_descr.controller.get_dof_targets()),
+                    ),
+                    [],
+                ).append(env)
+        open_loop_targets: List[Optional[Tuple[OpenLoopTargets, int]]] = [None] * len(
+            env_descrs
         )
-
-    @staticmethod
-    def _set_dof_targets(data: mujoco.MjData, targets: List[float]) -> None:
-        if len(targets) == len(data.ctrl):
-            for i, target in enumerate(targets):
-                data.ctrl[i] = target
-        elif len(targets) * 2 != len(data.ctrl):
-            raise RuntimeError(
-                "Number of target dofs doesn't match the number of actuators"
+        for group_envs in open_loop_groups.values():
+            group_targets = OpenLoopTargets(
+                [env_descrs[env].controller for env in group_envs],  # type: ignore # checked above
+                control_step,
+                min(
+                    math.ceil(batch.simulation_time / control_step) + 1,
+                    _MAX_OPEN_LOOP_CHUNK_SIZE,
+                ),
             )
-        else:
-            for i, target in enumerate(targets):
-                data.ctrl[2 * i] = target
-                data.ctrl[2 * i + 1] = 0
+            for row, env in enumerate(group_envs):
+                open_loop_targets[env] = (group_targets, row)
+        # actor states are only needed for the control function and is_healthy
+        need_actor_states = is_healthy is not None or None in open_loop_targets
+        num_controls = 0
+
+        # every environment gets its own reducers, as they keep state
+        env_reducers = [copy.deepcopy(batch.reducers) for _ in env_descrs]
+        for reducers in env_reducers:
+            for reducer in reducers.values():
+                reducer.init()
+
+        def sample(time: float, envs: List[int]) -> None:
+            previous_phase = clock.enter("sampling", 1)
+            position = data.qpos[layout.root_qpos_adr[:, None] + np.arange(3)]
+            if root_offsets is not None:
+                position -= root_offsets
+            orientation = data.qpos[layout.root_qpos_adr[:, None] + np.arange(3, 7)]
+            hinge_angles = data.qpos[hinge_qpos_adr]
+            hinge_vels = data.qvel[hinge_dof_adr]
+            ground_contact_actors = get_ground_contact_actors(data, layout)
+            for env in envs:
+                actor_begin, actor_end = actor_ranges[env]
+                hinge_begin, hinge_end = hinge_ranges[env]
+                trajectories[env].append_state(
+                    time,
+                    position[actor_begin:actor_end],
+                    orientation[actor_begin:actor_end],
+                    hinge_angles[hinge_begin:hinge_end],
+                    hinge_vels[hinge_begin:hinge_end],
+                    ground_contact_actors[env_geoms[env]]
+                    == np.arange(actor_begin, actor_end)[:, None],
+                )
+                if len(env_reducers[env]) > 0:
+                    state = trajectories[env][-1]
+                    for reducer in env_reducers[env].values():
+                        reducer.update(state)
+                if not batch.record_trajectory:
+                    trajectories[env].clear()
+            clock.enter(previous_phase)
+
+        # sample initial state
+        sample(0.0, list(range(len(env_descrs))))
+
+        # indices of the environments that are still running
+        running = list(range(len(env_descrs)))
+
+        def terminate(env: int, time: float, reason: str) -> None:
+            logging.info(
+                f"stopping sim at time {time:0.3f} (step {results[env].steps_completed}) due to {reason}!"
+            )
+            running.remove(env)
+            results[env].termination_time = time
+            results[env].termination_reason = reason
+            sample(time, [env])
+
+        while (time := data.time) < batch.simulation_time:
+            # do control if it is time
+            if time >= last_control_time + control_step:
+                last_control_time = math.floor(time / control_step) * control_step
+
+                clock.enter("termination", 1)
+                for env, end_time, reason in termination_checker.check(data, running):
+                    terminate(env, end_time, reason)
+                clock.enter("control")
+
+                # get actor state so we can read joint angles/velocities
+                if need_actor_states:
+                    actor_states = get_actor_states(
+                        data, layout, root_offsets, actor_geoms=actor_geoms
+                    )
 
-    @staticmethod
-    def _set_initial_hinge_states(
-        data: mujoco.MjData,
-        model: mujoco.MjModel,
-        angles: Optional[List[float]] = None,
-        vels: Optional[List[float]] = None,
-        noise_angles: float = 1e-2,
-        noise_vels: float = 1e-2,
-    ) -> None:
-        """
-        Set initial angles and velocities of joints.
-        Not the control targets but the angles/velocities themselves).
-        If angles and vels aren't provided then they're computed randomly (according to magnitude of noise_angles and noise_vels)
+                for env in list(running):
+                    actor_begin, actor_end = actor_ranges[env]
+
+                    if need_actor_states:
+                        actor_state = actor_states[actor_begin]
+                        logging.debug(f"actor height = {actor_state.position.z:0.3f}")
+                        if is_healthy is not None:
+                            if not is_healthy(actor_state):
+                                # end the simulation of this environment
+                                terminate(env, time, "unhealthy actor")
+                                continue
+
+                    clock.count("control")
+                    env_open_loop_targets = open_loop_targets[env]
+                    if env_open_loop_targets is not None:
+                        group_targets, row = env_open_loop_targets
+                        env_targets = group_targets.get(num_controls)[row]
+                        trajectories[env].append_action(env_targets)
+                        set_actor_targets(
+                            targets, target_ranges[actor_begin], env_targets
+                        )
+                        continue
 
-        Inspired loosely by https://github.com/Farama-Foundation/Gymnasium/blob/a10bcd858ee2175db61889d871d51cfee1ef19a8/gymnasium/envs/mujoco/humanoid_v4.py#L361
-        ^which defaults to uniform random  in [-1e-2, 1e-2]
+                    control = ActorControl()
+                    batch.control(
+                        env_indices[env],
+                        actor_state,
+                        control_step,
+                        control,
+                    )
+                    trajectories[env].append_action(control._dof_targets[0][1])
+                    for actor, actor_targets in control._dof_targets:
+                        set_actor_targets(
+                            targets, target_ranges[actor_begin + actor], actor_targets
+                        )
+
+                num_controls += 1
+                if len(running) == 0:
+                    break
+
+                # set target angles of the joints
+                data.ctrl[ctrl_adr] = targets
+                clock.enter("loop")
+
+            # sample state if it is time
+            if time >= last_sample_time + sample_step:
+                last_sample_time = int(time / sample_step) * sample_step
+                sample(time, running)
+
+            # step simulation
+            video_frame_due = video_path and time >= last_video_time + video_step
+            if self._headless and not video_frame_due:
+                # nothing happens until the next event, so step there in one go
+                # instead of running the checks above for every step
+                next_event_time = min(
+                    last_control_time + control_step,
+                    last_sample_time + sample_step,
+                    last_video_time + video_step if video_path else math.inf,
+                    batch.simulation_time,
+                )
+                nstep = steps_before(time, next_event_time, model.opt.timestep)
+            else:
+                nstep = 1
+            clock.enter("physics", nstep)
+            mujoco.mj_step(model, data, nstep)
+            for env in running:
+                results[env].steps_completed += nstep
+
+            if not self._headless:
+                clock.enter("rendering")
+                if video_path:
+                    # the recorder has its own opengl context
+                    glfw.make_context_current(viewer.window)
+                viewer.render()
+
+            # capture video frame if it's time
+            if video_frame_due:
+                clock.enter("rendering", 1)
+                last_video_time = int(time / video_step) * video_step
+                recorder.capture(model, data)
+
+            clock.enter("loop")
+
+        clock.enter("finalize")
+        if not self._headless:
+            viewer.close()
+        if video_path:
+            # includes waiting for the remaining frames to be encoded
+            recorder.close()
+
+        # sample one final time
+        sample(time, running)
+
+        for env_results, reducers in zip(results, env_reducers):
+            env_results.reduced = {
+                name: reducer.finalize() for name, reducer in reducers.items()
+            }
+            if not batch.record_trajectory:
+                env_results.environment_states = []
+
+        if batch.record_timings:
+            clock.enter("finalize")
+            for env_results in results:
+                env_results.timings = PhaseTimings()
+                env_results.timings.merge(clock.timings, 1.0 / len(results))
+                env_results.timings.simulated_time = (
+                    time
+                    if env_results.termination_time is None
+                    else env_results.termination_time
+                )
+
+        return results
+
+    @staticmethod
+    def _make_rng(
+        batch: Batch, env_descr: Environment, env_index: int
+    ) -> Optional[np.random.Generator]:
         """
-        jnt_hinge_indices = [
-            i
-            for i, val in enumerate(model.jnt_type)
-            if val == mujoco.mjtJoint.mjJNT_HINGE
-        ]
-        num_hinges = len(jnt_hinge_indices)
+        Create the random number generator for the initial state of an environment.
 
-        if angles is None:
-            angles = np.random.uniform(
-                low=-abs(noise_angles), high=abs(noise_angles), size=num_hinges
-            )
-        if vels is None:
-            vels = np.random.uniform(
-                low=-abs(noise_vels), high=abs(noise_vels), size=num_hinges
-            )
+        See the `seed` attribute of `Batch`.
 
-        if len(angles) != len(vels) or num_hinges != len(angles):
-            raise RuntimeError(
-                f"Number of target angles and velcoities doesn't match the number of actuators ({len(angles)} vs {len(vels)} vs {num_hinges})"
+        :param batch: The batch the environment is part of.
+        :param env_descr: The environment.
+        :param env_index: Index of the environment in the batch.
+        :returns: The generator, or None if neither the environment nor the batch has a seed.
+        """
+        if env_descr.seed is not None:
+            return np.random.Generator(np.random.PCG64(env_descr.seed))
+        if batch.seed is not None:
+            return np.random.Generator(
+                np.random.PCG64(np.random.SeedSequence([batch.seed, env_index]))
             )
-
-        # set initial angles and dof (velocities)
-        for i in range(num_hinges):
-            jnt_idx = jnt_hinge_indices[i]
-            data.qpos[model.jnt_qposadr[jnt_idx]] = angles[i]
-            data.qvel[model.jnt_dofadr[jnt_idx]] = angles[i]
+        return None
+
+
+# caches of a worker process of a `LocalRunner`, see `_init_worker`
+_worker_caches: Optional[Tuple[ModelCache, KeyframeCache]] = None
+
+
+def _init_worker(model_cache: ModelCache, keyframe_cache: KeyframeCache) -> None:
+    """
+    Initialize a worker process of a `LocalRunner`.
+
+    :param model_cache: Cache for compiled models in this worker, with the settings of the cache of the runner.
+    :param keyframe_cache: Cache for keyframes in this worker, with the settings of the cache of the runner.
+    """
+    global _worker_caches
+    _worker_caches = (model_cache, keyframe_cache)
+
+
+def _run_environments_in_worker(
+    batch: Batch,
+    env_indices: List[int],
+    is_healthy: Optional[Callable],
+    settle_time: float,
+    collision_policy: str,
+) -> List[EnvironmentResults]:
+    """
+    Simulate the environments of a batch together in a worker process of a `LocalRunner`.
+
+    Compiled models and keyframes stay cached in the worker between tasks.
+
+    :param batch: The batch, containing only the environments to simulate.
+    :param env_indices: Index of each environment in the original batch.
+    :param is_healthy: See `LocalRunner.run_batch`.
+    :param settle_time: See `LocalRunner.__init__`.
+    :param collision_policy: See `LocalRunner.__init__`.
+    :returns: The results of each environment.
+    """
+    assert _worker_caches is not None, "not in a worker process"
+    model_cache, keyframe_cache = _worker_caches
+    return LocalRunner(
+        headless=True,
+        model_cache=model_cache,
+        settle_time=settle_time,
+        keyframe_cache=keyframe_cache,
+        collision_policy=collision_policy,
+    )._run_environments(batch, env_indices, batch.environments, is_healthy)
@@ -0,0 +1,279 @@
+"""Generation of the MJCF xml of environments."""
+
+import xml.etree.ElementTree as xml
+from typing import List, Optional, Tuple
+
+from pyrr import Quaternion
+from revolve2.core.physics.actor.mjcf import to_mjcf as physbot_to_mjcf
+from revolve2.core.physics.running import PHYSICS_PROFILES, Environment, PhysicsProfile
+
+# Part of every model fingerprint.
+# Increase when the generated mjcf changes so stale xml in on-disk model caches is not reused.
+MJCF_FORMAT_VERSION = 3
+
+# Size of the offscreen buffer of every model, which limits the resolution of videos.
+MAX_VIDEO_SIZE = (1920, 1080)
+
+# Ways to filter collisions of actors, see the `collision_policy` parameter of `LocalRunner.__init__`.
+COLLISION_POLICIES = ["full", "nonadjacent", "world", "ground"]
+
+
+def make_mjcf(
+    env_descr: Environment,
+    checkered: bool = True,
+    posed: bool = True,
+    collision_groups: Optional[List[int]] = None,
+    visual: bool = True,
+    collision_policy: str = "full",
+    physics_profile: PhysicsProfile = PHYSICS_PROFILES["accurate"],
+) -> str:
+    """
+    Create the mjcf xml for an environment.
+
+    :param env_descr: The environment.
+    :param checkered: Whether to give the ground a checkered texture.
+    :param posed: If False, actors are placed at the origin instead of at their pose. The pose can then be set using `set_actor_poses`, which allows sharing a compiled model between environments that only differ in pose.
+    :param collision_groups: If given, for every actor the group it is in. Actors only collide with the ground and with actors in the same group. Used to simulate multiple independent environments in one model.
+    :param visual: Whether to add the textures, materials and lights needed for rendering. If False, the model only contains what is needed for physics, which makes it quicker to compile. The physics of the model are the same either way.
+    :param collision_policy: See `LocalRunner.__init__`.
+    :param physics_profile: Timestep, integrator and actuator gains of the model.
+    :returns: The created xml.
+    """
+    collision_bits = _collision_bits(
+        len(env_descr.actors), collision_groups, collision_policy
+    )
+
+    env_mjcf = xml.Element("mujoco", {"model": "environment"})
+
+    xml.SubElement(env_mjcf, "compiler", {"angle": "radian", "autolimits": "true"})
+    xml.SubElement(
+        env_mjcf,
+        "option",
+        {
+            "timestep": str(physics_profile.timestep),
+            "integrator": physics_profile.integrator,
+            "gravity": "0 0 -9.81",
+        },
+    )
+
+    if visual:
+        _add_visual_assets(env_mjcf)
+
+    worldbody = xml.SubElement(env_mjcf, "worldbody")
+    ground = xml.SubElement(
+        worldbody,
+        "geom",
+        {
+            "name": "ground",
+            "type": "plane",
+            "size": "10 10 1",
+            "rgba": "0.2 0.2 0.2 1",
+        },
+    )
+    if visual:
+        if checkered:
+            ground.set("material", "MatPlane")
+        xml.SubElement(
+            worldbody,
+            "light",
+            {
+                "pos": "0 0 100",
+                "ambient": "1.0 1.0 1.0",
+                "directional": "true",
+                "castshadow": "false",
+            },
+        )
+
+    actuator = xml.SubElement(env_mjcf, "actuator")
+    # only added to the model if it is not empty
+    contact = xml.Element("contact")
+
+    for actor_index, posed_actor in enumerate(env_descr.actors):
+        robot, actuators = physbot_to_mjcf(
+            posed_actor.actor,
+            f"robot_{actor_index}",
+            joint_armature=physics_profile.joint_armature,  # note that the armature is related to "inertia"
+            actuator_kp=physics_profile.actuator_kp,  # this is the p value for PID
+            actuator_kv=physics_profile.actuator_kv,  # this is the v value for PID
+            actuator_force_range=4.0,  # limits force of each actuator (preventing jumping)
+        )
+        if posed:
+            robot.set(
+                "pos",
+                f"{posed_actor.position.x} {posed_actor.position.y} {posed_actor.position.z}",
+            )
+            robot.set(
+                "quat",
+                " ".join(str(n) for n in mjcf_quat(posed_actor.orientation)),
+            )
+        if collision_bits is not None:
+            contype, conaffinity = collision_bits[actor_index]
+            for geom in robot.iter("geom"):
+                geom.set("contype", str(contype))
+                geom.set("conaffinity", str(conaffinity))
+        if collision_policy == "nonadjacent":
+            for body1, body2 in _adjacent_body_pairs(robot):
+                xml.SubElement(contact, "exclude", {"body1": body1, "body2": body2})
+        worldbody.append(robot)
+        actuator.extend(actuators)
+
+    if len(contact) > 0:
+        env_mjcf.append(contact)
+
+    return xml.tostring(env_mjcf, encoding="unicode")
+
+
+def _collision_bits(
+    num_actors: int, collision_groups: Optional[List[int]], collision_policy: str
+) -> Optional[List[Tuple[int, int]]]:
+    """
+    Get the contype and conaffinity of the geoms of every actor.
+
+    Two geoms collide if the contype of one and the conaffinity of the other share a bit.
+    Bit 0 is the ground, which has mujoco's default contype and conaffinity of 1.
+
+    :param num_actors: Number of actors in the model.
+    :param collision_groups: See `make_mjcf`.
+    :param collision_policy: See `LocalRunner.__init__`.
+    :returns: The contype and conaffinity of every actor, or None if all geoms keep mujoco's defaults.
+    :raises ValueError: If there are more collision groups or actors than there are collision bits available.
+    """
+    if collision_policy == "ground":
+        # actors only share a bit with the ground
+        return [(2, 1) for _ in range(num_actors)]
+
+    if collision_policy == "world":
+        # every actor has its own bit and collides with the bits of the other actors in its group
+        if num_actors >= 32:
+            raise ValueError(
+                "At most 31 actors are supported with the 'world' collision policy, as contype and conaffinity are 32 bit masks and one bit is used for the ground."
+            )
+        groups = [0] * num_actors if collision_groups is None else collision_groups
+        bits = [1 << (actor + 1) for actor in range(num_actors)]
+        return [
+            (
+                bits[actor],
+                1
+                | sum(
+                    bits[other]
+                    for other in range(num_actors)
+                    if other != actor and groups[other] == groups[actor]
+                ),
+            )
+            for actor in range(num_actors)
+        ]
+
+    if collision_groups is None:
+        return None
+    if max(collision_groups, default=0) >= 31:
+        raise ValueError(
+            "At most 31 collision groups are supported, as contype and conaffinity are 32 bit masks and one bit is used for the ground."
+        )
+    # every group has its own bit
+    return [(1 << (group + 1), (1 << (group + 1)) | 1) for group in collision_groups]
+
+
+def _adjacent_body_pairs(robot: xml.Element) -> List[Tuple[str, str]]:
+    """
+    Get the pairs of bodies of a robot that are attached to the same body, or are two joints apart.
+
+    Collisions between a body and the body it is attached to are already filtered by mujoco.
+
+    :param robot: The root body element of the robot.
+    :returns: The names of the bodies in every pair.
+    """
+    pairs = []
+    for body in robot.iter("body"):
+        children = body.findall("body")
+        for i, child in enumerate(children):
+            for sibling in children[i + 1 :]:
+                pairs.append((child.attrib["name"], sibling.attrib["name"]))
+            for grandchild in child.findall("body"):
+                pairs.append((body.attrib["name"], grandchild.attrib["name"]))
+    return pairs
+
+
+def _add_visual_assets(env_mjcf: xml.Element) -> None:
+    """
+    Add the textures, materials and rendering options used to render an environment.
+
+    :param env_mjcf: The root element of the mjcf to add them to.
+    """
+    visual = xml.SubElement(env_mjcf, "visual")
+    xml.SubElement(visual, "headlight", {"active": "0"})
+    xml.SubElement(
+        visual,
+        "global",
+        {
+            "offwidth": str(MAX_VIDEO_SIZE[0]),
+            "offheight": str(MAX_VIDEO_SIZE[1]),
+        },
+    )
+
+    # textures based on https://github.com/Farama-Foundation/Gymnasium/blob/main/gymnasium/envs/mujoco/assets/hopper.xml
+    asset = xml.SubElement(env_mjcf, "asset")
+    xml.SubElement(
+        asset,
+        "texture",
+        {
+            "type": "skybox",
+            "builtin": "gradient",
+            "rgb1": ".4 .5 .6",
+            "rgb2": "0 0 0",
+            "width": "100",
+            "height": "100",
+        },
+    )
+    xml.SubElement(
+        asset,
+        "texture",
+        {
+            "builtin": "flat",
+            "height": "1278",
+            "mark": "cross",
+            "markrgb": "1 1 1",
+            "name": "texgeom",
+            "random": "0.01",
+            "rgb1": "0.8 0.6 0.4",
+            "rgb2": "0.8 0.6 0.4",
+            "type": "cube",
+            "width": "127",
+        },
+    )
+    xml.SubElement(
+        asset,
+        "texture",
+        {
+            "builtin": "checker",
+            "height": "100",
+            "name": "texplane",
+            "rgb1": "0 0 0",
+            "rgb2": "0.8 0.8 0.8",
+            "type": "2d",
+            "width": "100",
+        },
+    )
+    xml.SubElement(
+        asset,
+        "material",
+        {
+            "name": "MatPlane",
+            "reflectance": "0.0",
+            "shininess": "1",
+            "specular": "1",
+            "texrepeat": "60 60",
+            "texture": "texplane",
+        },
+    )
+    xml.SubElement(
+        asset,
+        "material",
+        {"name": "geom", "texture": "texgeom", "texuniform": "true"},
+    )
+
+
+def mjcf_quat(orientation: Quaternion) -> List[float]:
+    # Note that mujoco expects w first, so this is not the same rotation as `orientation`.
+    # This is how actors have always been posed in this runner and the initial poses
+    # of existing experiments are tuned for it, so it is kept.
+    return [orientation.x, orientation.y, orientation.z, orientation.w]
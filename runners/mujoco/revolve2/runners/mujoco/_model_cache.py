@@ -0,0 +1,186 @@
+"""Cache of compiled Mujoco models."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+import mujoco
+from revolve2.core.physics.actor import Actor
+from revolve2.core.physics.running import Environment
+
+from ._state_layout import StateLayout
+
+
+def environment_fingerprint(env_descr: Environment, *options: object) -> str:
+    """
+    Create a stable fingerprint of the parts of an environment that end up in the compiled model.
+
+    The geometry of all actors is included, as well as any extra options that influence model generation.
+    Poses and dof states are not part of the fingerprint;
+    the runner applies those to the simulation state after compilation so environments that only differ in pose share a model.
+    The fingerprint does not depend on python's hash randomization, so it is the same across processes.
+
+    :param env_descr: The environment to fingerprint.
+    :param options: Extra values that influence the generated model, such as physics options.
+    :returns: Hex digest identifying the environment.
+    """
+    parts: List[str] = [repr(options)]
+    for posed_actor in env_descr.actors:
+        parts.append(_actor_description(posed_actor.actor))
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def _actor_description(actor: Actor) -> str:
+    parts: List[str] = []
+    for body in actor.bodies:
+        parts.append(
+            f"body {body.name} {_floats(body.position)} {_floats(body.orientation)} {body.static_friction!r} {body.dynamic_friction!r}"
+        )
+        for collision in body.collisions:
+            parts.append(
+                f"collision {collision.name} {_floats(collision.position)} {_floats(collision.orientation)} {collision.mass!r} {_floats(collision.bounding_box)}"
+            )
+    for joint in actor.joints:
+        parts.append(
+            f"joint {joint.name} {joint.body1.name} {joint.body2.name} {_floats(joint.position)} {_floats(joint.orientation)} {_floats(joint.axis)} {joint.range!r} {joint.effort!r} {joint.velocity!r}"
+        )
+    return "\n".join(parts)
+
+
+def _floats(values: object) -> str:
+    return " ".join(repr(float(v)) for v in values)  # type: ignore # pyrr types are iterable
+
+
+class ModelCache:
+    """
+    Bounded cache of compiled Mujoco models with least-recently-used eviction.
+
+    Every model is stored together with its `StateLayout`, so the layout is only computed once per model.
+
+    Optionally the generated MJCF xml is also stored on disk,
+    so new processes can skip generating the xml for environments seen before.
+    """
+
+    _max_size: int
+    _cache_dir: Optional[str]
+    _models: OrderedDict[str, Tuple[mujoco.MjModel, StateLayout]]
+    _lock: threading.Lock
+
+    hits: int
+    misses: int
+    disk_hits: int
+
+    _shared: Optional[ModelCache] = None
+
+    def __init__(self, max_size: int = 32, cache_dir: Optional[str] = None) -> None:
+        """
+        Initialize this object.
+
+        :param max_size: Maximum number of compiled models kept in memory. 0 disables in-memory caching.
+        :param cache_dir: Optional directory to store generated MJCF xml in.
+        """
+        assert max_size >= 0
+
+        self._max_size = max_size
+        self._cache_dir = cache_dir
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def shared(cls) -> ModelCache:
+        """
+        Get the cache shared by all runners in this process that were not given their own.
+
+        :returns: The shared cache.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def __reduce__(self) -> Tuple[Callable[..., ModelCache], Tuple[int, Optional[str]]]:
+        """
+        Pickle this cache as an empty cache with the same settings, e.g. to send it to a worker process.
+
+        :returns: The class and its arguments.
+        """
+        return (ModelCache, (self._max_size, self._cache_dir))
+
+    def get(
+        self, key: str, make_xml: Callable[[], str]
+    ) -> Tuple[mujoco.MjModel, StateLayout]:
+        """
+        Get the compiled model for the given key, creating it if it is not cached.
+
+        The returned model and layout are shared by everyone requesting the same key and must not be altered.
+        Safe to call from multiple threads. Threads that miss the same key at the same time each compile the model.
+
+        :param key: Fingerprint of the model. See `environment_fingerprint`.
+        :param make_xml: Function that generates the MJCF xml for the model.
+        :returns: The compiled model and its state layout.
+        """
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        model = mujoco.MjModel.from_xml_string(self._get_xml(key, make_xml))
+        entry = (model, StateLayout.from_model(model))
+
+        if self._max_size > 0:
+            with self._lock:
+                self._models[key] = entry
+                if len(self._models) > self._max_size:
+                    self._models.popitem(last=False)
+
+        return entry
+
+    def _get_xml(self, key: str, make_xml: Callable[[], str]) -> str:
+        if self._cache_dir is None:
+            return make_xml()
+
+        path = os.path.join(self._cache_dir, f"{key}.xml")
+        if os.path.isfile(path):
+            with self._lock:
+                self.disk_hits += 1
+            with open(path, "r") as file:
+                return file.read()
+
+        xml = make_xml()
+        # write to a temporary file first so other processes never read a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".xml.tmp")
+        with os.fdopen(fd, "w") as file:
+            file.write(xml)
+        os.replace(tmp_path, path)
+        logging.debug(f"Stored generated mjcf at '{path}'.")
+        return xml
+
+    def clear(self) -> None:
+        """Remove all models from memory and reset the counters. Files on disk are kept."""
+        with self._lock:
+            self._models.clear()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    def __len__(self) -> int:
+        """
+        Get the number of models currently held in memory.
+
+        :returns: The number of models.
+        """
+        return len(self._models)
@@ -26,6 +26,8 @@ class ModularRobotRerunner:
         simulation_time: int = 1000000,
         get_pose: Union[Callable[[Actor], Tuple[Vector3, Quaternion]], None] = None,
         video_path: str = "",
+        video_size: Tuple[int, int] = (640, 480),
+        video_frame_stride: int = 1,
     ) -> None:
         """
         Rerun a single robot.
@@ -34,6 +36,8 @@ class ModularRobotRerunner:
         :param control_frequency: Control frequency for the simulation. See `Batch` class from physics running.
         :param get_pose: (optional) function returning the initial pose to use for this Actor
         :param save_video_path: optional path to file to save rendered video of simulation to (sim will run headless).
+        :param video_size: Width and height of the video in pixels.
+        :param video_frame_stride: Only render every this many video frames. See `LocalRunner`.
         """
         batch = Batch(
             simulation_time=simulation_time,
@@ -48,7 +52,11 @@ class ModularRobotRerunner:
         batch.environments.append(env)
 
         headless = bool(video_path)
-        runner = LocalRunner(headless=headless)
+        runner = LocalRunner(
+            headless=headless,
+            video_size=video_size,
+            video_frame_stride=video_frame_stride,
+        )
         await runner.run_batch(batch, video_path=video_path)
 
     def _control(
@@ -0,0 +1,61 @@
+"""Dof targets of open loop controllers, computed in advance."""
+
+from typing import List
+
+import numpy as np
+import numpy.typing as npt
+from revolve2.actor_controller import ActorController, ControllerBatch
+
+
+class OpenLoopTargets:
+    """
+    The dof targets of a number of open loop controllers at every control step of a simulation.
+
+    The controllers are stepped together as a `ControllerBatch`, made by `ActorController.make_batch` of the type of the first controller.
+    Targets are computed a chunk of control steps at a time using `ControllerBatch.step_dof_targets`,
+    so long simulations do not need a table for all their control steps at once.
+    The given controllers are not altered; the batch steps copies of them.
+    """
+
+    _batch: ControllerBatch
+    _control_step: float
+    _chunk_size: int
+    _table: npt.NDArray[np.float_]  # [control steps, controllers, dofs]
+    _begin: int  # control index of the first row of the table
+
+    def __init__(
+        self, controllers: List[ActorController], control_step: float, chunk_size: int
+    ) -> None:
+        """
+        Initialize this object.
+
+        :param controllers: The controllers. Must be open loop and have the same number of dofs.
+        :param control_step: Seconds the controllers are stepped at every control step.
+        :param chunk_size: Number of control steps to compute the targets of at once.
+        """
+        assert len(controllers) > 0
+        assert all(controller.is_open_loop for controller in controllers)
+        assert chunk_size >= 1
+
+        self._batch = type(controllers[0]).make_batch(controllers)
+        self._control_step = control_step
+        self._chunk_size = chunk_size
+        self._table = np.empty((0, 0, 0))
+        self._begin = 0
+
+    def get(self, control_index: int) -> npt.NDArray[np.float_]:
+        """
+        Get the targets after the controllers have been stepped for a control step.
+
+        Control steps must be requested in increasing order.
+
+        :param control_index: Index of the control step, starting at 0 for the first.
+        :returns: The targets, one row per controller.
+        """
+        while control_index >= self._begin + len(self._table):
+            self._begin += len(self._table)
+            self._table = self._batch.step_dof_targets(
+                self._control_step, self._chunk_size
+            )
+        targets: npt.NDArray[np.float_] = self._table[control_index - self._begin]
+        return targets
@@ -0,0 +1,55 @@
+"""Attribution of wall time to the phases of a simulation."""
+
+from time import perf_counter
+
+from revolve2.core.physics.running import PhaseTimings
+
+
+class PhaseClock:
+    """
+    Attributes the wall time since it was created to phases, every moment to exactly one phase.
+
+    Entering a phase ends the current one, so a phase that happens in the middle of another,
+    like sampling the state when an environment is terminated, is not counted twice.
+    """
+
+    """The time and counts so far."""
+    timings: PhaseTimings
+
+    _phase: str
+    _start: float
+
+    def __init__(self, phase: str) -> None:
+        """
+        Initialize this object.
+
+        :param phase: The phase the time from now on is attributed to.
+        """
+        self.timings = PhaseTimings()
+        self._phase = phase
+        self._start = perf_counter()
+
+    def enter(self, phase: str, count: int = 0) -> str:
+        """
+        Attribute the time from now on to another phase.
+
+        :param phase: The phase.
+        :param count: Number of times the phase happens, added to its count.
+        :returns: The phase that was current, so it can be entered again when this phase ends.
+        """
+        now = perf_counter()
+        self.timings.add(self._phase, now - self._start, 0)
+        self.timings.add(phase, 0.0, count)
+        previous = self._phase
+        self._phase = phase
+        self._start = now
+        return previous
+
+    def count(self, phase: str, count: int = 1) -> None:
+        """
+        Add to the count of a phase, without changing the current phase.
+
+        :param phase: The phase.
+        :param count: Number to add.
+        """
+        self.timings.add(phase, 0.0, count)
@@ -0,0 +1,464 @@
+"""Creation and manipulation of the simulation state of environments, shared by `LocalRunner` and `VectorEnv`."""
+
+import math
+from typing import List, Optional, Tuple, Union
+
+import mujoco
+import numpy as np
+import numpy.typing as npt
+from pyrr import Quaternion, Vector3
+from revolve2.core.physics.running import (
+    ActorState,
+    Environment,
+    PhysicsProfile,
+    PosedActor,
+)
+
+from ._mjcf import MJCF_FORMAT_VERSION, make_mjcf, mjcf_quat
+from ._model_cache import ModelCache, environment_fingerprint
+from ._phase_clock import PhaseClock
+from ._snapshot import KeyframeCache, Snapshot
+from ._state_layout import StateLayout
+
+
+def get_model(
+    env_descrs: List[Environment],
+    physics_profile: PhysicsProfile,
+    model_cache: ModelCache,
+    collision_policy: str,
+    visual: bool = True,
+    clock: Optional[PhaseClock] = None,
+) -> Tuple[mujoco.MjModel, StateLayout]:
+    """
+    Get the compiled model that simulates the given environments together, compiling it if it is not cached.
+
+    Actors are placed at the origin in the model. Their pose is set using `set_actor_poses`.
+
+    :param env_descrs: The environments.
+    :param physics_profile: See `make_mjcf`.
+    :param model_cache: The cache to get the model from.
+    :param collision_policy: See `LocalRunner.__init__`.
+    :param visual: See `make_mjcf`.
+    :param clock: If given, the time spent generating the xml of the model is attributed to the "mjcf" phase.
+    :returns: The model and its layout.
+    """
+    checkered = True
+    if len(env_descrs) == 1:
+        env_descr = env_descrs[0]
+        collision_groups: Optional[List[int]] = None
+    else:
+        env_descr = Environment()
+        collision_groups = []
+        for group, group_env in enumerate(env_descrs):
+            env_descr.actors.extend(group_env.actors)
+            collision_groups.extend(group for _ in group_env.actors)
+    key = environment_fingerprint(
+        env_descr,
+        MJCF_FORMAT_VERSION,
+        checkered,
+        collision_groups,
+        visual,
+        collision_policy,
+        physics_profile,
+    )
+
+    def make_xml() -> str:
+        if clock is not None:
+            previous_phase = clock.enter("mjcf", 1)
+        xml = make_mjcf(
+            env_descr,
+            checkered=checkered,
+            posed=False,
+            collision_groups=collision_groups,
+            visual=visual,
+            collision_policy=collision_policy,
+            physics_profile=physics_profile,
+        )
+        if clock is not None:
+            clock.enter(previous_phase)
+        return xml
+
+    return model_cache.get(key, make_xml)
+
+
+def get_keyframe(
+    env_descr: Environment,
+    physics_profile: PhysicsProfile,
+    settle_time: float,
+    model_cache: ModelCache,
+    keyframe_cache: KeyframeCache,
+    collision_policy: str,
+    clock: Optional[PhaseClock] = None,
+) -> Tuple[Snapshot, StateLayout]:
+    """
+    Get the settled keyframe of an environment, simulating the settling phase if it is not cached.
+
+    See the `settle_time` parameter of `LocalRunner.__init__`.
+
+    :param env_descr: The environment.
+    :param physics_profile: The physics profile the environment is simulated with.
+    :param settle_time: Seconds to simulate the environment for. Positive.
+    :param model_cache: The cache to get the model of the environment from.
+    :param keyframe_cache: The cache to get the keyframe from.
+    :param collision_policy: See `LocalRunner.__init__`.
+    :param clock: If given, the time spent creating the model and settling is attributed to the "model", "mjcf" and "settle" phases.
+    :returns: The keyframe, taken from the model of the environment on its own, and the layout of that model. The environment is moved horizontally by `keyframe_translation` in the keyframe, so it must be restored using `restore_keyframe` or `restore_actor_states`.
+    """
+    # physics does not depend on visual assets, so the same keyframe is used for visual and headless runs
+    if clock is not None:
+        previous_phase = clock.enter("model", 1)
+    model, layout = get_model(
+        [env_descr],
+        physics_profile,
+        model_cache,
+        collision_policy,
+        visual=False,
+        clock=clock,
+    )
+    if clock is not None:
+        clock.enter(previous_phase)
+    dof_states = [list(posed_actor.dof_states) for posed_actor in env_descr.actors]
+    # settled with the environment moved horizontally to the origin, so environments that only differ in that position share the keyframe
+    translation = keyframe_translation(env_descr)
+    poses = [
+        (
+            [float(p) for p in np.asarray(posed_actor.position) - translation],
+            [float(q) for q in posed_actor.orientation],
+        )
+        for posed_actor in env_descr.actors
+    ]
+
+    def settle() -> Snapshot:
+        if clock is not None:
+            previous_phase = clock.enter("settle", 1)
+        data = mujoco.MjData(model)
+        set_actor_poses(
+            env_descr.actors,
+            data,
+            layout,
+            np.tile(-translation, (len(env_descr.actors), 1)),
+        )
+        ctrl_adr = np.concatenate(layout.target_ctrl_adr)
+        targets = np.zeros(len(ctrl_adr))
+        begin = 0
+        for actor_ctrl_adr, actor_dof_states in zip(layout.target_ctrl_adr, dof_states):
+            end = begin + len(actor_ctrl_adr)
+            set_actor_targets(targets, (begin, end), actor_dof_states)
+            begin = end
+        data.ctrl[ctrl_adr] = targets
+        mujoco.mj_step(model, data, max(1, round(settle_time / model.opt.timestep)))
+        if clock is not None:
+            clock.enter(previous_phase)
+        return Snapshot.capture(data)
+
+    key = environment_fingerprint(
+        env_descr,
+        MJCF_FORMAT_VERSION,
+        "settled",
+        settle_time,
+        dof_states,
+        poses,
+        collision_policy,
+        physics_profile,
+    )
+    return keyframe_cache.get(key, settle), layout
+
+
+def keyframe_translation(env_descr: Environment) -> npt.NDArray[np.float_]:
+    """
+    Get the horizontal translation from the keyframe of an environment to the environment.
+
+    See `get_keyframe`.
+
+    :param env_descr: The environment.
+    :returns: The horizontal position of the first actor of the environment.
+    """
+    if len(env_descr.actors) == 0:
+        return np.zeros(3)
+    position = env_descr.actors[0].position
+    return np.array([position.x, position.y, 0.0])
+
+
+def restore_keyframe(
+    keyframe: Snapshot,
+    env_descr: Environment,
+    data: mujoco.MjData,
+    layout: StateLayout,
+) -> None:
+    """
+    Set the state of an environment simulated on its own to its keyframe.
+
+    :param keyframe: The keyframe, see `get_keyframe`.
+    :param env_descr: The environment.
+    :param data: The simulation state to alter.
+    :param layout: Layout of the model belonging to the data.
+    """
+    keyframe.restore(data)
+    translation = keyframe_translation(env_descr)
+    for qindex in layout.root_qpos_adr:
+        data.qpos[qindex : qindex + 3] += translation
+
+
+def restore_actor_states(
+    keyframe: Snapshot,
+    keyframe_layout: StateLayout,
+    data: mujoco.MjData,
+    layout: StateLayout,
+    actor_begin: int,
+    translation: npt.NDArray[np.float_],
+    root_offsets: Optional[npt.NDArray[np.float_]] = None,
+) -> None:
+    """
+    Set the state of the actors of one environment to a keyframe of that environment simulated on its own.
+
+    Used when the environment is simulated together with others in one model, so the keyframe cannot be restored as a whole.
+
+    :param keyframe: The keyframe, see `get_keyframe`.
+    :param keyframe_layout: Layout of the model the keyframe was taken from.
+    :param data: The simulation state to alter.
+    :param layout: Layout of the model belonging to the data.
+    :param actor_begin: Index in `layout` of the first actor of the environment.
+    :param translation: The `keyframe_translation` of the environment.
+    :param root_offsets: See `set_actor_poses`.
+    """
+    assert len(keyframe.act) == 0, "actuator activations cannot be restored per actor"
+
+    for keyframe_actor in range(keyframe_layout.num_actors):
+        actor = actor_begin + keyframe_actor
+        src = keyframe_layout.root_qpos_adr[keyframe_actor]
+        dst = layout.root_qpos_adr[actor]
+        data.qpos[dst : dst + 7] = keyframe.qpos[src : src + 7]
+        data.qpos[dst : dst + 3] += translation
+        if root_offsets is not None:
+            data.qpos[dst : dst + 3] += root_offsets[actor]
+        src = keyframe_layout.root_dof_adr[keyframe_actor]
+        dst = layout.root_dof_adr[actor]
+        data.qvel[dst : dst + 6] = keyframe.qvel[src : src + 6]
+        data.qpos[layout.hinge_qpos_adr[actor]] = keyframe.qpos[
+            keyframe_layout.hinge_qpos_adr[keyframe_actor]
+        ]
+        data.qvel[layout.hinge_dof_adr[actor]] = keyframe.qvel[
+            keyframe_layout.hinge_dof_adr[keyframe_actor]
+        ]
+
+
+def set_actor_poses(
+    actors: List[PosedActor],
+    data: mujoco.MjData,
+    layout: StateLayout,
+    root_offsets: Optional[npt.NDArray[np.float_]] = None,
+) -> None:
+    """
+    Set the position and orientation of the root of every actor to its pose.
+
+    :param actors: The posed actors, in the order they are in the model.
+    :param data: The simulation state to alter.
+    :param layout: Layout of the model belonging to the data.
+    :param root_offsets: Optional offset added to the position of every actor in the simulation. Subtracted again when reading actor states.
+    """
+    for actor_index, (posed_actor, qindex) in enumerate(
+        zip(actors, layout.root_qpos_adr)
+    ):
+        data.qpos[qindex : qindex + 3] = [
+            posed_actor.position.x,
+            posed_actor.position.y,
+            posed_actor.position.z,
+        ]
+        if root_offsets is not None:
+            data.qpos[qindex : qindex + 3] += root_offsets[actor_index]
+        quat = np.array(mjcf_quat(posed_actor.orientation))
+        data.qpos[qindex + 3 : qindex + 7] = quat / np.linalg.norm(quat)
+
+
+def set_actor_targets(
+    targets: npt.NDArray[np.float_],
+    target_range: Tuple[int, int],
+    actor_targets: Union[List[float], npt.NDArray[np.float_]],
+) -> None:
+    begin, end = target_range
+    if len(actor_targets) != end - begin:
+        raise RuntimeError(
+            "Number of target dofs doesn't match the number of actuators"
+        )
+    targets[begin:end] = actor_targets
+
+
+def set_initial_hinge_states(
+    data: mujoco.MjData,
+    hinge_qpos_adr: npt.NDArray[np.int_],
+    hinge_dof_adr: npt.NDArray[np.int_],
+    angles: Optional[List[float]] = None,
+    vels: Optional[List[float]] = None,
+    noise_angles: float = 1e-2,
+    noise_vels: float = 1e-2,
+    rng: Optional[np.random.Generator] = None,
+) -> None:
+    """
+    Set initial angles and velocities of joints.
+    Not the control targets but the angles/velocities themselves).
+    If angles and vels aren't provided then they're computed randomly (according to magnitude of noise_angles and noise_vels)
+
+    Inspired loosely by https://github.com/Farama-Foundation/Gymnasium/blob/a10bcd858ee2175db61889d871d51cfee1ef19a8/gymnasium/envs/mujoco/humanoid_v4.py#L361
+    ^which defaults to uniform random  in [-1e-2, 1e-2]
+
+    :param data: The simulation state to alter.
+    :param hinge_qpos_adr: qpos addresses of the hinges to set.
+    :param hinge_dof_adr: qvel addresses of the hinges to set.
+    :param angles: Angle of every hinge.
+    :param vels: Velocity of every hinge.
+    :param noise_angles: Magnitude of the random angles used if `angles` is None.
+    :param noise_vels: Magnitude of the random velocities used if `vels` is None.
+    :param rng: Random number generator for the random angles and velocities. If None, numpy's global random state is used.
+    :raises RuntimeError: If the number of angles or velocities doesn't match the number of hinges.
+    """
+    num_hinges = len(hinge_qpos_adr)
+    random = np.random if rng is None else rng
+
+    if angles is None:
+        angles = random.uniform(
+            low=-abs(noise_angles), high=abs(noise_angles), size=num_hinges
+        )
+    if vels is None:
+        vels = random.uniform(
+            low=-abs(noise_vels), high=abs(noise_vels), size=num_hinges
+        )
+
+    if len(angles) != len(vels) or num_hinges != len(angles):
+        raise RuntimeError(
+            f"Number of target angles and velcoities doesn't match the number of actuators ({len(angles)} vs {len(vels)} vs {num_hinges})"
+        )
+
+    # set initial angles and dof (velocities)
+    data.qpos[hinge_qpos_adr] = angles
+    data.qvel[hinge_dof_adr] = angles
+
+
+def perturb_hinge_states(
+    data: mujoco.MjData,
+    hinge_qpos_adr: npt.NDArray[np.int_],
+    hinge_dof_adr: npt.NDArray[np.int_],
+    noise_angles: float = 1e-2,
+    noise_vels: float = 1e-2,
+    rng: Optional[np.random.Generator] = None,
+) -> None:
+    """
+    Add uniform random noise to the angles and velocities of joints, e.g. to vary simulations that start from the same keyframe.
+
+    :param data: The simulation state to alter.
+    :param hinge_qpos_adr: qpos addresses of the hinges to alter.
+    :param hinge_dof_adr: qvel addresses of the hinges to alter.
+    :param noise_angles: Magnitude of the noise added to the angles.
+    :param noise_vels: Magnitude of the noise added to the velocities.
+    :param rng: Random number generator for the noise. If None, numpy's global random state is used.
+    """
+    num_hinges = len(hinge_qpos_adr)
+    random = np.random if rng is None else rng
+    data.qpos[hinge_qpos_adr] += random.uniform(
+        low=-abs(noise_angles), high=abs(noise_angles), size=num_hinges
+    )
+    data.qvel[hinge_dof_adr] += random.uniform(
+        low=-abs(noise_vels), high=abs(noise_vels), size=num_hinges
+    )
+
+
+def steps_before(time: float, event_time: float, timestep: float) -> int:
+    """
+    Get the number of steps that can be taken at once without passing an event.
+
+    This is equal to stepping one at a time and checking after every step whether `event_time` has been reached.
+    Simulation time is accumulated step by step, so it can drift slightly from `time + n * timestep`.
+    The step count is therefore kept one step short of the event, after which single steps are taken until it is reached.
+
+    :param time: The current simulation time.
+    :param event_time: The time at which the next event happens.
+    :param timestep: Simulation timestep.
+    :returns: The number of steps to take. At least 1.
+    """
+    return max(1, math.floor((event_time - time) / timestep) - 1)
+
+
+def get_actor_states(
+    data: mujoco.MjData,
+    layout: StateLayout,
+    root_offsets: Optional[npt.NDArray[np.float_]] = None,
+    ground_contacts: bool = True,
+    actor_geoms: Optional[List[npt.NDArray[np.int_]]] = None,
+) -> List[ActorState]:
+    ground_contact_actors = (
+        get_ground_contact_actors(data, layout) if ground_contacts else None
+    )
+    return [
+        get_actor_state(
+            i,
+            data,
+            layout,
+            None if root_offsets is None else root_offsets[i],
+            ground_contact_actors,
+            None if actor_geoms is None else actor_geoms[i],
+        )
+        for i in range(layout.num_actors)
+    ]
+
+
+def get_ground_contact_actors(
+    data: mujoco.MjData, layout: StateLayout
+) -> npt.NDArray[np.int_]:
+    """
+    Find which geoms are in contact with the ground.
+
+    :param data: The simulation state.
+    :param layout: Layout of the model belonging to the data.
+    :returns: Per geom, the index of the actor it belongs to if it touches the ground, otherwise -1.
+    """
+    # https://mujoco.readthedocs.io/en/latest/overview.html#floating-objects
+    contacts = data.contact
+    geom1 = np.asarray(contacts.geom1)[: data.ncon]
+    geom2 = np.asarray(contacts.geom2)[: data.ncon]
+    groundid = layout.ground_geom_id
+    other = np.concatenate(
+        [geom2[(geom1 == groundid) & (geom2 != groundid)], geom1[geom2 == groundid]]
+    )
+    # geoms that are not part of an actor (e.g. obstacles) map to -1 in the lookup, so they are never attributed to an actor
+    touching = np.full(layout.num_geoms, -1, dtype=np.int_)
+    touching[other] = layout.geom_actor[other]
+    return touching
+
+
+def get_actor_state(
+    robot_index: int,
+    data: mujoco.MjData,
+    layout: StateLayout,
+    root_offset: Optional[npt.NDArray[np.float_]] = None,
+    ground_contact_actors: Optional[npt.NDArray[np.int_]] = None,
+    geoms: Optional[npt.NDArray[np.int_]] = None,
+) -> ActorState:
+    qindex = layout.root_qpos_adr[robot_index]
+
+    # explicitly copy because the Vector3 and Quaternion classes don't copy the underlying structure
+    position = Vector3(data.qpos[qindex : qindex + 3].copy())
+    if root_offset is not None:
+        position -= root_offset
+    orientation = Quaternion(data.qpos[qindex + 3 : qindex + 7].copy())
+
+    # ground contacts are reported for the given geoms only, by default all geoms of the model
+    if geoms is None:
+        geoms = np.arange(layout.num_geoms)
+    groundcontacts = (
+        None
+        if ground_contact_actors is None
+        else ground_contact_actors[geoms] == robot_index
+    )
+
+    # track states of hinge joints
+    #   for reference see mjmodel.h and simulate.cc:makejoint()
+    hinge_angles = data.qpos[layout.hinge_qpos_adr[robot_index]]
+    hinge_vels = data.qvel[layout.hinge_dof_adr[robot_index]]
+
+    return ActorState(
+        position,
+        orientation,
+        groundcontacts,
+        len(geoms),
+        hinge_angles,
+        hinge_vels,
+    )
@@ -0,0 +1,144 @@
+"""Snapshots of the state of a Mujoco simulation and a cache of settled keyframes."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+import mujoco
+import numpy as np
+import numpy.typing as npt
+
+
+@dataclass
+class Snapshot:
+    """
+    The physical state of a simulation, from which it can be continued.
+
+    Contains the same values as `mujoco.mj_getState` with `mjSTATE_PHYSICS` and the time,
+    which are copied directly so this also works with mujoco versions that do not have that function.
+    """
+
+    """Simulation time in seconds."""
+    time: float
+
+    """Copy of `MjData.qpos`."""
+    qpos: npt.NDArray[np.float_]
+
+    """Copy of `MjData.qvel`."""
+    qvel: npt.NDArray[np.float_]
+
+    """Copy of `MjData.act`."""
+    act: npt.NDArray[np.float_]
+
+    @classmethod
+    def capture(cls, data: mujoco.MjData) -> Snapshot:
+        """
+        Take a snapshot of a simulation.
+
+        :param data: The simulation data.
+        :returns: The snapshot.
+        """
+        return cls(
+            time=data.time,
+            qpos=data.qpos.copy(),
+            qvel=data.qvel.copy(),
+            act=data.act.copy(),
+        )
+
+    def restore(self, data: mujoco.MjData) -> None:
+        """
+        Set a simulation to the state in this snapshot.
+
+        The data must belong to the same model as the data this snapshot was taken from.
+        Derived quantities such as contacts are only updated by the next `mj_forward` or `mj_step`.
+
+        :param data: The simulation data to alter.
+        """
+        data.time = self.time
+        data.qpos[:] = self.qpos
+        data.qvel[:] = self.qvel
+        data.act[:] = self.act
+
+
+class KeyframeCache:
+    """
+    Bounded cache of snapshots of settled environments with least-recently-used eviction.
+
+    A keyframe is the state of an environment after its actors have been simulated for a while without control,
+    so they have fallen and settled onto the ground.
+    Simulations that start from a keyframe skip that settling phase.
+    """
+
+    _max_size: int
+    _keyframes: OrderedDict[str, Snapshot]
+    _lock: threading.Lock
+
+    hits: int
+    misses: int
+
+    _shared: Optional[KeyframeCache] = None
+
+    def __init__(self, max_size: int = 32) -> None:
+        """
+        Initialize this object.
+
+        :param max_size: Maximum number of keyframes kept. 0 disables caching.
+        """
+        assert max_size >= 0
+
+        self._max_size = max_size
+        self._keyframes = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls) -> KeyframeCache:
+        """
+        Get the cache shared by all runners in this process that were not given their own.
+
+        :returns: The shared cache.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def __reduce__(self) -> Tuple[Callable[..., KeyframeCache], Tuple[int]]:
+        """
+        Pickle this cache as an empty cache with the same settings, e.g. to send it to a worker process.
+
+        :returns: The class and its arguments.
+        """
+        return (KeyframeCache, (self._max_size,))
+
+    def get(self, key: str, make_keyframe: Callable[[], Snapshot]) -> Snapshot:
+        """
+        Get the keyframe for the given key, creating it if it is not cached.
+
+        The returned keyframe is shared by everyone requesting the same key and must not be altered.
+        Safe to call from multiple threads. Threads that miss the same key at the same time each create the keyframe.
+
+        :param key: Fingerprint of the environment and the way it was settled.
+        :param make_keyframe: Function that simulates the settling phase and returns the resulting state.
+        :returns: The keyframe.
+        """
+        with self._lock:
+            keyframe = self._keyframes.get(key)
+            if keyframe is not None:
+                self._keyframes.move_to_end(key)
+                self.hits += 1
+                return keyframe
+            self.misses += 1
+
+        keyframe = make_keyframe()
+
+        if self._max_size > 0:
+            with self._lock:
+                self._keyframes[key] = keyframe
+                if len(self._keyframes) > self._max_size:
+                    self._keyframes.popitem(last=False)
+
+        return keyframe
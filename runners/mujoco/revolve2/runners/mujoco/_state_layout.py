@@ -0,0 +1,143 @@
+"""Precomputed indices into the state of a compiled Mujoco model."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import mujoco
+import numpy as np
+import numpy.typing as npt
+
+
+@dataclass
+class StateLayout:
+    """
+    Where the state of every actor can be found in the `MjData` of a compiled model.
+
+    Built once per model, so reading actor states only consists of numpy gathers.
+    Actors are the bodies attached to the world with a free joint, in the order they appear in the model.
+    """
+
+    """Index of the ground geom."""
+    ground_geom_id: int
+
+    """Total number of geoms in the model."""
+    num_geoms: int
+
+    """Per actor, address of its free joint in qpos. Position is at [adr, adr+3), orientation at [adr+3, adr+7)."""
+    root_qpos_adr: npt.NDArray[np.int_]
+
+    """Per actor, address of its free joint in qvel. Linear velocity is at [adr, adr+3), angular velocity at [adr+3, adr+6)."""
+    root_dof_adr: npt.NDArray[np.int_]
+
+    """Per actor, qpos addresses of its hinge joints."""
+    hinge_qpos_adr: List[npt.NDArray[np.int_]]
+
+    """Per actor, qvel (dof) addresses of its hinge joints."""
+    hinge_dof_adr: List[npt.NDArray[np.int_]]
+
+    """
+    Per actor, ctrl addresses of the actuators that take its dof targets.
+
+    These are the position actuators of its joints, in the order of the actuators in the model,
+    which is the order of the joints of the actor.
+    """
+    target_ctrl_adr: List[npt.NDArray[np.int_]]
+
+    """Per actor, range [begin, end) of the ids of its geoms."""
+    geom_ranges: List[Tuple[int, int]]
+
+    """Per geom, index of the actor it belongs to, or -1 if it is not part of an actor."""
+    geom_actor: npt.NDArray[np.int_]
+
+    @classmethod
+    def from_model(cls, model: mujoco.MjModel) -> StateLayout:
+        """
+        Create the layout for a model.
+
+        :param model: The compiled model.
+        :returns: The created layout.
+        """
+        ground_geom_id = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_GEOM, "ground")
+        assert ground_geom_id >= 0
+
+        root_bodies = [
+            body
+            for body in range(1, model.nbody)
+            if model.body_parentid[body] == 0
+            and model.body_jntnum[body] > 0
+            and model.jnt_type[model.body_jntadr[body]] == mujoco.mjtJoint.mjJNT_FREE
+        ]
+
+        hinges = np.flatnonzero(model.jnt_type == mujoco.mjtJoint.mjJNT_HINGE)
+        hinge_roots = model.body_rootid[model.jnt_bodyid[hinges]]
+        geom_roots = model.body_rootid[model.geom_bodyid]
+
+        # position actuators are the ones with a position dependent bias, i.e. -kp * qpos
+        target_actuators = np.flatnonzero(
+            (model.actuator_trntype == mujoco.mjtTrn.mjTRN_JOINT)
+            & (model.actuator_biasprm[:, 1] != 0.0)
+        )
+        target_actuator_roots = model.body_rootid[
+            model.jnt_bodyid[model.actuator_trnid[target_actuators, 0]]
+        ]
+
+        geom_actor = np.full(model.ngeom, -1, dtype=np.int_)
+        geom_ranges = []
+        for actor_index, root in enumerate(root_bodies):
+            # bodies are numbered depth first and geoms per body, so the geoms of an actor are consecutive
+            geoms = np.flatnonzero(geom_roots == root)
+            geom_actor[geoms] = actor_index
+            geom_ranges.append(
+                (int(geoms[0]), int(geoms[-1]) + 1) if len(geoms) > 0 else (0, 0)
+            )
+
+        return cls(
+            ground_geom_id=ground_geom_id,
+            num_geoms=model.ngeom,
+            root_qpos_adr=np.array(
+                [model.jnt_qposadr[model.body_jntadr[root]] for root in root_bodies],
+                dtype=np.int_,
+            ),
+            root_dof_adr=np.array(
+                [model.jnt_dofadr[model.body_jntadr[root]] for root in root_bodies],
+                dtype=np.int_,
+            ),
+            hinge_qpos_adr=[
+                model.jnt_qposadr[hinges[hinge_roots == root]] for root in root_bodies
+            ],
+            hinge_dof_adr=[
+                model.jnt_dofadr[hinges[hinge_roots == root]] for root in root_bodies
+            ],
+            target_ctrl_adr=[
+                target_actuators[target_actuator_roots == root] for root in root_bodies
+            ],
+            geom_ranges=geom_ranges,
+            geom_actor=geom_actor,
+        )
+
+    def env_geoms(self, actor_begin: int, actor_end: int) -> npt.NDArray[np.int_]:
+        """
+        Get the ids of the geoms an environment would have in a model of its own.
+
+        These are the geoms that are not part of an actor, like the ground, and the geoms of the actors of the environment, in the order of the model.
+        When environments are packed into one model, this excludes the geoms of the other environments.
+
+        :param actor_begin: Index of the first actor of the environment.
+        :param actor_end: Index after the last actor of the environment.
+        :returns: The geom ids.
+        """
+        return np.flatnonzero(
+            (self.geom_actor == -1)
+            | ((self.geom_actor >= actor_begin) & (self.geom_actor < actor_end))
+        )
+
+    @property
+    def num_actors(self) -> int:
+        """
+        Get the number of actors in the model.
+
+        :returns: The number of actors.
+        """
+        return len(self.root_qpos_adr)
@@ -0,0 +1,173 @@
+"""Evaluation of termination conditions on the raw state of a Mujoco simulation."""
+
+import math
+import time
+from typing import List, Optional, Tuple
+
+import mujoco
+import numpy as np
+import numpy.typing as npt
+from revolve2.core.physics.running import Termination
+
+from ._state_layout import StateLayout
+
+
+class TerminationChecker:
+    """
+    Checks the termination conditions of the environments simulated in a single model.
+
+    All conditions are precomputed into arrays with a value per actor or environment,
+    so checking only consists of a few numpy operations on `qpos`.
+    Conditions that are not set are given values that never hold.
+    """
+
+    """Whether any environment has a termination. If not, `check` never terminates an environment."""
+    active: bool
+
+    _layout: StateLayout
+    _root_offsets: Optional[npt.NDArray[np.float_]]
+    _actor_env: npt.NDArray[np.int_]  # [A]
+    _num_envs: int
+
+    _min_height: npt.NDArray[np.float_]  # [A]
+    _max_height: npt.NDArray[np.float_]  # [A]
+    _min_up: npt.NDArray[np.float_]  # [A], cosine of the maximum tilt
+    _up: npt.NDArray[
+        np.float_
+    ]  # [A, 3], initial up direction in the frame of the actor
+
+    _stagnation_window: npt.NDArray[np.float_]  # [E]
+    _stagnation_distance: npt.NDArray[np.float_]  # [A]
+    _window_begin: npt.NDArray[np.float_]  # [E]
+    _window_begin_xy: npt.NDArray[np.float_]  # [A, 2]
+
+    _deadline: npt.NDArray[np.float_]  # [E], in `time.perf_counter` time
+
+    def __init__(
+        self,
+        terminations: List[Optional[Termination]],
+        actor_ranges: List[Tuple[int, int]],
+        layout: StateLayout,
+        data: mujoco.MjData,
+        root_offsets: Optional[npt.NDArray[np.float_]] = None,
+    ) -> None:
+        """
+        Initialize this object.
+
+        Must be created after the actors have been posed, as the initial state of the actors is taken from `data`.
+
+        :param terminations: Termination of every environment, or None if it is never terminated early.
+        :param actor_ranges: Range [begin, end) of the indices of the actors of every environment.
+        :param layout: Layout of the model.
+        :param data: The simulation data.
+        :param root_offsets: Offset of every actor that is subtracted from its position, as in `get_actor_states`.
+        """
+        start = time.perf_counter()
+
+        self._layout = layout
+        self._root_offsets = root_offsets
+        self._num_envs = len(terminations)
+        self._actor_env = np.zeros(layout.num_actors, dtype=np.int_)
+        for env, (actor_begin, actor_end) in enumerate(actor_ranges):
+            self._actor_env[actor_begin:actor_end] = env
+
+        self.active = any(termination is not None for termination in terminations)
+
+        def per_env(name: str, unset: float) -> npt.NDArray[np.float_]:
+            values = [
+                unset
+                if termination is None or getattr(termination, name) is None
+                else getattr(termination, name)
+                for termination in terminations
+            ]
+            return np.array(values, dtype=np.float_)
+
+        self._min_height = per_env("min_height", -math.inf)[self._actor_env]
+        self._max_height = per_env("max_height", math.inf)[self._actor_env]
+        max_tilt = per_env("max_tilt", math.inf)
+        self._min_up = np.where(
+            max_tilt >= math.pi, -math.inf, np.cos(np.minimum(max_tilt, math.pi))
+        )[self._actor_env]
+        self._stagnation_window = per_env("stagnation_window", math.inf)
+        self._stagnation_distance = per_env("stagnation_distance", 0.0)[self._actor_env]
+        self._deadline = start + per_env("max_wall_time", math.inf)
+
+        position, orientation = self._root_state(data)
+        # the up direction of the world, expressed in the initial frame of every actor
+        self._up = _rotate(
+            orientation * np.array([1.0, -1.0, -1.0, -1.0]),
+            np.tile([0.0, 0.0, 1.0], (layout.num_actors, 1)),
+        )
+        self._window_begin = np.zeros(self._num_envs)
+        self._window_begin_xy = position[:, :2].copy()
+
+    def check(
+        self, data: mujoco.MjData, envs: List[int]
+    ) -> List[Tuple[int, float, str]]:
+        """
+        Check which environments must be terminated.
+
+        :param data: The simulation data.
+        :param envs: The environments to check.
+        :returns: Every environment that must be terminated, with the current simulation time and the name of the condition that holds.
+        """
+        if not self.active or len(envs) == 0:
+            return []
+
+        sim_time = data.time
+        position, orientation = self._root_state(data)
+        height = position[:, 2]
+
+        conditions = [
+            ("min_height", self._per_env(height < self._min_height)),
+            ("max_height", self._per_env(height > self._max_height)),
+            (
+                "max_tilt",
+                self._per_env(_rotate(orientation, self._up)[:, 2] < self._min_up),
+            ),
+        ]
+
+        window_ended = sim_time - self._window_begin >= self._stagnation_window
+        if np.any(window_ended):
+            moved = np.linalg.norm(position[:, :2] - self._window_begin_xy, axis=1)
+            stagnated = self._per_env(moved < self._stagnation_distance) & window_ended
+            conditions.append(("stagnation", stagnated))
+            self._window_begin[window_ended] = sim_time
+            actors = window_ended[self._actor_env]
+            self._window_begin_xy[actors] = position[actors, :2]
+
+        conditions.append(("max_wall_time", time.perf_counter() > self._deadline))
+
+        terminated = []
+        for env in envs:
+            for name, holds in conditions:
+                if holds[env]:
+                    terminated.append((env, sim_time, name))
+                    break
+        return terminated
+
+    def _root_state(
+        self, data: mujoco.MjData
+    ) -> Tuple[npt.NDArray[np.float_], npt.NDArray[np.float_]]:
+        position = data.qpos[self._layout.root_qpos_adr[:, None] + np.arange(3)]
+        if self._root_offsets is not None:
+            position -= self._root_offsets
+        orientation = data.qpos[self._layout.root_qpos_adr[:, None] + np.arange(3, 7)]
+        return position, orientation
+
+    def _per_env(self, actor_holds: npt.NDArray[np.bool_]) -> npt.NDArray[np.bool_]:
+        # an environment is terminated if the condition holds for any of its actors
+        return (
+            np.bincount(self._actor_env, weights=actor_holds, minlength=self._num_envs)
+            > 0
+        )
+
+
+def _rotate(
+    quaternion: npt.NDArray[np.float_], vector: npt.NDArray[np.float_]
+) -> npt.NDArray[np.float_]:
+    # rotate every vector by the matching quaternion in mujoco's (w, x, y, z) order
+    w = quaternion[:, :1]
+    xyz = quaternion[:, 1:]
+    t = 2.0 * np.cross(xyz, vector)
+    return vector + w * t + np.cross(xyz, t)
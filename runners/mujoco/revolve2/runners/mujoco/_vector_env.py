@@ -0,0 +1,364 @@
+"""Environments that are reset and stepped by the caller, one control step at a time."""
+
+import math
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import mujoco
+import numpy as np
+import numpy.typing as npt
+from revolve2.core.physics.running import (
+    PHYSICS_PROFILES,
+    ActorState,
+    Environment,
+    PhysicsProfile,
+    Termination,
+)
+
+from ._mjcf import COLLISION_POLICIES
+from ._model_cache import ModelCache
+from ._simulation import (
+    get_actor_state,
+    get_ground_contact_actors,
+    get_keyframe,
+    get_model,
+    perturb_hinge_states,
+    restore_keyframe,
+    set_actor_poses,
+    set_initial_hinge_states,
+    steps_before,
+)
+from ._snapshot import KeyframeCache, Snapshot
+from ._state_layout import StateLayout
+from ._termination_checker import TerminationChecker
+
+
+class VectorEnv:
+    """
+    A fixed set of environments that the caller resets and steps one control step at a time, like a vectorized gym environment.
+
+    `LocalRunner` simulates a batch from start to end and calls a control function in between,
+    which does not suit optimizers that drive every step themselves, like the rollouts of reinforcement learning.
+    The models of the environments are compiled once, when this object is created, and their simulation data is reused by every `reset`,
+    so any number of rollouts only pays for model construction once.
+
+    Every environment is simulated as `LocalRunner` simulates it on its own: with the same model, initial state, control step and termination.
+    All environments must have the same number of actors and dofs, so their observations and actions can be stacked.
+
+    The observation of an environment is a flat array with, for every actor, the position (3) and orientation (4) of its root,
+    followed by the angles and then the velocities of the hinges of all actors.
+    For a single actor this is [x, y, z, orientation, hinge angles, hinge velocities],
+    the same values and order as an `ActorState` flattened.
+    The action of an environment is the dof targets of all its actors, actor after actor.
+    """
+
+    """
+    Simulation time in seconds that every call to `step` advances the environments.
+
+    As in the runner, control happens at the first simulation step at or after every multiple of the control step,
+    so the number of simulation steps per call can differ by one.
+    """
+    control_step: float
+
+    """Size of the observation of every environment."""
+    observation_size: int
+
+    """Size of the action of every environment."""
+    action_size: int
+
+    """
+    Per environment, why it is done, or None if it is still running.
+
+    One of the conditions of `Termination`, "unhealthy actor" or "simulation time".
+    """
+    termination_reasons: List[Optional[str]]
+
+    _env_descrs: List[Environment]
+    _terminations: List[Optional[Termination]]
+    _simulation_time: Optional[float]
+    _is_healthy: Optional[Callable[[ActorState], bool]]
+    _last_control_time: npt.NDArray[np.float_]  # [N]
+
+    _models: List[mujoco.MjModel]
+    _layouts: List[StateLayout]
+    _datas: List[mujoco.MjData]
+    _ctrl_adr: List[npt.NDArray[np.int_]]
+    _hinge_qpos_adr: List[npt.NDArray[np.int_]]
+    _hinge_dof_adr: List[npt.NDArray[np.int_]]
+    _keyframes: List[Optional[Snapshot]]
+    _termination_checkers: List[TerminationChecker]
+    _done: npt.NDArray[np.bool_]  # [N]
+
+    def __init__(
+        self,
+        env_descrs: List[Environment],
+        control_frequency: float,
+        simulation_time: Optional[float] = None,
+        termination: Optional[Termination] = None,
+        is_healthy: Optional[Callable[[ActorState], bool]] = None,
+        physics_profile: PhysicsProfile = PHYSICS_PROFILES["accurate"],
+        settle_time: float = 0.0,
+        collision_policy: str = "full",
+        model_cache: Optional[ModelCache] = None,
+        keyframe_cache: Optional[KeyframeCache] = None,
+    ) -> None:
+        """
+        Initialize this object.
+
+        The environments must still be reset before they are stepped.
+
+        :param env_descrs: The environments.
+        :param control_frequency: Control frequency, as the attribute of `Batch`. The environments advance the same control step per `step` as a `LocalRunner` with this frequency.
+        :param simulation_time: If given, environments are done once this many seconds have been simulated.
+        :param termination: Termination of every environment that does not have its own. See the attribute of `Batch`.
+        :param is_healthy: If given, an environment is done once this function returns False for the state of its first actor. See `LocalRunner.run_batch`.
+        :param physics_profile: See the attribute of `Batch`.
+        :param settle_time: See `LocalRunner.__init__`.
+        :param collision_policy: See `LocalRunner.__init__`.
+        :param model_cache: See `LocalRunner.__init__`.
+        :param keyframe_cache: See `LocalRunner.__init__`.
+        :raises ValueError: If the environments do not all have the same number of actors, hinges and dof targets, or if the collision policy is unknown.
+        """
+        assert len(env_descrs) > 0
+        assert control_frequency > 0.0
+        assert settle_time >= 0.0
+        if collision_policy not in COLLISION_POLICIES:
+            raise ValueError(
+                f"Unknown collision policy '{collision_policy}'. Choose from {COLLISION_POLICIES}."
+            )
+        if model_cache is None:
+            model_cache = ModelCache.shared()
+        if keyframe_cache is None:
+            keyframe_cache = KeyframeCache.shared()
+
+        self._env_descrs = env_descrs
+        self._terminations = [
+            termination if env_descr.termination is None else env_descr.termination
+            for env_descr in env_descrs
+        ]
+        self._simulation_time = simulation_time
+        self._is_healthy = is_healthy
+
+        self._models = []
+        self._layouts = []
+        self._keyframes = []
+        # models, keyframes and the initial state are all created the same way as by the runner
+        for env_descr in env_descrs:
+            model, layout = get_model(
+                [env_descr],
+                physics_profile,
+                model_cache,
+                collision_policy,
+                visual=False,
+            )
+            self._models.append(model)
+            self._layouts.append(layout)
+            self._keyframes.append(
+                get_keyframe(
+                    env_descr,
+                    physics_profile,
+                    settle_time,
+                    model_cache,
+                    keyframe_cache,
+                    collision_policy,
+                )[0]
+                if settle_time > 0.0
+                else None
+            )
+        self._datas = [mujoco.MjData(model) for model in self._models]
+        # addresses of all actors of every environment, actor after actor
+        self._ctrl_adr = [
+            np.concatenate(layout.target_ctrl_adr) for layout in self._layouts
+        ]
+        self._hinge_qpos_adr = [
+            np.concatenate(layout.hinge_qpos_adr) for layout in self._layouts
+        ]
+        self._hinge_dof_adr = [
+            np.concatenate(layout.hinge_dof_adr) for layout in self._layouts
+        ]
+
+        shapes = {
+            (
+                layout.num_actors,
+                sum(len(actor_hinges) for actor_hinges in layout.hinge_qpos_adr),
+                sum(len(actor_ctrl_adr) for actor_ctrl_adr in layout.target_ctrl_adr),
+            )
+            for layout in self._layouts
+        }
+        if len(shapes) != 1:
+            raise ValueError(
+                "All environments must have the same number of actors, hinges and dof targets."
+            )
+        ((num_actors, num_hinges, num_targets),) = shapes
+        self.observation_size = num_actors * 7 + num_hinges * 2
+        self.action_size = num_targets
+
+        # the same control step as the runner
+        self.control_step = 1 / control_frequency * 2
+        self._last_control_time = np.zeros(len(env_descrs))
+
+        self._termination_checkers = []
+        self.termination_reasons = [None] * len(env_descrs)
+        self._done = np.ones(len(env_descrs), dtype=np.bool_)
+
+    @property
+    def num_envs(self) -> int:
+        """
+        Get the number of environments.
+
+        :returns: The number of environments.
+        """
+        return len(self._env_descrs)
+
+    @property
+    def time(self) -> npt.NDArray[np.float_]:
+        """
+        Get the simulation time of every environment.
+
+        :returns: The time in seconds of every environment.
+        """
+        return np.array([data.time for data in self._datas])
+
+    def reset(
+        self, seeds: Optional[Sequence[Optional[int]]] = None
+    ) -> npt.NDArray[np.float_]:
+        """
+        Put every environment back in its initial state.
+
+        The initial state is the pose of the actors, or the keyframe if there is a settle time,
+        with the same random hinge noise the runner adds, and the initial dof targets of the actors.
+
+        :param seeds: Per environment, seed for the hinge noise, as the `seed` attribute of `Environment`. If None, or None for an environment, the seed of the environment is used, and without that numpy's global random state.
+        :returns: The observations, one row per environment.
+        """
+        assert seeds is None or len(seeds) == self.num_envs
+
+        self._termination_checkers = []
+        for env, (env_descr, model, layout, data, keyframe) in enumerate(
+            zip(
+                self._env_descrs,
+                self._models,
+                self._layouts,
+                self._datas,
+                self._keyframes,
+            )
+        ):
+            mujoco.mj_resetData(model, data)
+
+            seed = env_descr.seed if seeds is None or seeds[env] is None else seeds[env]
+            rng = None if seed is None else np.random.Generator(np.random.PCG64(seed))
+
+            hinge_qpos_adr = self._hinge_qpos_adr[env]
+            hinge_dof_adr = self._hinge_dof_adr[env]
+            if keyframe is not None:
+                restore_keyframe(keyframe, env_descr, data, layout)
+                data.time = 0.0
+                perturb_hinge_states(
+                    data,
+                    hinge_qpos_adr,
+                    hinge_dof_adr,
+                    noise_angles=0.02,
+                    noise_vels=0.02,
+                    rng=rng,
+                )
+                mujoco.mj_forward(model, data)
+            else:
+                set_actor_poses(env_descr.actors, data, layout)
+                set_initial_hinge_states(
+                    data,
+                    hinge_qpos_adr,
+                    hinge_dof_adr,
+                    noise_angles=0.02,
+                    noise_vels=0.02,
+                    rng=rng,
+                )
+
+            data.ctrl[self._ctrl_adr[env]] = np.concatenate(
+                [list(posed_actor.dof_states) for posed_actor in env_descr.actors]
+            )
+
+            self._termination_checkers.append(
+                TerminationChecker(
+                    [self._terminations[env]],
+                    [(0, layout.num_actors)],
+                    layout,
+                    data,
+                )
+            )
+
+        self.termination_reasons = [None] * self.num_envs
+        self._done[:] = False
+        self._last_control_time[:] = 0.0
+        return self._observe()
+
+    def step(
+        self, actions: npt.NDArray[np.float_]
+    ) -> Tuple[npt.NDArray[np.float_], npt.NDArray[np.bool_]]:
+        """
+        Set the dof targets of every environment that is not done and simulate one control step.
+
+        Environments that are done are not simulated until they are reset, and their actions are ignored.
+
+        :param actions: The dof targets, one row per environment.
+        :returns: The observations, one row per environment, and per environment whether it is done.
+        :raises ValueError: If the actions do not have one row of `action_size` per environment.
+        """
+        actions = np.asarray(actions, dtype=np.float_)
+        if actions.shape != (self.num_envs, self.action_size):
+            raise ValueError(
+                f"Expected actions of shape {(self.num_envs, self.action_size)}, got {actions.shape}."
+            )
+
+        for env in np.flatnonzero(~self._done):
+            model = self._models[env]
+            layout = self._layouts[env]
+            data = self._datas[env]
+
+            data.ctrl[self._ctrl_adr[env]] = actions[env]
+            end_time = self._last_control_time[env] + self.control_step
+            if self._simulation_time is not None:
+                end_time = min(end_time, self._simulation_time)
+            while data.time < end_time:
+                mujoco.mj_step(
+                    model,
+                    data,
+                    steps_before(data.time, end_time, model.opt.timestep),
+                )
+            self._last_control_time[env] = (
+                math.floor(data.time / self.control_step) * self.control_step
+            )
+
+            terminated = self._termination_checkers[env].check(data, [0])
+            if len(terminated) > 0:
+                self._finish(env, terminated[0][2])
+            elif self._is_healthy is not None and not self._is_healthy(
+                get_actor_state(
+                    0,
+                    data,
+                    layout,
+                    ground_contact_actors=get_ground_contact_actors(data, layout),
+                )
+            ):
+                self._finish(env, "unhealthy actor")
+            elif (
+                self._simulation_time is not None and data.time >= self._simulation_time
+            ):
+                self._finish(env, "simulation time")
+
+        return self._observe(), self._done.copy()
+
+    def _finish(self, env: int, reason: str) -> None:
+        self._done[env] = True
+        self.termination_reasons[env] = reason
+
+    def _observe(self) -> npt.NDArray[np.float_]:
+        observations = np.empty((self.num_envs, self.observation_size))
+        for env, (layout, data) in enumerate(zip(self._layouts, self._datas)):
+            root_qpos = data.qpos[layout.root_qpos_adr[:, None] + np.arange(7)]
+            observations[env] = np.concatenate(
+                [
+                    root_qpos.ravel(),
+                    data.qpos[self._hinge_qpos_adr[env]],
+                    data.qvel[self._hinge_dof_adr[env]],
+                ]
+            )
+        return observations
@@ -0,0 +1,155 @@
+"""Offscreen rendering of a Mujoco simulation to a video file."""
+
+import queue
+import threading
+from typing import Optional
+
+import cv2
+import mujoco
+import numpy as np
+import numpy.typing as npt
+
+
+class VideoRecorder:
+    """
+    Renders frames of a simulation offscreen and encodes them into a video file on a background thread.
+
+    Frames are rendered into a fixed set of preallocated buffers, which are handed to the encoder thread through a bounded queue.
+    Rendering only blocks when the encoder falls behind by more than the size of the queue,
+    so encoding overlaps with simulating instead of interrupting it for every frame.
+    """
+
+    _gl_context: mujoco.GLContext
+    _render_context: mujoco.MjrContext
+    _scene: mujoco.MjvScene
+    _camera: mujoco.MjvCamera
+    _option: mujoco.MjvOption
+    _viewport: mujoco.MjrRect
+
+    _free_frames: "queue.Queue[npt.NDArray[np.uint8]]"
+    _frames: "queue.Queue[Optional[npt.NDArray[np.uint8]]]"
+    _writer: cv2.VideoWriter
+    _encoder: threading.Thread
+    _error: Optional[Exception]  # that stopped the encoder thread
+
+    def __init__(
+        self,
+        model: mujoco.MjModel,
+        path: str,
+        fps: float,
+        width: int = 640,
+        height: int = 480,
+        queue_size: int = 16,
+    ) -> None:
+        """
+        Initialize this object.
+
+        Creates an OpenGL context, which is made current on the calling thread.
+
+        :param model: Model of the simulation to record.
+        :param path: File to write the video to, in webm format.
+        :param fps: Frame rate the video is played back at.
+        :param width: Width of the video in pixels. At most the offscreen buffer width of the model.
+        :param height: Height of the video in pixels. At most the offscreen buffer height of the model.
+        :param queue_size: Maximum number of rendered frames waiting to be encoded.
+        :raises ValueError: If the video is larger than the offscreen buffer of the model.
+        :raises RuntimeError: If the video file cannot be opened for writing.
+        """
+        assert queue_size >= 1
+
+        if width > model.vis.global_.offwidth or height > model.vis.global_.offheight:
+            raise ValueError(
+                f"Video size {width}x{height} exceeds the offscreen buffer of the model ({model.vis.global_.offwidth}x{model.vis.global_.offheight})."
+            )
+
+        self._writer = cv2.VideoWriter(
+            path, cv2.VideoWriter_fourcc(*"VP80"), fps, (width, height)
+        )
+        if not self._writer.isOpened():
+            raise RuntimeError(f"Could not open video file '{path}' for writing.")
+
+        self._gl_context = mujoco.GLContext(width, height)
+        self._gl_context.make_current()
+        self._render_context = mujoco.MjrContext(
+            model, mujoco.mjtFontScale.mjFONTSCALE_150.value
+        )
+        mujoco.mjr_setBuffer(
+            mujoco.mjtFramebuffer.mjFB_OFFSCREEN.value, self._render_context
+        )
+        self._scene = mujoco.MjvScene(model, maxgeom=10000)
+        self._camera = mujoco.MjvCamera()
+        self._option = mujoco.MjvOption()
+        self._viewport = mujoco.MjrRect(0, 0, width, height)
+
+        # one more buffer than fits in the queue, so a frame can be rendered while the queue is full
+        self._free_frames = queue.Queue()
+        for _ in range(queue_size + 1):
+            self._free_frames.put(np.empty((height, width, 3), dtype=np.uint8))
+        self._frames = queue.Queue(maxsize=queue_size)
+
+        self._error = None
+        self._encoder = threading.Thread(target=self._encode, daemon=True)
+        self._encoder.start()
+
+    def capture(self, model: mujoco.MjModel, data: mujoco.MjData) -> None:
+        """
+        Render the current state of the simulation and queue it for encoding.
+
+        :param model: The model passed to `__init__`.
+        :param data: The simulation data.
+        :raises RuntimeError: If encoding a previous frame failed.
+        """
+        self._raise_error()
+        frame = self._free_frames.get()
+        self._gl_context.make_current()
+        mujoco.mjv_updateScene(
+            model,
+            data,
+            self._option,
+            None,
+            self._camera,
+            mujoco.mjtCatBit.mjCAT_ALL.value,
+            self._scene,
+        )
+        mujoco.mjr_render(self._viewport, self._scene, self._render_context)
+        mujoco.mjr_readPixels(
+            rgb=frame, depth=None, viewport=self._viewport, con=self._render_context
+        )
+        self._frames.put(frame)
+
+    def close(self) -> None:
+        """
+        Encode the remaining frames, finish the video file and free the rendering resources.
+
+        :raises RuntimeError: If encoding a frame failed. The resources are freed nonetheless.
+        """
+        self._frames.put(None)
+        self._encoder.join()
+        self._writer.release()
+        self._render_context.free()
+        self._gl_context.free()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Encoding the video failed.") from self._error
+
+    def _encode(self) -> None:
+        # opencv expects frames top to bottom in bgr, while opengl reads them bottom to top in rgb
+        flipped: Optional[npt.NDArray[np.uint8]] = None
+        converted: Optional[npt.NDArray[np.uint8]] = None
+        while (frame := self._frames.get()) is not None:
+            try:
+                if self._error is None:
+                    flipped = cv2.flip(frame, 0, flipped)
+            except Exception as error:
+                self._error = error
+            finally:
+                # also after an error, so `capture` does not wait forever for a free frame
+                self._free_frames.put(frame)
+            if self._error is None:
+                try:
+                    converted = cv2.cvtColor(flipped, cv2.COLOR_RGB2BGR, converted)
+                    self._writer.write(converted)
+                except Exception as error:
+                    self._error = error
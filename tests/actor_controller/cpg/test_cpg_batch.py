@@ -0,0 +1,61 @@
+from random import Random
+
+import numpy as np
+import pytest
+from revolve2.actor_controller import SequentialControllerBatch
+from revolve2.actor_controllers.cpg import CpgActorController, CpgControllerBatch
+from revolve2.core.modular_robot import ModularRobot
+from revolve2.core.modular_robot.brains import BrainCpgNetworkNeighbourRandom
+from revolve2.standard_resources import modular_robots
+
+
+def _make_controllers(integrator: str, num_controllers: int = 4):
+    controllers = []
+    for index in range(num_controllers):
+        _, controller = ModularRobot(
+            modular_robots.spider(), BrainCpgNetworkNeighbourRandom(Random(index))
+        ).make_actor_and_controller()
+        controllers.append(
+            CpgActorController.deserialize(
+                {**controller.serialize(), "integrator": integrator}
+            )
+        )
+    return controllers
+
+
+@pytest.mark.parametrize("integrator", ["rk4", "expm"])
+def test_batch_matches_stepping_every_controller(integrator):
+    """Test that a batch of cpg controllers gives exactly the targets of stepping every controller on its own."""
+    controllers = _make_controllers(integrator)
+    batch = CpgActorController.make_batch(controllers)
+    assert isinstance(batch, CpgControllerBatch)
+    assert batch.num_controllers == 4
+    initial_targets = [controller.get_dof_targets() for controller in controllers]
+
+    expected = []
+    singles = _make_controllers(integrator)
+    for _ in range(20):
+        for controller in singles:
+            controller.step(1 / 15)
+        expected.append([controller.get_dof_targets() for controller in singles])
+
+    for step in range(10):
+        batch.step(1 / 15)
+        assert np.array_equal(batch.get_dof_targets(), expected[step])
+    assert np.array_equal(batch.step_dof_targets(1 / 15, 10), expected[10:])
+
+    # the batch steps copies
+    assert [
+        controller.get_dof_targets() for controller in controllers
+    ] == initial_targets
+
+
+def test_make_batch_falls_back_to_sequential():
+    """Test that controllers that can not be stacked are stepped one by one, with the same results."""
+    controllers = _make_controllers("rk4", 2) + _make_controllers("expm", 2)
+    batch = CpgActorController.make_batch(controllers)
+    assert isinstance(batch, SequentialControllerBatch)
+
+    table = batch.step_dof_targets(1 / 15, 5)
+    for row, controller in enumerate(controllers):
+        assert np.array_equal(table[:, row], controller.step_dof_targets(1 / 15, 5))
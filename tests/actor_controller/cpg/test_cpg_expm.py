@@ -0,0 +1,92 @@
+from random import Random
+
+import numpy as np
+import pytest
+from revolve2.actor_controllers.cpg import CpgActorController
+from revolve2.core.modular_robot import ModularRobot
+from revolve2.core.modular_robot.brains import BrainCpgNetworkNeighbourRandom
+from revolve2.serialization import SerializeError
+from revolve2.standard_resources import modular_robots
+
+
+def _make_controllers():
+    # the same cpg network of a spider, integrated with rk4 and with the matrix exponential
+    _, controller = ModularRobot(
+        modular_robots.spider(), BrainCpgNetworkNeighbourRandom(Random(0))
+    ).make_actor_and_controller()
+    assert isinstance(controller, CpgActorController)
+    state = controller.serialize()
+    return (
+        CpgActorController.deserialize({**state, "integrator": "rk4"}),
+        CpgActorController.deserialize({**state, "integrator": "expm"}),
+    )
+
+
+def test_expm_matches_rk4():
+    """Test that stepping with the matrix exponential stays within the error of rk4 at the control step."""
+    rk4, expm = _make_controllers()
+    for _ in range(150):
+        rk4.step(1 / 15)
+        expm.step(1 / 15)
+        assert np.allclose(rk4.get_dof_targets(), expm.get_dof_targets(), atol=1e-4)
+
+
+def test_expm_is_exact_for_an_oscillator():
+    """Test that the matrix exponential follows the exact solution of a harmonic oscillator."""
+    controller = CpgActorController(
+        np.array([1.0, 0.0]),
+        1,
+        np.array([[0.0, 1.0], [-1.0, 0.0]]),
+        np.array([2.0]),
+        integrator="expm",
+    )
+    for step in range(1, 101):
+        controller.step(0.1)
+        assert np.isclose(controller.get_dof_targets()[0], np.cos(0.1 * step))
+
+
+def test_expm_with_varying_step_sizes():
+    """Test that a jittering step size shares a few propagators, and that the integrated time stays within a millisecond of the requested time."""
+    _, expm = _make_controllers()
+    rng = np.random.default_rng(0)
+    # a control period of 1/60 seconds, measured with a millisecond of jitter
+    dts = rng.uniform(1 / 60 - 1e-3, 1 / 60 + 1e-3, 300)
+    for dt in dts:
+        expm.step(dt)
+    # no propagator is dropped from the cache, so each one is computed once
+    assert len(expm._propagators) <= 4
+    assert abs(expm._dt_remainder) <= 1e-3
+
+    # the state is exactly that of the requested time, up to the remainder that is not integrated yet
+    _, reference = _make_controllers()
+    reference.step(float(np.sum(dts)) - expm._dt_remainder)
+    assert np.allclose(reference.get_dof_targets(), expm.get_dof_targets(), atol=1e-6)
+
+    # a constant step size is integrated exactly
+    _, expm = _make_controllers()
+    for _ in range(10):
+        expm.step(1 / 60)
+    assert len(expm._propagators) == 1
+    assert expm._dt_remainder == 0.0
+
+    # step sizes that only differ by rounding share a propagator
+    _, expm = _make_controllers()
+    expm.step(0.1)
+    expm.step(0.3 - 0.2)
+    assert len(expm._propagators) == 1
+
+
+def test_integrator_is_serialized():
+    """Test that the integrator survives serialization, and that unknown integrators are rejected."""
+    _, expm = _make_controllers()
+    state = expm.serialize()
+    assert CpgActorController.deserialize(state).serialize() == state
+
+    with pytest.raises(SerializeError):
+        CpgActorController.deserialize({**state, "integrator": "euler"})
+    with pytest.raises(SerializeError):
+        CpgActorController.deserialize({**state, "integrator": 4})
+    with pytest.raises(ValueError):
+        CpgActorController(
+            np.zeros(2), 1, np.zeros((2, 2)), np.ones(1), integrator="euler"
+        )
@@ -0,0 +1,109 @@
+import pickle
+
+import numpy as np
+import pytest
+from revolve2.core.physics.running import Trajectory
+
+
+def _make_trajectory(capacity: int = 16, action_capacity: int = 16) -> Trajectory:
+    # two actors with 2 and 1 hinges, 3 geometries, and actions of 2 values
+    trajectory = Trajectory(
+        [2, 1],
+        2,
+        num_geoms=3,
+        capacity=capacity,
+        action_capacity=action_capacity,
+    )
+    for sample in range(4):
+        if sample > 0:
+            for control in range(2):
+                trajectory.append_action([sample, control])
+        trajectory.append_state(
+            0.5 * sample,
+            [[sample, 0.0, 0.1], [sample, 1.0, 0.2]],
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]],
+            [sample, -sample, 2 * sample],
+            [0.1 * sample, 0.2 * sample, 0.3 * sample],
+            [[True, False, False], [False, sample % 2 == 0, True]],
+        )
+    return trajectory
+
+
+def test_trajectory_states_view_samples():
+    """Test that the environment states of a trajectory contain the sampled values and the actions given before them."""
+    trajectory = _make_trajectory()
+
+    assert len(trajectory) == 4
+    state = trajectory[2]
+    assert state.time_seconds == 1.0
+    assert np.array_equal(state.actions, [[2, 0], [2, 1]])
+    assert np.array_equal(state.action_diffs, [[1, -1], [0, 1]])
+    assert len(trajectory[0].actions) == 0
+
+    first, second = state.actor_states
+    assert np.array_equal(first.position, [2.0, 0.0, 0.1])
+    assert np.array_equal(second.orientation, [0.0, 1.0, 0.0, 0.0])
+    assert np.array_equal(first.hinge_angles, [2.0, -2.0])
+    assert np.array_equal(second.hinge_angles, [4.0])
+    assert np.allclose(second.hinge_vels, [0.6])
+    assert np.array_equal(second.groundcontacts, [False, True, True])
+    assert first.numgeoms == 3
+
+
+def test_trajectory_indexing():
+    """Test negative indices, slices and out of range indices."""
+    trajectory = _make_trajectory()
+
+    assert trajectory[-1].time_seconds == 1.5
+    assert [state.time_seconds for state in trajectory[1:3]] == [0.5, 1.0]
+    with pytest.raises(IndexError):
+        trajectory[4]
+
+
+def test_trajectory_columns():
+    """Test that the columns hold a row per sample, also when the trajectory has grown past its capacity."""
+    trajectory = _make_trajectory(capacity=1, action_capacity=1)
+
+    assert np.array_equal(trajectory.time, [0.0, 0.5, 1.0, 1.5])
+    assert trajectory.position.shape == (4, 2, 3)
+    assert trajectory.orientation.shape == (4, 2, 4)
+    assert np.array_equal(trajectory.hinge_angles(1), [[0.0], [2.0], [4.0], [6.0]])
+    assert trajectory.hinge_vels(0).shape == (4, 2)
+    assert trajectory.groundcontacts is not None
+    assert trajectory.groundcontacts.shape == (4, 2, 3)
+    assert trajectory.actions.shape == (6, 2)
+    assert np.array_equal(trajectory.action_diffs[0], [1, 0])
+
+
+def test_trajectory_pickle_leaves_out_unused_capacity():
+    """Test that a pickled trajectory only contains the samples and actions that were added."""
+    trajectory = _make_trajectory(capacity=1000, action_capacity=1000)
+
+    state = trajectory.__getstate__()
+    assert len(state["_time"]) == 4
+    assert state["_groundcontacts"].shape == (4, 2, 3)
+    assert len(state["_actions"]) == 6
+
+    unpickled = pickle.loads(pickle.dumps(trajectory))
+    assert np.array_equal(unpickled.position, trajectory.position)
+    assert np.array_equal(unpickled[3].actions, trajectory[3].actions)
+
+
+def test_trajectory_clear_keeps_last_action():
+    """Test that after clearing, the difference of the next action is to the last action before clearing."""
+    trajectory = _make_trajectory()
+
+    trajectory.clear()
+    assert len(trajectory) == 0
+    assert len(trajectory.actions) == 0
+
+    trajectory.append_action([5.0, 5.0])
+    trajectory.append_state(
+        2.0,
+        np.zeros((2, 3)),
+        np.zeros((2, 4)),
+        np.zeros(3),
+        np.zeros(3),
+        np.zeros((2, 3)),
+    )
+    assert np.array_equal(trajectory[0].action_diffs, [[2.0, 4.0]])
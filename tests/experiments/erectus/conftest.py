@@ -0,0 +1,7 @@
+import sys
+
+from tests.conftest import ERECTUS_DIR
+
+# the modules of the experiment import each other as top level modules, as they do when its scripts are run
+if ERECTUS_DIR not in sys.path:
+    sys.path.insert(0, ERECTUS_DIR)
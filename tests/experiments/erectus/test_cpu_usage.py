@@ -0,0 +1,112 @@
+import logging
+import os
+
+import cpu_usage
+import experimenter
+import pytest
+from cpu_usage import (
+    THREAD_LIMIT_VARIABLES,
+    OversubscriptionReport,
+    available_cpus,
+    check_oversubscription,
+    check_utilization,
+    count_physical_cores,
+    physical_core_order,
+    pin_to_cpu,
+    thread_limit_environment,
+)
+
+
+def _report(**changes) -> OversubscriptionReport:
+    values = dict(
+        num_processes=4,
+        threads_per_process=1,
+        num_cpus=4,
+        num_machine_cpus=8,
+        num_physical_cores=2,
+        load_average=0.0,
+    )
+    values.update(changes)
+    return OversubscriptionReport(**values)
+
+
+def test_thread_limit_environment():
+    """Test that every thread limit variable gets the limit."""
+    assert thread_limit_environment(2) == {
+        variable: "2" for variable in THREAD_LIMIT_VARIABLES
+    }
+
+
+def test_physical_core_order(monkeypatch):
+    """Test that cpus are ordered so that hyperthread siblings come after the first cpu of every core."""
+    # cpus 0 and 2 are on one core, 1 and 3 on another, 4 has a core of its own
+    cores = {(0, 0): [0, 2], (0, 1): [1, 3], (1, 0): [4]}
+    monkeypatch.setattr(cpu_usage, "_group_by_core", lambda cpus: cores)
+    assert physical_core_order([0, 1, 2, 3, 4]) == [0, 1, 4, 2, 3]
+    assert count_physical_cores([0, 1, 2, 3, 4]) == 3
+
+    # without topology the cpus are kept as they are
+    monkeypatch.setattr(cpu_usage, "_group_by_core", lambda cpus: None)
+    assert physical_core_order([3, 1]) == [3, 1]
+    assert count_physical_cores([3, 1]) is None
+
+
+def test_available_cpus():
+    """Test that the available cpus are cpus of the machine, and that ordering them keeps all of them."""
+    cpus = available_cpus()
+    assert len(cpus) > 0
+    assert set(cpus) <= set(range(os.cpu_count() or len(cpus)))
+    assert sorted(physical_core_order()) == cpus
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity"), reason="cpu affinity not supported"
+)
+def test_pin_to_cpu():
+    """Test that pinning lets the process only run on the given cpu."""
+    cpus = os.sched_getaffinity(0)
+    try:
+        pin_to_cpu(max(cpus))
+        assert os.sched_getaffinity(0) == {max(cpus)}
+    finally:
+        os.sched_setaffinity(0, cpus)
+
+
+def test_oversubscription_problems():
+    """Test that more threads than cpus, unlimited threads and a busy machine are reported."""
+    assert _report().problems == []
+    assert len(_report(num_processes=5).problems) == 1
+    assert len(_report(threads_per_process=2).problems) == 1
+    assert len(_report(threads_per_process=None).problems) == 1
+    assert _report(threads_per_process=None, num_cpus=1, num_processes=1).problems == []
+    assert len(_report(load_average=5.0).problems) == 1
+    assert "oversubscribed" in str(_report(num_processes=5))
+    assert "oversubscribed" not in str(_report())
+
+    report = check_oversubscription(1, 1)
+    assert report.num_cpus == len(available_cpus())
+    assert report.num_threads == 1
+
+
+def test_check_utilization(caplog):
+    """Test that processes that got too little cpu time while busy are warned about."""
+    with caplog.at_level(logging.WARNING):
+        assert check_utilization(2, 1.9, 2.0) == pytest.approx(0.95)
+        assert len(caplog.records) == 0
+        assert check_utilization(2, 1.0, 2.0) == pytest.approx(0.5)
+        assert len(caplog.records) == 1
+    assert check_utilization(2, 0.0, 0.0) == 1.0
+
+
+def test_pinning_more_cpus_than_available(monkeypatch, tmp_path):
+    """Test that the experimenter refuses to pin more cpus than this process may run on."""
+    monkeypatch.setattr(experimenter, "physical_core_order", lambda: [0, 1])
+    with pytest.raises(ValueError):
+        experimenter.schedule_jobs(
+            [["time", "python3", "optimize.py"]] * 4,
+            "unit_test",
+            4,
+            str(tmp_path),
+            dry_run=True,
+            pin_cpus=True,
+        )
@@ -0,0 +1,81 @@
+import asyncio
+import os
+
+import numpy as np
+from cpu_usage import thread_limit_environment
+from evaluator import (
+    EvaluationSettings,
+    EvaluationTask,
+    InlineEvaluator,
+    PoolEvaluator,
+    make_evaluator,
+)
+from genotypes.linear_controller_genotype import LinearControllerGenotype
+
+SETTINGS = EvaluationSettings(
+    simulation_time=1,
+    sampling_frequency=10,
+    control_frequency=30,
+    physics_profile="accurate",
+    settle_time=0.0,
+    collision_policy="full",
+)
+
+
+def _make_tasks():
+    np.random.seed(0)
+    genotypes = [LinearControllerGenotype.random("spider") for _ in range(3)]
+    return [
+        EvaluationTask(genotype.genotype, genotype.body_name, seed)
+        for seed in [1, 2]
+        for genotype in genotypes
+    ]
+
+
+def _summaries(results):
+    return [(result.reduced, result.steps_completed) for result in results]
+
+
+def test_inline_and_pool_evaluations_agree():
+    """Test that evaluating in worker processes gives the same results as evaluating in this process."""
+    tasks = _make_tasks()
+
+    inline = InlineEvaluator(SETTINGS)
+    try:
+        inline_results = asyncio.run(inline.evaluate(tasks))
+        # the initial state only depends on the seed of a task
+        assert _summaries(asyncio.run(inline.evaluate(tasks))) == _summaries(
+            inline_results
+        )
+    finally:
+        inline.close()
+    assert inline.pop_cpu_utilization() is None
+
+    environment = dict(os.environ)
+    pool = PoolEvaluator(SETTINGS, 2, chunk_size=2)
+    try:
+        pool_results = asyncio.run(pool.evaluate(tasks))
+        # kept while the pool runs, for workers it starts later
+        assert all(
+            os.environ[variable] == limit
+            for variable, limit in thread_limit_environment(1).items()
+        )
+        assert pool.pop_cpu_utilization() is not None
+    finally:
+        pool.close()
+    # the thread limits of the workers are not left in this process
+    assert dict(os.environ) == environment
+
+    assert len(inline_results) == len(tasks)
+    assert all(len(result.environment_states) == 0 for result in inline_results)
+    assert _summaries(pool_results) == _summaries(inline_results)
+    # different seeds give different initial states
+    assert inline_results[0].reduced != inline_results[3].reduced
+
+
+def test_make_evaluator():
+    """Test that a single process evaluates inline, and more processes in a pool."""
+    assert isinstance(make_evaluator(SETTINGS, 1), InlineEvaluator)
+    evaluator = make_evaluator(SETTINGS, 2)
+    assert isinstance(evaluator, PoolEvaluator)
+    evaluator.close()
@@ -0,0 +1,78 @@
+import copy
+from random import Random
+
+import measures
+import numpy as np
+from pyrr import Quaternion, Vector3
+from revolve2.core.modular_robot import ModularRobot
+from revolve2.core.modular_robot.brains import BrainCpgNetworkNeighbourRandom
+from revolve2.core.physics.running import Batch, Environment, PosedActor
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.standard_resources import modular_robots
+
+MEASURES = {
+    "displacement": measures.displacement_measure,
+    "directed_displacement": measures.directed_displacement_measure,
+    "average_height": measures.average_height_measure,
+    "max_height_relative_to_avg_height": measures.max_height_relative_to_avg_height_measure,
+    "control_cost": measures.control_cost,
+    "ground_contact": measures.ground_contact_measure,
+    "num_samples": measures.num_samples,
+}
+
+
+def _run(record_trajectory: bool):
+    actor, controller = ModularRobot(
+        modular_robots.spider(), BrainCpgNetworkNeighbourRandom(Random(0))
+    ).make_actor_and_controller()
+
+    def control(environment_index, state, dt, control):
+        controller.step(dt)
+        control.set_dof_targets(0, controller.get_dof_targets())
+
+    batch = Batch(
+        simulation_time=2,
+        sampling_frequency=10,
+        control_frequency=30,
+        control=control,
+        seed=0,
+        reducers=measures.make_reducers(),
+        record_trajectory=record_trajectory,
+    )
+    env = Environment()
+    env.actors.append(
+        PosedActor(
+            actor,
+            Vector3([0.0, 0.0, 0.1]),
+            Quaternion(),
+            [0.0 for _ in controller.get_dof_targets()],
+        )
+    )
+    batch.environments.append(env)
+    return LocalRunner(headless=True).run_batch_sync(batch).environment_results[0]
+
+
+def test_reducers_match_trajectory_measures():
+    """Test that the reducers compute the same measures as the functions that use the whole trajectory."""
+    results = _run(record_trajectory=True)
+    assert set(results.reduced) == set(MEASURES)
+
+    from_trajectory = copy.copy(results)
+    from_trajectory.reduced = {}
+    for name, measure in MEASURES.items():
+        if name == "control_cost":
+            # the reducer sums the costs in another order
+            assert np.isclose(
+                results.reduced[name], measure(from_trajectory), rtol=1e-12
+            )
+        else:
+            assert results.reduced[name] == measure(from_trajectory), name
+
+
+def test_reducers_without_trajectory():
+    """Test that the reducers give the same values when the trajectory is not recorded."""
+    recorded = _run(record_trajectory=True)
+    reduced = _run(record_trajectory=False)
+
+    assert len(reduced.environment_states) == 0
+    assert reduced.reduced == recorded.reduced
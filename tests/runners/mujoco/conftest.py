@@ -0,0 +1,60 @@
+from random import Random
+from typing import List, Optional, Tuple
+
+from pyrr import Quaternion, Vector3
+from revolve2.actor_controller import ActorController
+from revolve2.core.modular_robot import Body, ModularRobot
+from revolve2.core.modular_robot.brains import BrainCpgNetworkNeighbourRandom
+from revolve2.core.physics.running import Environment, PosedActor, Termination
+from revolve2.standard_resources import modular_robots
+
+# helpers shared by the tests of the runner, imported as `tests.runners.mujoco.conftest`
+# so that the control functions can be sent to the worker processes of the runner
+
+
+def make_spider_environment(
+    position: Vector3,
+    orientation: Quaternion = Quaternion(),
+    termination: Optional[Termination] = None,
+) -> Environment:
+    actor, _ = modular_robots.spider().to_actor()
+    env = Environment(termination=termination)
+    env.actors.append(
+        PosedActor(actor, position, orientation, [0.0 for _ in actor.joints])
+    )
+    return env
+
+
+def hold_still(environment_index, state, dt, control):
+    control.set_dof_targets(0, [0.0 for _ in state.hinge_angles])
+
+
+# a robot with a random cpg brain, standing on the ground
+def make_cpg_environment(
+    body: Body, brain_seed: int, seed: Optional[int] = None
+) -> Tuple[Environment, ActorController]:
+    actor, controller = ModularRobot(
+        body, BrainCpgNetworkNeighbourRandom(Random(brain_seed))
+    ).make_actor_and_controller()
+    env = Environment(seed=seed)
+    env.actors.append(
+        PosedActor(
+            actor,
+            Vector3([0.0, 0.0, 0.1]),
+            Quaternion(),
+            [0.0 for _ in controller.get_dof_targets()],
+        )
+    )
+    return env, controller
+
+
+class CpgControl:
+    # steps the controller of every environment. a class instead of a closure, so it can be sent to the worker processes of the runner
+    def __init__(self, controllers: List[ActorController]) -> None:
+        self._controllers = controllers
+
+    def __call__(self, environment_index, state, dt, control):
+        self._controllers[environment_index].step(dt)
+        control.set_dof_targets(
+            0, self._controllers[environment_index].get_dof_targets()
+        )
@@ -0,0 +1,63 @@
+import mujoco
+import numpy as np
+from pyrr import Quaternion, Vector3
+from revolve2.core.physics.running import Environment, PosedActor
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.runners.mujoco._simulation import (
+    get_actor_state,
+    get_ground_contact_actors,
+)
+from revolve2.runners.mujoco._state_layout import StateLayout
+from revolve2.standard_resources import modular_robots
+
+
+# per geom, the actor touching the ground with it, found the way the runner used to: by the name of every contact geom
+def _ground_contacts_by_name(model, data, num_actors) -> np.ndarray:
+    ground = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_GEOM, "ground")
+    touching = np.full(model.ngeom, -1)
+    for contact in data.contact[: data.ncon]:
+        if contact.geom1 == ground:
+            other = contact.geom2
+        elif contact.geom2 == ground:
+            other = contact.geom1
+        else:
+            continue
+        name = mujoco.mj_id2name(model, mujoco.mjtObj.mjOBJ_GEOM, other)
+        for actor_index in range(num_actors):
+            if name.startswith(f"robot_{actor_index}/"):
+                touching[other] = actor_index
+    return touching
+
+
+def test_ground_contacts_match_name_lookups():
+    """Test that the vectorized ground contacts are those found by looking up the name of every contact geom."""
+    env = Environment()
+    for index, body in enumerate([modular_robots.spider(), modular_robots.snake()]):
+        actor, _ = body.to_actor()
+        env.actors.append(
+            PosedActor(
+                actor,
+                Vector3([float(index), 0.0, 0.1]),
+                Quaternion(),
+                [0.0 for _ in actor.joints],
+            )
+        )
+    model = mujoco.MjModel.from_xml_string(LocalRunner._make_mjcf(env))
+    layout = StateLayout.from_model(model)
+    data = mujoco.MjData(model)
+
+    touched = np.zeros(layout.num_actors, dtype=np.bool_)
+    for _ in range(20):
+        mujoco.mj_step(model, data, 50)
+        expected = _ground_contacts_by_name(model, data, layout.num_actors)
+        ground_contact_actors = get_ground_contact_actors(data, layout)
+        assert np.array_equal(ground_contact_actors, expected)
+
+        for actor_index in range(layout.num_actors):
+            state = get_actor_state(
+                actor_index, data, layout, ground_contact_actors=ground_contact_actors
+            )
+            assert np.array_equal(state.groundcontacts, expected == actor_index)
+            touched[actor_index] |= np.any(state.groundcontacts)
+    # both actors landed
+    assert np.all(touched)
@@ -0,0 +1,139 @@
+import glob
+import os
+
+import mujoco
+import numpy as np
+import pytest
+from pyrr import Quaternion, Vector3
+from revolve2.core.physics.actor.urdf import to_urdf
+from revolve2.core.physics.running import Batch, Environment, PosedActor
+from revolve2.runners.mujoco import LocalRunner, ModelCache
+from revolve2.runners.mujoco._mjcf import _collision_bits
+from revolve2.runners.mujoco._state_layout import StateLayout
+from revolve2.standard_resources import modular_robots
+
+from tests.runners.mujoco.conftest import hold_still, make_spider_environment
+
+
+def test_native_mjcf_matches_urdf_conversion():
+    """Test that models generated without the urdf round trip have the same physical properties."""
+    for body in [modular_robots.spider(), modular_robots.snake()]:
+        actor, _ = body.to_actor()
+
+        env = Environment()
+        env.actors.append(
+            PosedActor(actor, Vector3(), Quaternion(), [0.0 for _ in actor.joints])
+        )
+        native = mujoco.MjModel.from_xml_string(LocalRunner._make_mjcf(env))
+        via_urdf = mujoco.MjModel.from_xml_string(
+            to_urdf(actor, "robot_0", Vector3(), Quaternion())
+        )
+
+        assert native.njnt == via_urdf.njnt + 1  # plus the free joint
+        assert native.nu == 2 * len(actor.joints)
+        # the urdf root link is fused with the world body
+        assert np.allclose(native.body_mass[2:], via_urdf.body_mass[1:])
+        assert np.allclose(native.body_ipos[2:], via_urdf.body_ipos[1:], atol=1e-6)
+        assert np.allclose(native.geom_size[1:], via_urdf.geom_size, atol=1e-6)
+        assert np.allclose(native.jnt_range[1:], via_urdf.jnt_range, atol=1e-5)
+
+
+def test_headless_mjcf_has_same_physics():
+    """Test that models without visual assets have no textures, materials or lights, and simulate the same."""
+    actor, _ = modular_robots.spider().to_actor()
+    env = Environment()
+    env.actors.append(
+        PosedActor(
+            actor, Vector3([0.0, 0.0, 0.3]), Quaternion(), [0.0 for _ in actor.joints]
+        )
+    )
+    visual = mujoco.MjModel.from_xml_string(LocalRunner._make_mjcf(env))
+    headless = mujoco.MjModel.from_xml_string(LocalRunner._make_mjcf(env, visual=False))
+
+    assert visual.ntex > 0 and visual.nmat > 0 and visual.nlight > 0
+    assert headless.ntex == 0
+    assert headless.nmat == 0
+    assert headless.nlight == 0
+
+    visual_data = mujoco.MjData(visual)
+    headless_data = mujoco.MjData(headless)
+    mujoco.mj_step(visual, visual_data, 500)
+    mujoco.mj_step(headless, headless_data, 500)
+    assert np.array_equal(visual_data.qpos, headless_data.qpos)
+    assert np.array_equal(visual_data.qvel, headless_data.qvel)
+
+
+def test_headless_runner_uses_headless_mjcf(tmp_path):
+    """Test that a headless runner that does not record video compiles models without visual assets."""
+    batch = Batch(
+        simulation_time=0.1,
+        sampling_frequency=10,
+        control_frequency=10,
+        control=hold_still,
+    )
+    batch.environments.append(make_spider_environment(Vector3([0.0, 0.0, 0.3])))
+    LocalRunner(
+        headless=True, model_cache=ModelCache(cache_dir=str(tmp_path))
+    ).run_batch_sync(batch)
+
+    (path,) = glob.glob(os.path.join(tmp_path, "*.xml"))
+    model = mujoco.MjModel.from_xml_path(path)
+    assert model.ntex == 0
+    assert model.nlight == 0
+
+
+# whether the contype and conaffinity of two geoms let them collide
+def _can_collide(model: mujoco.MjModel, geom1: int, geom2: int) -> bool:
+    return bool(
+        (model.geom_contype[geom1] & model.geom_conaffinity[geom2])
+        or (model.geom_contype[geom2] & model.geom_conaffinity[geom1])
+    )
+
+
+def test_collision_policies():
+    """Test which geoms can collide under every collision policy, and that adjacent bodies are excluded with 'nonadjacent'."""
+    env = Environment()
+    for x in [0.0, 1.0]:
+        env.actors.append(make_spider_environment(Vector3([x, 0.0, 0.3])).actors[0])
+
+    for policy, self_collision, actor_collision in [
+        ("full", True, True),
+        ("nonadjacent", True, True),
+        ("world", False, True),
+        ("ground", False, False),
+    ]:
+        model = mujoco.MjModel.from_xml_string(
+            LocalRunner._make_mjcf(env, collision_policy=policy)
+        )
+        layout = StateLayout.from_model(model)
+        first = range(*layout.geom_ranges[0])
+        second = range(*layout.geom_ranges[1])
+
+        assert all(
+            _can_collide(model, layout.ground_geom_id, geom)
+            for geom in [*first, *second]
+        )
+        assert _can_collide(model, first[0], first[-1]) == self_collision
+        assert _can_collide(model, first[0], second[0]) == actor_collision
+        if policy == "nonadjacent":
+            assert model.nexclude > 0
+            # every excluded pair is two bodies of the same actor.
+            # the signature holds both body ids plus one
+            for body1, body2 in zip(
+                (model.exclude_signature >> 16) - 1,
+                (model.exclude_signature & 0xFFFF) - 1,
+            ):
+                assert model.body_rootid[body1] == model.body_rootid[body2]
+        else:
+            assert model.nexclude == 0
+
+    # actors of different groups never collide, those in the same group collide as the policy says
+    assert _collision_bits(3, [0, 1, 0], "full") == [(2, 3), (4, 5), (2, 3)]
+    world_bits = _collision_bits(3, [0, 1, 0], "world")
+    assert world_bits is not None
+    assert world_bits[0][0] & world_bits[1][1] == 0
+    assert world_bits[0][0] & world_bits[2][1] != 0
+    with pytest.raises(ValueError):
+        _collision_bits(32, None, "world")
+    with pytest.raises(ValueError):
+        LocalRunner(collision_policy="none")
@@ -0,0 +1,123 @@
+from typing import Callable, List
+
+from pyrr import Vector3
+from revolve2.core.physics.running import Batch
+from revolve2.runners.mujoco import LocalRunner, ModelCache
+from revolve2.runners.mujoco._model_cache import environment_fingerprint
+
+from tests.runners.mujoco.conftest import hold_still, make_spider_environment
+
+
+def _make_xml_function(calls: List[str], key: str) -> Callable[[], str]:
+    def make_xml() -> str:
+        calls.append(key)
+        return '<mujoco><worldbody><geom name="ground" type="plane" size="1 1 0.1"/></worldbody></mujoco>'
+
+    return make_xml
+
+
+def test_model_cache_hit_and_miss():
+    """Test that a model is compiled on the first request only, and shared by later requests."""
+    calls: List[str] = []
+    cache = ModelCache()
+
+    first = cache.get("a", _make_xml_function(calls, "a"))
+    second = cache.get("a", _make_xml_function(calls, "a"))
+
+    assert calls == ["a"]
+    assert first[0] is second[0]
+    assert first[1] is second[1]
+    assert cache.misses == 1
+    assert cache.hits == 1
+    assert len(cache) == 1
+
+
+def test_model_cache_evicts_least_recently_used():
+    """Test that a full cache drops the model that was used longest ago."""
+    calls: List[str] = []
+    cache = ModelCache(max_size=2)
+
+    for key in ["a", "b", "a", "c"]:
+        cache.get(key, _make_xml_function(calls, key))
+    assert len(cache) == 2
+    assert calls == ["a", "b", "c"]
+
+    # "b" was evicted, "a" was used after it so it was kept
+    cache.get("a", _make_xml_function(calls, "a"))
+    cache.get("b", _make_xml_function(calls, "b"))
+    assert calls == ["a", "b", "c", "b"]
+
+
+def test_model_cache_disk_layer(tmp_path):
+    """Test that generated xml stored on disk is used by a new cache instead of generating it again."""
+    calls: List[str] = []
+    ModelCache(cache_dir=str(tmp_path)).get("a", _make_xml_function(calls, "a"))
+
+    cache = ModelCache(cache_dir=str(tmp_path))
+    cache.get("a", _make_xml_function(calls, "a"))
+
+    assert calls == ["a"]
+    assert cache.misses == 1
+    assert cache.disk_hits == 1
+
+
+def test_environment_fingerprint():
+    """Test that the fingerprint changes with model options, but not with the pose of the actors."""
+    env = make_spider_environment(Vector3([0.0, 0.0, 0.1]))
+    moved = make_spider_environment(Vector3([1.0, 2.0, 0.3]))
+
+    assert environment_fingerprint(env, "full") == environment_fingerprint(
+        moved, "full"
+    )
+    assert environment_fingerprint(env, "full") != environment_fingerprint(
+        env, "ground"
+    )
+    assert environment_fingerprint(env, "full", None) != environment_fingerprint(
+        env, "full", [0]
+    )
+
+
+def test_runner_caches_models_per_option():
+    """Test that the runner reuses models across batches, and compiles another one when an option of the model changes."""
+    cache = ModelCache()
+
+    def run(collision_policy: str) -> None:
+        batch = Batch(
+            simulation_time=0.1,
+            sampling_frequency=10,
+            control_frequency=10,
+            control=lambda environment_index, state, dt, control: None,
+        )
+        batch.environments.append(make_spider_environment(Vector3([0.0, 0.0, 0.1])))
+        LocalRunner(
+            headless=True, model_cache=cache, collision_policy=collision_policy
+        ).run_batch_sync(batch)
+
+    run("full")
+    assert (cache.misses, cache.hits) == (1, 0)
+    run("full")
+    assert (cache.misses, cache.hits) == (1, 1)
+    run("ground")
+    assert (cache.misses, cache.hits) == (2, 1)
+
+
+def test_runner_workers_use_cache_settings(tmp_path):
+    """Test that the worker processes of a runner cache models with the settings of the cache of the runner."""
+    cache = ModelCache(cache_dir=str(tmp_path))
+    batch = Batch(
+        simulation_time=0.5,
+        sampling_frequency=10,
+        control_frequency=10,
+        control=hold_still,
+    )
+    batch.environments.append(make_spider_environment(Vector3([0.0, 0.0, 0.1])))
+    batch.environments.append(make_spider_environment(Vector3([1.0, 0.0, 0.1])))
+    runner = LocalRunner(headless=True, model_cache=cache, num_workers=2)
+    try:
+        runner.run_batch_sync(batch)
+    finally:
+        runner.close()
+
+    # compiled in the workers, from xml stored in the directory of the cache of the runner
+    assert (cache.misses, cache.hits) == (0, 0)
+    assert len(list(tmp_path.glob("*.xml"))) == 1
@@ -0,0 +1,68 @@
+import mujoco
+import numpy as np
+from pyrr import Vector3
+from revolve2.core.physics.running import Batch
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.runners.mujoco._simulation import steps_before
+
+from tests.runners.mujoco.conftest import hold_still, make_spider_environment
+
+
+def _make_model() -> mujoco.MjModel:
+    return mujoco.MjModel.from_xml_string(
+        LocalRunner._make_mjcf(make_spider_environment(Vector3([0.0, 0.0, 0.3])))
+    )
+
+
+def test_multi_step_reaches_events_as_single_steps():
+    """Test that stepping to an event in one call gives the same state and step count as stepping one step at a time."""
+    model = _make_model()
+    single = mujoco.MjData(model)
+    multi = mujoco.MjData(model)
+
+    # event times that are not multiples of the timestep
+    for event_time in np.arange(1, 31) / 30 * 1.01:
+        single_steps = 0
+        while single.time < event_time:
+            mujoco.mj_step(model, single)
+            single_steps += 1
+        multi_steps = 0
+        while multi.time < event_time:
+            nstep = steps_before(multi.time, event_time, model.opt.timestep)
+            mujoco.mj_step(model, multi, nstep)
+            multi_steps += nstep
+
+        assert multi_steps == single_steps
+        assert multi.time == single.time
+        assert np.array_equal(multi.qpos, single.qpos)
+
+
+def test_runner_steps_and_samples_as_single_steps():
+    """Test that the runner takes as many steps, and samples at the same times, as a loop that checks after every step."""
+    sampling_frequency = 7
+    batch = Batch(
+        simulation_time=1,
+        sampling_frequency=sampling_frequency,
+        control_frequency=20,
+        control=hold_still,
+    )
+    batch.environments.append(make_spider_environment(Vector3([0.0, 0.0, 0.3])))
+    result = LocalRunner(headless=True).run_batch_sync(batch).environment_results[0]
+
+    # the sample times of the runner, stepping one step at a time
+    model = _make_model()
+    data = mujoco.MjData(model)
+    sample_step = 1 / sampling_frequency
+    steps = 0
+    sample_times = [0.0]
+    last_sample_time = 0.0
+    while (time := data.time) < batch.simulation_time:
+        if time >= last_sample_time + sample_step:
+            last_sample_time = int(time / sample_step) * sample_step
+            sample_times.append(time)
+        mujoco.mj_step(model, data)
+        steps += 1
+    sample_times.append(data.time)
+
+    assert result.steps_completed == steps
+    assert [state.time_seconds for state in result.environment_states] == sample_times
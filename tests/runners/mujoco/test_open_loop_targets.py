@@ -0,0 +1,68 @@
+import copy
+
+import numpy as np
+from revolve2.core.physics.running import Batch
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.runners.mujoco._open_loop_targets import OpenLoopTargets
+from revolve2.standard_resources import modular_robots
+
+from tests.runners.mujoco.conftest import CpgControl, make_cpg_environment
+
+
+def _make_batch(open_loop):
+    # robots with cpg controllers. per environment, open_loop tells whether its controller is given to the runner
+    controllers = []
+    batch = Batch(
+        simulation_time=2,
+        sampling_frequency=10,
+        control_frequency=30,
+        control=CpgControl(controllers),
+        seed=0,
+    )
+    # two spiders are stepped together, the gecko has another number of dofs
+    bodies = [modular_robots.spider(), modular_robots.spider(), modular_robots.gecko()]
+    for index, (body, env_open_loop) in enumerate(zip(bodies, open_loop)):
+        env, controller = make_cpg_environment(body, index)
+        if env_open_loop:
+            env.controller = controller
+        controllers.append(controller)
+        batch.environments.append(env)
+    return batch, controllers
+
+
+def test_open_loop_targets_match_callback_control():
+    """Test that environments with an open loop controller are simulated as if the control function stepped it."""
+    callback_batch, _ = _make_batch([False, False, False])
+    callback = LocalRunner(headless=True).run_batch_sync(callback_batch)
+    open_loop_batch, open_loop_controllers = _make_batch([True, False, True])
+    initial_state = copy.deepcopy(open_loop_controllers[0]._state)
+    open_loop = LocalRunner(headless=True).run_batch_sync(open_loop_batch)
+
+    for callback_result, open_loop_result in zip(
+        callback.environment_results, open_loop.environment_results
+    ):
+        assert np.array_equal(
+            callback_result.environment_states.actions,
+            open_loop_result.environment_states.actions,
+        )
+        assert np.array_equal(
+            callback_result.environment_states.position,
+            open_loop_result.environment_states.position,
+        )
+    # the runner steps copies of the controllers
+    assert np.array_equal(open_loop_controllers[0]._state, initial_state)
+
+
+def test_open_loop_targets_chunks():
+    """Test that targets computed a chunk at a time are those of stepping every controller on its own."""
+    _, controllers = _make_batch([True, True, True])
+    controllers = controllers[:2]
+    targets = OpenLoopTargets(controllers, 0.05, chunk_size=3)
+
+    for control_index in range(10):
+        for controller in controllers:
+            controller.step(0.05)
+        assert np.array_equal(
+            targets.get(control_index),
+            [controller.get_dof_targets() for controller in controllers],
+        )
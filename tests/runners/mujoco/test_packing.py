@@ -0,0 +1,50 @@
+import numpy as np
+from revolve2.core.physics.running import Batch
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.standard_resources import modular_robots
+
+from tests.runners.mujoco.conftest import CpgControl, make_cpg_environment
+
+
+def _make_batch() -> Batch:
+    controllers = []
+    batch = Batch(
+        simulation_time=1,
+        sampling_frequency=10,
+        control_frequency=30,
+        control=CpgControl(controllers),
+        seed=3,
+    )
+    # only environments with the same actors are packed together
+    for index, body in enumerate(
+        [
+            modular_robots.spider(),
+            modular_robots.spider(),
+            modular_robots.gecko(),
+            modular_robots.gecko(),
+        ]
+    ):
+        env, controller = make_cpg_environment(body, index)
+        controllers.append(controller)
+        batch.environments.append(env)
+    return batch
+
+
+def test_packing_does_not_change_ground_contacts():
+    """Test that environments packed into one model report the ground contacts of their own geoms only, as without packing."""
+    unpacked = LocalRunner(headless=True).run_batch_sync(_make_batch())
+    packed = LocalRunner(headless=True, pack_size=4).run_batch_sync(_make_batch())
+
+    for unpacked_result, packed_result in zip(
+        unpacked.environment_results, packed.environment_results
+    ):
+        unpacked_states = unpacked_result.environment_states
+        packed_states = packed_result.environment_states
+        assert (
+            unpacked_states[0].actor_states[0].numgeoms
+            == packed_states[0].actor_states[0].numgeoms
+        )
+        assert np.array_equal(
+            unpacked_states.groundcontacts, packed_states.groundcontacts
+        )
+        assert np.allclose(unpacked_states.position, packed_states.position, atol=1e-9)
@@ -0,0 +1,59 @@
+import math
+
+import mujoco
+import numpy as np
+from pyrr import Vector3
+from revolve2.core.physics.running import PHYSICS_PROFILES, Batch
+from revolve2.runners.mujoco import LocalRunner, ModelCache
+from revolve2.runners.mujoco._state_layout import StateLayout
+
+from tests.runners.mujoco.conftest import hold_still, make_spider_environment
+
+
+def test_physics_profiles_set_model_options():
+    """Test that the timestep, integrator and gains of every profile end up in the compiled model."""
+    env = make_spider_environment(Vector3([0.0, 0.0, 0.3]))
+    for name, profile in PHYSICS_PROFILES.items():
+        model = mujoco.MjModel.from_xml_string(
+            LocalRunner._make_mjcf(env, physics_profile=profile)
+        )
+
+        assert model.opt.timestep == profile.timestep, name
+        assert model.opt.integrator == getattr(
+            mujoco.mjtIntegrator, f"mjINT_{profile.integrator.upper()}"
+        )
+        ctrl_adr = StateLayout.from_model(model).target_ctrl_adr[0]
+        assert np.all(model.actuator_gainprm[ctrl_adr, 0] == profile.actuator_kp)
+        assert np.all(
+            model.dof_armature[model.jnt_dofadr[1:]] == profile.joint_armature
+        )
+
+
+def test_batch_physics_profile_is_simulated():
+    """Test that the runner simulates a batch with the timestep of its physics profile."""
+    for name, profile in PHYSICS_PROFILES.items():
+        model_cache = ModelCache()
+        batch = Batch(
+            simulation_time=0.5,
+            sampling_frequency=10,
+            control_frequency=10,
+            control=hold_still,
+            physics_profile=profile,
+        )
+        batch.environments.append(make_spider_environment(Vector3([0.0, 0.0, 0.3])))
+        result = (
+            LocalRunner(headless=True, model_cache=model_cache)
+            .run_batch_sync(batch)
+            .environment_results[0]
+        )
+
+        # simulation time accumulates step by step, so the last step can go one over
+        assert (
+            abs(result.steps_completed - batch.simulation_time / profile.timestep) <= 1
+        ), name
+        assert model_cache.misses == 1
+        assert math.isclose(
+            result.environment_states[-1].time_seconds,
+            result.steps_completed * profile.timestep,
+            rel_tol=1e-9,
+        )
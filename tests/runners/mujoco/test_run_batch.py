@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+import numpy as np
+from pyrr import Vector3
+from revolve2.core.physics.running import Batch
+from revolve2.runners.mujoco import LocalRunner
+
+from tests.runners.mujoco.conftest import hold_still, make_spider_environment
+
+
+def _make_batch(control) -> Batch:
+    batch = Batch(
+        simulation_time=1,
+        sampling_frequency=10,
+        control_frequency=10,
+        control=control,
+        seed=0,
+    )
+    batch.environments.append(make_spider_environment(Vector3([0.0, 0.0, 0.3])))
+    return batch
+
+
+def test_run_batch_does_not_block_event_loop():
+    """Test that the event loop keeps running tasks while a batch is simulated."""
+    ticked = threading.Event()
+    waits = []
+
+    # the first control call waits for a tick of the event loop, which never comes if the simulation blocks it
+    def control(environment_index, state, dt, control):
+        if len(waits) == 0:
+            waits.append(ticked.wait(timeout=10.0))
+        hold_still(environment_index, state, dt, control)
+
+    async def run():
+        runner = LocalRunner(headless=True)
+        try:
+            simulation = asyncio.create_task(runner.run_batch(_make_batch(control)))
+            # let the simulation start before the first tick
+            await asyncio.sleep(0)
+            ticks = 0
+            while not simulation.done():
+                ticks += 1
+                ticked.set()
+                await asyncio.sleep(0.001)
+            return await simulation, ticks
+        finally:
+            runner.close()
+
+    results, ticks = asyncio.run(run())
+
+    assert waits == [True]
+    assert ticks > 0
+    # the same states as the blocking call
+    expected = LocalRunner(headless=True).run_batch_sync(_make_batch(hold_still))
+    assert np.array_equal(
+        results.environment_results[0].environment_states.position,
+        expected.environment_results[0].environment_states.position,
+    )
@@ -0,0 +1,78 @@
+from typing import List
+
+import numpy as np
+from revolve2.core.physics.running import Batch
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.standard_resources import modular_robots
+
+from tests.runners.mujoco.conftest import CpgControl, make_cpg_environment
+
+
+def _make_batch(environment_seeds=None) -> Batch:
+    if environment_seeds is None:
+        environment_seeds = [None] * 4
+    controllers = []
+    batch = Batch(
+        simulation_time=1,
+        sampling_frequency=10,
+        control_frequency=30,
+        control=CpgControl(controllers),
+        seed=7,
+    )
+    for index, seed in enumerate(environment_seeds):
+        env, controller = make_cpg_environment(
+            modular_robots.spider(), index, seed=seed
+        )
+        controllers.append(controller)
+        batch.environments.append(env)
+    return batch
+
+
+def _initial_hinge_angles(results) -> List[np.ndarray]:
+    return [
+        np.array(result.environment_states[0].actor_states[0].hinge_angles)
+        for result in results.environment_results
+    ]
+
+
+def test_seeded_results_do_not_depend_on_how_environments_are_run():
+    """Test that a seeded batch gives the same results inline, in a pool of workers, and packed into one model."""
+    inline = LocalRunner(headless=True).run_batch_sync(_make_batch())
+    pool_runner = LocalRunner(headless=True, num_workers=2)
+    try:
+        pool = pool_runner.run_batch_sync(_make_batch())
+    finally:
+        pool_runner.close()
+    packed = LocalRunner(headless=True, pack_size=4).run_batch_sync(_make_batch())
+
+    inline_angles = _initial_hinge_angles(inline)
+    # every environment gets its own noise
+    assert not np.array_equal(inline_angles[0], inline_angles[1])
+    for other in [pool, packed]:
+        for expected, angles in zip(inline_angles, _initial_hinge_angles(other)):
+            assert np.array_equal(expected, angles)
+
+    for inline_result, pool_result, packed_result in zip(
+        inline.environment_results, pool.environment_results, packed.environment_results
+    ):
+        assert inline_result.steps_completed == pool_result.steps_completed
+        assert np.array_equal(
+            inline_result.environment_states.position,
+            pool_result.environment_states.position,
+        )
+        # packed environments are stepped in a larger model, so they can differ by rounding
+        assert np.allclose(
+            inline_result.environment_states.position,
+            packed_result.environment_states.position,
+            atol=1e-9,
+        )
+
+
+def test_environment_seed_overrides_batch_seed():
+    """Test that environments with the same seed of their own start from the same state, wherever they are in the batch."""
+    angles = _initial_hinge_angles(
+        LocalRunner(headless=True).run_batch_sync(_make_batch([3, None, 3, None]))
+    )
+
+    assert np.array_equal(angles[0], angles[2])
+    assert not np.array_equal(angles[1], angles[3])
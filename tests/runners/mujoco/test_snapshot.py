@@ -0,0 +1,114 @@
+import mujoco
+import numpy as np
+from pyrr import Quaternion, Vector3
+from revolve2.core.physics.running import Batch
+from revolve2.runners.mujoco import KeyframeCache, LocalRunner, Snapshot
+
+from tests.runners.mujoco.conftest import hold_still, make_spider_environment
+
+
+# z component of the up axis of the actor, from its orientation in mujoco component order
+def _up(orientation: Quaternion) -> float:
+    return float(1.0 - 2.0 * (orientation[1] ** 2 + orientation[2] ** 2))
+
+
+def test_snapshot_restore_continues_simulation():
+    """Test that a simulation restored from a snapshot continues exactly as it did after the snapshot was taken."""
+    model = mujoco.MjModel.from_xml_string(
+        LocalRunner._make_mjcf(make_spider_environment(Vector3([0.0, 0.0, 0.3])))
+    )
+    data = mujoco.MjData(model)
+    mujoco.mj_step(model, data, 100)
+
+    snapshot = Snapshot.capture(data)
+    mujoco.mj_step(model, data, 100)
+    expected_qpos = data.qpos.copy()
+    expected_time = data.time
+
+    restored = mujoco.MjData(model)
+    snapshot.restore(restored)
+    mujoco.mj_step(model, restored, 100)
+    assert np.array_equal(restored.qpos, expected_qpos)
+    assert restored.time == expected_time
+
+
+def test_keyframe_cache_hit_miss_and_eviction():
+    """Test that keyframes are created once per key, and that a full cache drops the least recently used one."""
+    created = []
+
+    def make_keyframe(key):
+        def make():
+            created.append(key)
+            return Snapshot(0.0, np.zeros(1), np.zeros(1), np.zeros(0))
+
+        return make
+
+    cache = KeyframeCache(max_size=2)
+    for key in ["a", "a", "b", "a", "c", "b"]:
+        cache.get(key, make_keyframe(key))
+
+    assert created == ["a", "b", "c", "b"]
+    assert (cache.misses, cache.hits) == (4, 2)
+
+
+def test_runner_warm_starts_from_keyframe():
+    """Test that environments with the same actors and orientation share a settled keyframe, and that warm started runs are reproducible."""
+    cache = KeyframeCache()
+    # upside down, rotated half a turn around the x axis in mujoco component order
+    flipped = Quaternion([0.0, 1.0, 0.0, 0.0])
+
+    def run(pack_size=1):
+        batch = Batch(
+            simulation_time=0.5,
+            sampling_frequency=10,
+            control_frequency=10,
+            control=hold_still,
+            seed=0,
+        )
+        batch.environments.append(make_spider_environment(Vector3([0.0, 0.0, 0.3])))
+        batch.environments.append(
+            make_spider_environment(Vector3([1.0, 0.0, 0.3]), flipped)
+        )
+        batch.environments.append(make_spider_environment(Vector3([2.0, 0.0, 0.3])))
+        return (
+            LocalRunner(
+                headless=True,
+                pack_size=pack_size,
+                settle_time=1.0,
+                keyframe_cache=cache,
+            )
+            .run_batch_sync(batch)
+            .environment_results
+        )
+
+    first = run()
+    assert (cache.misses, cache.hits) == (2, 1)
+    for x, upright, result in zip([0.0, 1.0, 2.0], [True, False, True], first):
+        initial = result.environment_states[0]
+        assert initial.time_seconds == 0.0
+        # settled on the ground instead of at the height of the pose
+        assert initial.actor_states[0].position.z < 0.1
+        # at its own pose, not at the pose of the environment the keyframe was created for
+        assert abs(initial.actor_states[0].position.x - x) < 0.1
+        assert (_up(initial.actor_states[0].orientation) > 0.0) == upright
+
+    second = run()
+    assert (cache.misses, cache.hits) == (2, 4)
+    for first_result, second_result in zip(first, second):
+        assert np.array_equal(
+            first_result.environment_states.position,
+            second_result.environment_states.position,
+        )
+
+    # environments simulated together in one model start from the same keyframes
+    packed = run(pack_size=3)
+    assert (cache.misses, cache.hits) == (2, 7)
+    for first_result, packed_result in zip(first, packed):
+        assert np.allclose(
+            first_result.environment_states[0].actor_states[0].position,
+            packed_result.environment_states[0].actor_states[0].position,
+        )
+        assert np.allclose(
+            first_result.environment_states[0].actor_states[0].orientation,
+            packed_result.environment_states[0].actor_states[0].orientation,
+        )
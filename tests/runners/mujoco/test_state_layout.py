@@ -0,0 +1,94 @@
+import mujoco
+import numpy as np
+from pyrr import Quaternion, Vector3
+from revolve2.core.physics.running import Environment, PosedActor
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.runners.mujoco._simulation import get_actor_state
+from revolve2.runners.mujoco._state_layout import StateLayout
+from revolve2.standard_resources import modular_robots
+
+
+def _make_model() -> mujoco.MjModel:
+    env = Environment()
+    for index, body in enumerate([modular_robots.spider(), modular_robots.gecko()]):
+        actor, _ = body.to_actor()
+        env.actors.append(
+            PosedActor(
+                actor,
+                Vector3([float(index), 0.0, 0.3]),
+                Quaternion(),
+                [0.0 for _ in actor.joints],
+            )
+        )
+    return mujoco.MjModel.from_xml_string(LocalRunner._make_mjcf(env))
+
+
+def test_state_layout_matches_name_lookups():
+    """Test that the addresses in the layout are those found by looking up every actor and joint by name."""
+    model = _make_model()
+    layout = StateLayout.from_model(model)
+
+    assert layout.num_actors == 2
+    assert layout.ground_geom_id == mujoco.mj_name2id(
+        model, mujoco.mjtObj.mjOBJ_GEOM, "ground"
+    )
+    assert layout.num_geoms == model.ngeom
+    for actor_index in range(layout.num_actors):
+        robot = mujoco.mj_name2id(
+            model, mujoco.mjtObj.mjOBJ_BODY, f"robot_{actor_index}/"
+        )
+        assert robot >= 0
+        assert (
+            layout.root_qpos_adr[actor_index]
+            == model.jnt_qposadr[model.body_jntadr[robot]]
+        )
+        assert (
+            layout.root_dof_adr[actor_index]
+            == model.jnt_dofadr[model.body_jntadr[robot]]
+        )
+
+        # the hinges of the actor, in the order of the joints in the model
+        hinges = [
+            joint
+            for joint in range(model.njnt)
+            if model.jnt_type[joint] == mujoco.mjtJoint.mjJNT_HINGE
+            and model.body_rootid[model.jnt_bodyid[joint]] == robot
+        ]
+        assert len(hinges) > 0
+        assert np.array_equal(
+            layout.hinge_qpos_adr[actor_index], model.jnt_qposadr[hinges]
+        )
+        assert np.array_equal(
+            layout.hinge_dof_adr[actor_index], model.jnt_dofadr[hinges]
+        )
+
+        geoms = [
+            geom
+            for geom in range(model.ngeom)
+            if model.body_rootid[model.geom_bodyid[geom]] == robot
+        ]
+        assert layout.geom_ranges[actor_index] == (geoms[0], geoms[-1] + 1)
+        assert np.all(layout.geom_actor[geoms] == actor_index)
+    assert layout.geom_actor[layout.ground_geom_id] == -1
+
+
+def test_actor_state_gathers_from_layout():
+    """Test that the state of an actor is read from the addresses of its own joints."""
+    model = _make_model()
+    layout = StateLayout.from_model(model)
+    data = mujoco.MjData(model)
+    mujoco.mj_step(model, data, 200)
+
+    for actor_index in range(layout.num_actors):
+        state = get_actor_state(actor_index, data, layout)
+        root = layout.root_qpos_adr[actor_index]
+        assert np.array_equal(state.position, data.qpos[root : root + 3])
+        assert np.array_equal(state.orientation, data.qpos[root + 3 : root + 7])
+        assert np.array_equal(
+            state.hinge_angles, data.qpos[layout.hinge_qpos_adr[actor_index]]
+        )
+        assert np.array_equal(
+            state.hinge_vels, data.qvel[layout.hinge_dof_adr[actor_index]]
+        )
+    # the actors are apart, at the x of their pose
+    assert abs(get_actor_state(1, data, layout).position.x - 1.0) < 0.2
@@ -0,0 +1,71 @@
+import math
+
+from pyrr import Quaternion, Vector3
+from revolve2.core.physics.running import Batch, Environment, Termination
+from revolve2.runners.mujoco import LocalRunner
+
+from tests.runners.mujoco.conftest import hold_still, make_spider_environment
+
+
+def _make_environment(
+    termination: Termination, orientation: Quaternion = Quaternion()
+) -> Environment:
+    return make_spider_environment(
+        Vector3([0.0, 0.0, 0.3]), orientation, termination=termination
+    )
+
+
+def _run(environments):
+    batch = Batch(
+        simulation_time=2,
+        sampling_frequency=10,
+        control_frequency=10,
+        control=hold_still,
+    )
+    batch.environments.extend(environments)
+    return LocalRunner(headless=True).run_batch_sync(batch).environment_results
+
+
+def test_termination_conditions():
+    """Test that every environment is terminated by its own condition, and only when it holds."""
+    # a spider that holds its joints still drops on the ground, where it lies still and level
+    # the runner passes the components of a pose to mujoco as (w, x, y, z),
+    # so this is a rotation of 60 degrees about the x axis
+    tilted = Quaternion([math.cos(math.pi / 6), math.sin(math.pi / 6), 0.0, 0.0])
+    results = _run(
+        [
+            _make_environment(Termination()),
+            _make_environment(Termination(min_height=0.2)),
+            _make_environment(Termination(min_height=-1.0, max_tilt=0.5)),
+            _make_environment(Termination(max_tilt=0.5), orientation=tilted),
+            _make_environment(Termination(stagnation_window=0.5)),
+        ]
+    )
+
+    reasons = [result.termination_reason for result in results]
+    assert reasons == [None, "min_height", None, "max_tilt", "stagnation"]
+
+    assert results[0].termination_time is None
+    for result in results[1:]:
+        if result.termination_reason is not None:
+            assert result.termination_time < 2.0
+            # the state at termination is the last one
+            assert result.environment_states[-1].time_seconds == result.termination_time
+    assert math.isclose(results[4].termination_time, 0.5, abs_tol=0.11)
+
+
+def test_environment_termination_overrides_batch():
+    """Test that the termination of an environment is used instead of that of the batch."""
+    batch = Batch(
+        simulation_time=1,
+        sampling_frequency=10,
+        control_frequency=10,
+        control=hold_still,
+        termination=Termination(min_height=0.2),
+    )
+    batch.environments.append(_make_environment(None))
+    batch.environments.append(_make_environment(Termination()))
+    results = LocalRunner(headless=True).run_batch_sync(batch).environment_results
+
+    assert results[0].termination_reason == "min_height"
+    assert results[1].termination_reason is None
@@ -0,0 +1,126 @@
+from typing import List, Tuple
+
+import numpy as np
+import pytest
+from pyrr import Quaternion, Vector3
+from revolve2.actor_controller import ActorController
+from revolve2.core.physics.running import Batch, Environment
+from revolve2.runners.mujoco import LocalRunner, VectorEnv
+from revolve2.standard_resources import modular_robots
+
+from tests.runners.mujoco.conftest import (
+    CpgControl,
+    hold_still,
+    make_cpg_environment,
+)
+
+# with these, the runner samples every control step, right after control
+SIMULATION_TIME = 1.0
+CONTROL_FREQUENCY = 20
+SAMPLING_FREQUENCY = 10
+
+
+def _make_environments() -> Tuple[List[Environment], List[ActorController]]:
+    environments = []
+    controllers = []
+    for index in range(2):
+        env, controller = make_cpg_environment(
+            modular_robots.spider(), index, seed=index
+        )
+        environments.append(env)
+        controllers.append(controller)
+    return environments, controllers
+
+
+def _run_batch():
+    environments, controllers = _make_environments()
+    batch = Batch(
+        simulation_time=SIMULATION_TIME,
+        sampling_frequency=SAMPLING_FREQUENCY,
+        control_frequency=CONTROL_FREQUENCY,
+        control=CpgControl(controllers),
+    )
+    batch.environments.extend(environments)
+    return LocalRunner(headless=True).run_batch_sync(batch).environment_results
+
+
+def _rollout(vector_env: VectorEnv, controllers: List[ActorController]):
+    observations = [vector_env.reset()]
+    # the runner first calls the control function after one control step, so the first step keeps the initial dof targets
+    actions = np.zeros((vector_env.num_envs, vector_env.action_size))
+    done = np.zeros(vector_env.num_envs, dtype=np.bool_)
+    while not np.all(done):
+        observation, done = vector_env.step(actions)
+        observations.append(observation)
+        for controller in controllers:
+            controller.step(vector_env.control_step)
+        actions = np.array([controller.get_dof_targets() for controller in controllers])
+    return np.array(observations)
+
+
+def test_vector_env_matches_run_batch():
+    """Test that resetting and stepping the environments gives the states the runner samples."""
+    results = _run_batch()
+    environments, controllers = _make_environments()
+    vector_env = VectorEnv(
+        environments, CONTROL_FREQUENCY, simulation_time=SIMULATION_TIME
+    )
+    observations = _rollout(vector_env, controllers)
+
+    assert vector_env.termination_reasons == ["simulation time", "simulation time"]
+    num_hinges = len(controllers[0].get_dof_targets())
+    for env, result in enumerate(results):
+        states = result.environment_states
+        assert len(observations) == len(states)
+        for observation, state in zip(observations[:, env], states):
+            actor_state = state.actor_states[0]
+            assert np.array_equal(observation[:3], actor_state.position)
+            assert np.array_equal(
+                observation[7 : 7 + num_hinges], actor_state.hinge_angles
+            )
+            assert np.array_equal(observation[7 + num_hinges :], actor_state.hinge_vels)
+
+
+def test_vector_env_reset_repeats_rollout():
+    """Test that a rollout after a reset repeats the previous one, and that actions of the wrong shape are rejected."""
+    environments, controllers = _make_environments()
+    vector_env = VectorEnv(
+        environments, CONTROL_FREQUENCY, simulation_time=SIMULATION_TIME
+    )
+
+    first = _rollout(vector_env, controllers)
+    _, controllers = _make_environments()
+    second = _rollout(vector_env, controllers)
+    assert np.array_equal(first, second)
+
+    with pytest.raises(ValueError):
+        vector_env.step(np.zeros((vector_env.num_envs, vector_env.action_size + 1)))
+
+
+def test_vector_env_starts_from_keyframe_of_pose():
+    """Test that with a settle time, every environment starts from the keyframe of its own pose, as in the runner."""
+    environments, _ = _make_environments()
+    # upside down, rotated half a turn around the x axis in mujoco component order
+    environments[1].actors[0].position = Vector3([1.0, 0.0, 0.1])
+    environments[1].actors[0].orientation = Quaternion([0.0, 1.0, 0.0, 0.0])
+
+    batch = Batch(
+        simulation_time=SIMULATION_TIME,
+        sampling_frequency=SAMPLING_FREQUENCY,
+        control_frequency=CONTROL_FREQUENCY,
+        control=hold_still,
+    )
+    batch.environments.extend(environments)
+    results = (
+        LocalRunner(headless=True, settle_time=0.5)
+        .run_batch_sync(batch)
+        .environment_results
+    )
+    observations = VectorEnv(environments, CONTROL_FREQUENCY, settle_time=0.5).reset()
+
+    for observation, result in zip(observations, results):
+        actor_state = result.environment_states[0].actor_states[0]
+        assert np.array_equal(observation[:3], actor_state.position)
+        assert np.array_equal(observation[3:7], actor_state.orientation)
+    # not the same keyframe
+    assert not np.allclose(observations[0, 3:7], observations[1, 3:7], atol=0.1)
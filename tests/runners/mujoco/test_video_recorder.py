@@ -0,0 +1,55 @@
+import queue
+import threading
+
+import mujoco
+import numpy as np
+import pytest
+from pyrr import Vector3
+from revolve2.runners.mujoco import LocalRunner
+from revolve2.runners.mujoco._video_recorder import VideoRecorder
+
+from tests.runners.mujoco.conftest import make_spider_environment
+
+
+def _make_model() -> mujoco.MjModel:
+    return mujoco.MjModel.from_xml_string(
+        LocalRunner._make_mjcf(make_spider_environment(Vector3([0.0, 0.0, 0.1])))
+    )
+
+
+class _FailingWriter:
+    def write(self, frame) -> None:
+        raise OSError("disk full")
+
+    def release(self) -> None:
+        pass
+
+
+def test_video_recorder_rejects_unwritable_path(tmp_path):
+    """Test that a video file that cannot be opened is reported when the recorder is created."""
+    with pytest.raises(RuntimeError):
+        VideoRecorder(_make_model(), str(tmp_path / "missing" / "video.webm"), 24.0)
+
+
+def test_video_recorder_keeps_returning_frames_after_encoder_errors():
+    """Test that a failing encoder keeps returning frames, so capturing does not block forever, and that its error is raised."""
+    # the encoder thread on its own, as rendering needs an opengl context
+    recorder = VideoRecorder.__new__(VideoRecorder)
+    recorder._free_frames = queue.Queue()
+    for _ in range(3):
+        recorder._free_frames.put(np.zeros((48, 64, 3), dtype=np.uint8))
+    recorder._frames = queue.Queue(maxsize=2)
+    recorder._writer = _FailingWriter()
+    recorder._error = None
+    encoder = threading.Thread(target=recorder._encode, daemon=True)
+    encoder.start()
+
+    # more frames than there are buffers, which would block if the encoder kept them
+    for _ in range(20):
+        recorder._frames.put(recorder._free_frames.get(timeout=10.0))
+    recorder._frames.put(None)
+    encoder.join()
+
+    assert isinstance(recorder._error, OSError)
+    with pytest.raises(RuntimeError, match="Encoding the video failed"):
+        recorder._raise_error()